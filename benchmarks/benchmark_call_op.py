@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of the per-call dispatch overhead of `call_op`.
+
+Compares the previous dispatch (signature introspection, `str(annotation)`
+checks and `eval` of converters on every call) with the compiled call plan.
+The benchmarked operation returns immediately so that only the dispatch
+overhead is measured.
+
+Usage:
+    python benchmarks/benchmark_call_op.py
+"""
+import inspect
+import timeit
+
+import numpy as np
+import napari
+
+from napari_assistant._call_plan import call_plan
+from napari_assistant._operation_spec import operation_spec, separate_argnames_by_type
+
+
+def operation(image: napari.types.ImageData, radius_x: int = 1, radius_y: int = 1,
+              sigma: float = 1, normalize: bool = False, mode: str = "nearest",
+              viewer: napari.Viewer = None) -> napari.types.ImageData:
+    return image
+
+
+def legacy_dispatch(func, gpu_ins, viewer, **kwargs):
+    # dispatch as implemented in call_op before call plans were introduced
+    new_sig = inspect.signature(func)
+    adapter = operation_spec(func).adapter
+    param_names, _, _, _, _ = separate_argnames_by_type(new_sig.parameters.items())
+    args = tuple([kwargs[adapter[key]] for key in param_names])
+    nargs = len([p for p in new_sig.parameters.values() if p.annotation in [np.ndarray, napari.types.ImageData, napari.types.LabelsData, int, str, float, bool]])
+    args = (*gpu_ins, *args)[:nargs + 1]
+
+    sig = inspect.signature(func)
+    kwargs = {}
+    for k, v in sig.parameters.items():
+        if k == "viewer" or k == "napari_viewer" or "napari.viewer.Viewer" in str(v):
+            kwargs[k] = viewer
+
+    for i, k in enumerate(list(sig.parameters.keys())):
+        if i >= len(args):
+            break
+        type_annotation = str(sig.parameters[k].annotation)
+        args = list(args)
+        for typ in ["int", "float", "str"]:
+            if typ in type_annotation:
+                converter = eval(typ)
+                args[i] = converter(args[i])
+    return func(*args, **kwargs), args
+
+
+def plan_dispatch(func, gpu_ins, viewer, **kwargs):
+    plan = call_plan(func)
+    return plan(gpu_ins, plan.arguments(kwargs), viewer)
+
+
+def main(repeat=20000):
+    image = np.zeros((8, 8))
+    kwargs = dict(x=2.0, y=3.0, z=1.5, a=False, k="nearest")
+
+    legacy_result = legacy_dispatch(operation, [image], None, **kwargs)
+    plan_result = plan_dispatch(operation, [image], None, **kwargs)
+    assert legacy_result[1][1:] == plan_result[1][1:]
+
+    for name, dispatch in [("legacy", legacy_dispatch), ("call plan", plan_dispatch)]:
+        seconds = min(timeit.repeat(lambda: dispatch(operation, [image], None, **kwargs), number=repeat, repeat=5))
+        print(f"{name:>10}: {seconds / repeat * 1e6:8.2f} us per call")
+
+
+if __name__ == "__main__":
+    main()
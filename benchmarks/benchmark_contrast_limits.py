@@ -0,0 +1,52 @@
+"""
+Benchmark of contrast-limit estimation for results shown by category widgets.
+
+Before, `_show_result` computed `min()` and `max()` of the full result on
+every update, although the limits are only used when a new layer is created.
+Now they are estimated once for new image layers only, in a single pass over
+a strided subsample of large arrays.
+
+Usage:
+    python benchmarks/benchmark_contrast_limits.py
+"""
+import timeit
+
+import numpy as np
+
+from napari_assistant._contrast import estimate_contrast_limits, min_max
+
+
+def legacy_contrast_limits(data):
+    # as computed in _show_result on every update before
+    clims = [data.min(), data.max()]
+    if clims[1] == 0:
+        clims[1] = 1
+    if clims[0] == clims[1]:
+        clims = None
+    return clims
+
+
+def measure(func, data, repeat=5):
+    return min(timeit.repeat(lambda: func(data), number=1, repeat=repeat))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'volume':>24} {'two passes':>11} {'single pass':>12} {'estimate':>9} {'estimate error':>15}")
+    for shape, dtype in [((64, 512, 512), np.float32),
+                         ((128, 512, 512), np.float32),
+                         ((256, 512, 512), np.uint16)]:
+        data = (rng.random(shape, dtype=np.float32) * 1000).astype(dtype)
+        legacy = legacy_contrast_limits(data)
+        estimate = estimate_contrast_limits(data)
+        error = max(abs(float(a) - float(b)) for a, b in zip(legacy, estimate)) / (float(legacy[1]) - float(legacy[0]))
+        print(f"{str(shape) + ' ' + np.dtype(dtype).name:>24}"
+              f" {measure(legacy_contrast_limits, data) * 1000:9.1f}ms"
+              f" {measure(min_max, data) * 1000:10.1f}ms"
+              f" {measure(estimate_contrast_limits, data) * 1000:7.1f}ms"
+              f" {error * 100:14.2f}%")
+    print("Updates of existing layers don't estimate contrast limits anymore (0 ms per update).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Memory benchmark of the labels dtype policies of call plans.
+
+Before, every labels result of non-clesperanto operations was copied to int64
+on every update (`astype(int)`). The operation benchmarked here returns a
+precomputed label volume, so that only the conversion is measured.
+
+Usage:
+    python benchmarks/benchmark_labels_dtype.py
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import napari
+
+from napari_assistant import _call_plan
+from napari_assistant._call_plan import call_plan
+
+SHAPE = (64, 1024, 1024)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    integer_labels = rng.integers(0, 5000, SHAPE, dtype=np.uint16)
+    float_labels = integer_labels.astype(np.float32)
+
+    def integer_operation(image: napari.types.ImageData) -> napari.types.LabelsData:
+        return integer_labels
+
+    def float_operation(image: napari.types.ImageData) -> napari.types.LabelsData:
+        return float_labels
+
+    print(f"label volume {SHAPE}, {integer_labels.nbytes / 1e6:.0f} MB as uint16")
+    print(f"{'result':>8} {'policy':>9} {'dtype':>7} {'allocated':>10} {'time':>8}")
+    for name, operation in [("uint16", integer_operation), ("float32", float_operation)]:
+        plan = call_plan(operation)
+        for policy in _call_plan.LABELS_DTYPE_POLICIES:
+            _call_plan.labels_dtype_policy = policy
+            tracemalloc.start()
+            start = time.perf_counter()
+            result, _ = plan([None], ())
+            duration = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:>8} {policy:>9} {result.dtype.name:>7} {peak / 1e6:8.0f}MB {duration * 1000:6.0f}ms")
+            del result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Measures startup time and memory of harvesting npe2 widget contributions.
+
+Compares instantiating every widget factory (as the Assistant did before)
+with registering lazy entries and resolving only their functions. It also
+measures `all_operations()` and categorizing its result with a cold and a
+warm catalog cache, including how many widget contributions were resolved on
+the way. To simulate
+a plugin-heavy environment, a synthetic plugin with many magic_factory widget
+contributions is registered in addition to the installed plugins.
+
+Usage:
+    python benchmarks/benchmark_npe2_harvest.py [number_of_synthetic_widgets]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+SYNTHETIC_MODULE = '''
+from magicgui import magic_factory
+
+{functions}
+'''
+
+SYNTHETIC_FUNCTION = '''
+@magic_factory
+def synthetic_{i}(image: "napari.types.ImageData", sigma: float = 1, radius: int = 2) -> "napari.types.ImageData":
+    """Synthetic filter {i}"""
+    return image
+'''
+
+
+def register_synthetic_plugin(count):
+    import npe2
+    from npe2 import PluginManifest
+
+    folder = Path(tempfile.mkdtemp())
+    functions = "".join(SYNTHETIC_FUNCTION.format(i=i) for i in range(count))
+    (folder / "assistant_synthetic_plugin.py").write_text(SYNTHETIC_MODULE.format(functions=functions))
+    sys.path.insert(0, str(folder))
+
+    manifest = PluginManifest(
+        name="assistant-synthetic-plugin",
+        contributions={
+            "commands": [
+                {"id": f"assistant-synthetic-plugin.synthetic_{i}", "title": f"Synthetic {i}",
+                 "python_name": f"assistant_synthetic_plugin:synthetic_{i}"}
+                for i in range(count)
+            ],
+            "widgets": [
+                {"command": f"assistant-synthetic-plugin.synthetic_{i}",
+                 "display_name": f"Filtering > Synthetic {i}"}
+                for i in range(count)
+            ],
+        },
+    )
+    npe2.PluginManager.instance().register(manifest)
+
+
+def eager_harvest():
+    # harvesting as implemented before lazy npe2 entries
+    import npe2
+    from napari_assistant._categories import get_widget_contribution
+    result = {}
+    for c in npe2.PluginManager.instance().iter_widgets():
+        if ">" in c.plugin_name or ">" in c.display_name:
+            factory, menu = get_widget_contribution(c.plugin_name, c.display_name)
+            result[menu.replace(" > ", ">")] = factory()._function
+    return result
+
+
+def lazy_harvest(resolve):
+    from napari_assistant._categories import collect_from_npe2_if_installed
+    result = collect_from_npe2_if_installed()
+    if resolve:
+        result = {k: v.resolve() for k, v in result.items()}
+    return result
+
+
+def cold_all_operations():
+    from napari_assistant._catalog import CACHE_DIR_ENVIRONMENT_VARIABLE
+    os.environ[CACHE_DIR_ENVIRONMENT_VARIABLE] = tempfile.mkdtemp()
+    return warm_all_operations()
+
+
+def warm_all_operations():
+    # like starting the Assistant, which categorizes all operations for the tooltips
+    from napari_assistant._categories import all_operations, attach_tooltips
+    all_operations.cache_clear()
+    attach_tooltips()
+    return all_operations()
+
+
+def count_resolved_widgets():
+    """Count calls of the function resolving npe2 widget contributions"""
+    import napari_assistant._categories as categories
+    original = categories.get_function_of_widget_contribution
+    resolved = []
+
+    def counting(plugin_name, widget_name):
+        resolved.append(widget_name)
+        return original(plugin_name, widget_name)
+
+    categories.get_function_of_widget_contribution = counting
+    return resolved
+
+
+def measure(name, harvest):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = harvest()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>30}: {len(result):5d} operations, {duration:7.3f} s, peak {peak / 1e6:7.1f} MB")
+
+
+def main(count=300):
+    from qtpy.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    register_synthetic_plugin(count)
+
+    # import modules upfront so that only harvesting is measured
+    import npe2
+    import napari_assistant._categories
+    list(npe2.PluginManager.instance().iter_widgets())
+
+    measure("lazy entries", lambda: lazy_harvest(resolve=False))
+    measure("lazy entries, all resolved", lambda: lazy_harvest(resolve=True))
+    measure("instantiating every widget", eager_harvest)
+
+    resolved = count_resolved_widgets()
+    measure("all_operations(), cold cache", cold_all_operations)
+    print(f"{'widgets resolved':>30}: {len(resolved)}")
+    resolved.clear()
+    measure("all_operations(), warm cache", warm_all_operations)
+    print(f"{'widgets resolved':>30}: {len(resolved)}")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -1,5 +1,23 @@
-from ._gui import Assistant
-from .__main__ import main
-from ._viewer import Viewer
-
 __version__ = "0.6.0"
+
+__all__ = ["Assistant", "Viewer", "main", "result_cache", "data_version", "bump_data_version", "data_fingerprint"]
+
+
+def __getattr__(name):
+    # imported on first access so that `import napari_assistant` doesn't load Qt and napari
+    if name == "Assistant":
+        from ._gui import Assistant
+        return Assistant
+    if name == "Viewer":
+        from ._viewer import Viewer
+        return Viewer
+    if name == "main":
+        from .__main__ import main
+        return main
+    if name == "result_cache":
+        from ._result_cache import result_cache
+        return result_cache
+    if name in ("data_version", "bump_data_version", "data_fingerprint"):
+        from . import _data_versions
+        return getattr(_data_versions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,27 @@
 def main():
+    import argparse
+    import sys
+
+    if sys.argv[1:2] == ["batch"]:
+        # executes saved workflows without creating a viewer or any Qt object
+        from ._batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
+    from ._startup import PLUGIN_IMPORT_MODES, DEFERRED_IMPORT_TIMEOUT_MS, start_report, plugin_entry_points, \
+        load_plugins, on_first_frame
+
+    parser = argparse.ArgumentParser(prog="naparia", description="Start napari with the Assistant.",
+                                     epilog="Run 'naparia batch --help' for executing a saved workflow on many images.")
+    parser.add_argument("files", nargs="*", help="images to open")
+    parser.add_argument("--plugin-import", choices=PLUGIN_IMPORT_MODES, default="sequential",
+                        help="import plugins one after another (default), concurrently in a thread pool, "
+                             "or after the viewer was shown")
+    parser.add_argument("--startup-report", metavar="FILE",
+                        help="write per-plugin import times and startup milestones to a JSON file")
+    args = parser.parse_args()
+
+    report = start_report(args.startup_report, args.plugin_import)
+
     # napari 0.6.0 warns that plugins are potentially not working,
     # and ask plugin developers to fix this.
     # However, the plugins are working, they just broke the menu discovery.
@@ -8,50 +31,48 @@ def main():
     from napari._qt.qt_main_window import _QtMainWindow
     _QtMainWindow._warn_on_shimmed_plugins = dummy
 
-    # import plugins ourself
+    # Discover all napari plugins
     try:
-        from importlib.metadata import entry_points
-
-        # Discover all napari plugins
-        try:
-            napari_plugins = entry_points(group='napari.plugin')
-        except TypeError:
-            all_plugins = entry_points()
-            try:
-                napari_plugins = all_plugins['napari.plugins']
-            except KeyError:
-                napari_plugins = []
+        napari_plugins = plugin_entry_points()
         print("plugins found:", len(napari_plugins))
-
-        # import all plugins
-        for ep in napari_plugins:
-            #print("loading", ep.name)
-            import time
-            start_time = time.time()
-            try:
-                ep.load()
-            except:
-                print(f"Error while loading plugin {ep.name}")
-            finally:
-                delta_time = time.time() - start_time
-                if delta_time > 0.1:
-                    print(f"Loading plugin {ep.name} took {delta_time} seconds")
     except:
-        pass
+        napari_plugins = []
+
+    # import all plugins
+    if args.plugin_import != "deferred":
+        load_plugins(napari_plugins, parallel=args.plugin_import == "parallel")
+        report.mark("plugins_imported")
 
     # open a napari viewer
-    import sys
     from ._viewer import Viewer
     from qtpy.QtCore import QTimer
 
     viewer = Viewer()
+    report.mark("viewer_created")
+
+    imports_pending = args.plugin_import == "deferred"
+
+    def import_plugins_deferred():
+        nonlocal imports_pending
+        if imports_pending:
+            imports_pending = False
+            load_plugins(napari_plugins)
+            report.mark("plugins_imported")
+
+    def first_frame():
+        report.mark("first_viewer_frame")
+        # not while the frame is being drawn, the window is shown first
+        QTimer.singleShot(0, import_plugins_deferred)
+
+    on_first_frame(viewer, first_frame)
+    # in case nothing is drawn, e.g. while the window is minimized
+    QTimer.singleShot(DEFERRED_IMPORT_TIMEOUT_MS, import_plugins_deferred)
 
-    if len(sys.argv) > 1:
+    if len(args.files) > 0:
         def later():
-            for pos, arg in enumerate(sys.argv):
-                print('Argument %d: %s' % (pos, arg))
-                if pos > 0:
-                    viewer.open(arg)
+            for pos, arg in enumerate(args.files):
+                print('Argument %d: %s' % (pos + 1, arg))
+                viewer.open(arg)
 
         QTimer.singleShot(600, later)
 
@@ -60,4 +81,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,216 @@
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Sequence
+
+# the workflow executed by this worker process, see `_load_worker_workflow`
+_workflow = None
+
+
+def load_batch_workflow(filename: str):
+    """Load a workflow saved by the Assistant and check that it can be batch processed.
+
+    Returns
+    -------
+    tuple
+        the workflow and the name of its input image
+    """
+    from napari_workflows import _io_yaml_v1
+
+    workflow = _io_yaml_v1.load_workflow(filename)
+    # string parameters, e.g. modes, look like roots too; images are passed as first argument
+    roots = [root for root in workflow.roots()
+             if any(callable(task[0]) and len(task) > 1 and task[1] == root for task in workflow._tasks.values())]
+    if len(roots) != 1:
+        raise ValueError(f"Batch processing requires a workflow with one input image, {filename} has "
+                         f"{len(roots)}: {', '.join(roots)}")
+    return workflow, roots[0]
+
+
+def glob_base(pattern: str) -> str:
+    """Return the folder a glob pattern starts in, i.e. its leading components without wildcards"""
+    pattern = os.path.normpath(pattern)
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    else:
+        # a path without wildcards matches the file itself
+        parts = parts[:-1]
+    if parts == [""]:
+        return os.sep
+    return os.sep.join(parts) or os.curdir
+
+
+def output_paths(input_path: str, output_dir: str, targets: Sequence[str], base: str = None) -> dict:
+    """Return where the results of an input image are written to: one folder per target
+    in the output directory, one .tif file per input image in each folder.
+
+    If given, the input's path relative to the `base` folder is mirrored in each
+    target folder, so that images of the same name in different folders don't collide.
+    """
+    relative = os.path.relpath(input_path, base) if base is not None else os.path.basename(input_path)
+    stem = os.path.splitext(relative)[0]
+    if stem.endswith(".ome"):
+        stem = stem[:-len(".ome")]
+    return {target: os.path.join(output_dir, re.sub(r"[^\w\-. ]", "_", target), stem + ".tif")
+            for target in targets}
+
+
+def _is_inside(path: str, directory: str) -> bool:
+    path, directory = os.path.abspath(path), os.path.abspath(directory)
+    return os.path.commonpath([path, directory]) == directory
+
+
+def _load_worker_workflow(workflow_filename: str):
+    global _workflow
+    _workflow = load_batch_workflow(workflow_filename)
+
+
+def process_file(input_path: str, outputs: dict) -> tuple:
+    """Execute the workflow of this worker process on one image and write the results.
+
+    Results are written to temporary files first and renamed when complete,
+    so that interrupted runs don't leave files which look processed.
+
+    Returns
+    -------
+    tuple
+        number of bytes read and seconds it took
+    """
+    import numpy as np
+    import tifffile
+    from dask.local import get_sync
+
+    start_time = time.perf_counter()
+    workflow, root = _workflow
+    image = tifffile.imread(input_path)
+    tasks = dict(workflow._tasks)
+    tasks[root] = image
+    # files are processed in parallel already, the tasks of one are computed sequentially
+    results = get_sync(tasks, list(outputs))
+    for (target, path), result in zip(outputs.items(), results):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = path + ".part"
+        tifffile.imwrite(temporary, np.asarray(result))
+        os.replace(temporary, path)
+    return image.nbytes, time.perf_counter() - start_time
+
+
+def run_batch(
+    workflow_filename: str,
+    pattern: str,
+    output_dir: str,
+    targets: Sequence[str] = None,
+    workers: int = None,
+    overwrite: bool = False,
+    report: Callable[[str], None] = print,
+) -> dict:
+    """Execute a workflow on all images matching a glob pattern in a process pool.
+
+    Results are written to one folder per target in the output directory, in
+    the same subfolders as their input relative to where the pattern starts.
+    Files in the output directory are never processed. Inputs whose results
+    all exist already are skipped unless `overwrite` is set. Progress is
+    reported per file as soon as it's done.
+
+    Parameters
+    ----------
+    workflow_filename : str
+        a workflow saved as YAML, e.g. by `Assistant.to_file`
+    pattern : str
+        glob pattern of the input images, `**` matches subdirectories
+    output_dir : str
+    targets : sequence of str, optional
+        names of the workflow steps to save, by default its final results
+    workers : int, optional
+        number of processes, by default the number of CPUs
+    overwrite : bool
+        process inputs again whose results exist
+    report : callable
+        called with a line of text per file and the summary
+
+    Returns
+    -------
+    dict
+        numbers of processed, skipped and failed files, seconds and throughput
+    """
+    start_time = time.perf_counter()
+    workflow, _ = load_batch_workflow(workflow_filename)
+    if not targets:
+        targets = workflow.leafs()
+    unknown = [t for t in targets if t not in workflow._tasks]
+    if unknown:
+        raise ValueError(f"Workflow {workflow_filename} has no step {', '.join(unknown)}")
+
+    # results of earlier runs are no inputs, even if the output directory is in the searched folders
+    inputs = sorted(path for path in glob.glob(pattern, recursive=True) if not _is_inside(path, output_dir))
+    base = glob_base(pattern)
+    outputs_of = {input_path: output_paths(input_path, output_dir, targets, base) for input_path in inputs}
+    inputs_of = {}
+    for input_path, outputs in outputs_of.items():
+        for path in outputs.values():
+            if path in inputs_of:
+                raise ValueError(f"{inputs_of[path]} and {input_path} would both be written to {path}")
+            inputs_of[path] = input_path
+
+    summary = {"processed": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    todo = []
+    for input_path, outputs in outputs_of.items():
+        if not overwrite and all(os.path.exists(path) for path in outputs.values()):
+            summary["skipped"] += 1
+            continue
+        todo.append((input_path, outputs))
+    report(f"{len(inputs)} files found, {summary['skipped']} processed already, {len(todo)} to process")
+
+    if todo:
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_workflow,
+                                 initargs=(workflow_filename,)) as executor:
+            futures = {executor.submit(process_file, input_path, outputs): input_path for input_path, outputs in todo}
+            for finished, future in enumerate(as_completed(futures), start=1):
+                input_path = futures[future]
+                try:
+                    nbytes, seconds = future.result()
+                    summary["bytes"] += nbytes
+                    summary["processed"] += 1
+                    status = f"done in {seconds:.2f} s"
+                except Exception as e:
+                    summary["failed"] += 1
+                    status = f"failed: {type(e).__name__}: {e}"
+                report(f"[{finished}/{len(todo)}] {input_path} {status}")
+
+    summary["seconds"] = time.perf_counter() - start_time
+    summary["files_per_second"] = summary["processed"] / max(summary["seconds"], 1e-9)
+    summary["megabytes_per_second"] = summary["bytes"] / 1024 ** 2 / max(summary["seconds"], 1e-9)
+    report(f"{summary['processed']} processed, {summary['skipped']} skipped, {summary['failed']} failed "
+           f"in {summary['seconds']:.1f} s: {summary['files_per_second']:.2f} files/s, "
+           f"{summary['megabytes_per_second']:.1f} MB/s read")
+    return summary
+
+
+def main(argv: Sequence[str] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="naparia batch",
+                                     description="Execute a saved workflow on many images without napari's GUI.")
+    parser.add_argument("workflow", help="workflow YAML file, e.g. saved by the Assistant")
+    parser.add_argument("input", help="glob pattern of input images, e.g. 'data/**/*.tif' (quoted)")
+    parser.add_argument("output", help="directory for the results, one folder per workflow step with the subfolders of the input")
+    parser.add_argument("--target", action="append", dest="targets", metavar="NAME",
+                        help="workflow step to save, can be given multiple times; by default its final results")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, by default the number of CPUs")
+    parser.add_argument("--overwrite", action="store_true", help="process images again whose results exist")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.workflow, args.input, args.output, targets=args.targets, workers=args.workers,
+                        overwrite=args.overwrite, report=lambda line: print(line, flush=True))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
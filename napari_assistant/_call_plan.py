@@ -0,0 +1,182 @@
+import os
+from typing import Sequence
+
+from ._operation_spec import operation_spec
+
+_CONVERTERS = (("int", int), ("float", float), ("str", str))
+
+# How labels results of non-clesperanto operations are typed:
+# "preserve" keeps integer results as they are and casts others to the smallest type fitting all labels,
+# "minimal" casts all results to the smallest type fitting all labels,
+# "int64" casts all results to int64.
+# The smallest types have at least 16 bits, so that labels can be painted into results with few labels.
+LABELS_DTYPE_POLICIES = ("preserve", "minimal", "int64")
+LABELS_DTYPE_ENVIRONMENT_VARIABLE = "NAPARI_ASSISTANT_LABELS_DTYPE"
+labels_dtype_policy = os.environ.get(LABELS_DTYPE_ENVIRONMENT_VARIABLE, "preserve")
+
+
+class CallPlan:
+    """Everything `call_op` needs to call an operation, compiled once.
+
+    The plan holds the ordered category-argument (slot) names to read from the
+    widget kwargs, the type converters per positional argument as plain
+    callables, the names of parameters that receive the viewer and where
+    clesperanto operations get their `None` output.
+
+    Parameters
+    ----------
+    func : callable
+        The operation to compile a plan for
+    """
+    __slots__ = (
+        "function",
+        "slot_names",
+        "num_positional_args",
+        "is_clesperanto",
+        "converters",
+        "viewer_keys",
+        "labels_output",
+        "time_sliced",
+    )
+
+    def __init__(self, func):
+        spec = operation_spec(func)
+        parameters = spec.signature.parameters
+
+        self.function = func
+        self.slot_names = tuple(spec.adapter[key] for key in spec.param_names)
+        self.num_positional_args = spec.num_positional_args
+        self.is_clesperanto = spec.is_clesperanto
+        self.labels_output = spec.return_kind == "labels"
+        self.time_sliced = is_time_sliced(func)
+
+        # pass viewer if requested
+        self.viewer_keys = tuple(
+            k for k, v in parameters.items()
+            if k == "viewer" or k == "napari_viewer" or "napari.viewer.Viewer" in str(v)
+        )
+
+        # make sure that the annotated types are really passed to a given function
+        converters = []
+        for param in list(parameters.values())[:self.num_positional_args + 1]:
+            type_annotation = str(param.annotation)
+            converters.append(tuple(c for typ, c in _CONVERTERS if typ in type_annotation))
+        self.converters = tuple(converters)
+
+    def arguments(self, kwargs: dict) -> tuple:
+        """Collect the values of the operation's parameters from category widget kwargs"""
+        return tuple([kwargs[slot] for slot in self.slot_names])
+
+    def __call__(self, inputs: Sequence, args: tuple, viewer=None, output=None):
+        """Call the operation with input images and parameter values.
+
+        Clesperanto operations write their result into `output` if given; the
+        reported arguments contain None instead.
+
+        Returns
+        -------
+        tuple
+            the result and the arguments the operation was called with
+        """
+        if self.is_clesperanto:
+            # in case of clesperanto ops, we need to inject the output, None lets them allocate it
+            call_args = ((*inputs, output) + args)[:self.num_positional_args]
+            result = self.function(*call_args, **{k: viewer for k in self.viewer_keys})
+            # the output buffer is not an argument of the operation; it must not end
+            # up in workflows, which would write into it when they're executed again
+            return result, ((*inputs, None) + args)[:self.num_positional_args]
+
+        args = list((*inputs, *args)[:self.num_positional_args + 1])
+        for i, converters in enumerate(self.converters[:len(args)]):
+            for converter in converters:
+                args[i] = converter(args[i])
+
+        result = self.function(*args, **{k: viewer for k in self.viewer_keys})
+
+        if self.labels_output:
+            result = as_labels(result)
+
+        return result, args
+
+
+_time_slicer_code = None
+
+
+def is_time_sliced(func) -> bool:
+    """Tell if a function is wrapped by napari_time_slicer's `time_slicer`,
+    i.e. processes the current timepoint of 4D inputs selected in the viewer
+    """
+    global _time_slicer_code
+    if getattr(func, "__wrapped__", None) is None:
+        return False
+    if _time_slicer_code is None:
+        try:
+            from napari_time_slicer import time_slicer
+        except ImportError:
+            return False
+        # all functions wrapped by time_slicer share the code of its inner function
+        _time_slicer_code = time_slicer(lambda: None).__code__
+    return getattr(func, "__code__", None) is _time_slicer_code
+
+
+def timepoint_frame(data, timepoint: int):
+    """Return the frame of 4D data at a given timepoint the way the time slicer
+    does: a single slice in the first dimension of the frame is dropped.
+    Data with fewer dimensions is returned as is.
+    """
+    if data is None or len(data.shape) != 4:
+        return data
+    frame = data[timepoint]
+    if frame.shape[0] == 1:
+        frame = frame[0]
+    return frame
+
+
+def as_labels(result, policy: str = None):
+    """Return a labels result in the type given by a policy, copying only if necessary.
+
+    Parameters
+    ----------
+    result : array-like
+    policy : str, optional
+        one of LABELS_DTYPE_POLICIES, by default `labels_dtype_policy`
+    """
+    import numpy as np
+
+    if policy is None:
+        policy = labels_dtype_policy
+    if policy not in LABELS_DTYPE_POLICIES:
+        raise ValueError(f"Unknown labels dtype policy {policy}, use one of {LABELS_DTYPE_POLICIES}")
+
+    if policy == "int64":
+        return result if result.dtype == np.int64 else result.astype(np.int64)
+    if policy == "preserve" and np.issubdtype(result.dtype, np.integer):
+        return result
+    if "dask" in str(type(result)) or result.size == 0:
+        # the range of lazy arrays is unknown without computing them
+        return result if np.issubdtype(result.dtype, np.integer) else result.astype(np.int64)
+
+    from ._contrast import min_max
+    minimum, maximum = min_max(np.asarray(result))
+    if not np.isfinite(minimum) or not np.isfinite(maximum):
+        return result.astype(np.int64)
+    dtype = np.result_type(np.min_scalar_type(int(minimum)), np.min_scalar_type(int(maximum)))
+    if dtype.itemsize < 2:
+        # labels layers are editable, label 256 painted into uint8 data would wrap around to 0
+        dtype = np.dtype(np.int16 if dtype.kind == "i" else np.uint16)
+    return result if result.dtype == dtype else result.astype(dtype)
+
+
+_plans = {}
+
+
+def call_plan(func) -> CallPlan:
+    """Return the (cached) CallPlan of a given function"""
+    try:
+        plan = _plans.get(func)
+    except TypeError:
+        return CallPlan(func)
+    if plan is None:
+        plan = CallPlan(func)
+        _plans[func] = plan
+    return plan
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+# increase when the layout of the catalog file changes
+CATALOG_FORMAT = 2
+CACHE_DIR_ENVIRONMENT_VARIABLE = "NAPARI_ASSISTANT_CACHE_DIR"
+
+
+class LazyOperation:
+    """An operation whose function was not imported yet.
+
+    It holds everything needed to list, search and categorize the operation,
+    and the import path to resolve the function once it is actually executed.
+    Operations contributed as npe2 widgets are identified by plugin and widget
+    (display) name instead; their docstring, number of image inputs and return
+    kind are None until they were resolved once and written back to the catalog.
+    """
+    __slots__ = (
+        "key",
+        "doc",
+        "module",
+        "qualname",
+        "time_slicer",
+        "num_image_inputs",
+        "return_kind",
+        "plugin",
+        "widget",
+    )
+
+    def __init__(self, key, doc, module, qualname, time_slicer, num_image_inputs, return_kind,
+                 plugin=None, widget=None):
+        self.key = key
+        self.doc = doc
+        self.module = module
+        self.qualname = qualname
+        self.time_slicer = time_slicer
+        self.num_image_inputs = num_image_inputs
+        self.return_kind = return_kind
+        self.plugin = plugin
+        self.widget = widget
+
+    def resolve(self):
+        """Import the function, or return None if it is not available anymore"""
+        if self.plugin is not None:
+            from ._categories import get_function_of_widget_contribution
+            return get_function_of_widget_contribution(self.plugin, self.widget)
+
+        func = _import_function(self.module, self.qualname)
+        if func is not None and self.time_slicer:
+            from napari_time_slicer import time_slicer
+            func = time_slicer(func)
+        return func
+
+
+def _import_function(module, qualname):
+    import importlib
+    try:
+        func = importlib.import_module(module)
+    except Exception:
+        return None
+    for name in qualname.split("."):
+        func = getattr(func, name, None)
+        if func is None:
+            return None
+    return func
+
+
+def catalog_directory() -> Path:
+    """Return the folder where the catalog cache is stored"""
+    directory = os.environ.get(CACHE_DIR_ENVIRONMENT_VARIABLE)
+    if directory:
+        return Path(directory)
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "napari-assistant"
+
+
+def environment_key() -> str:
+    """Return a hash of all installed distributions and their versions.
+
+    Installing, upgrading or removing any package adds, renames or touches its
+    metadata folder and thus changes the key.
+    """
+    entries = []
+    for path in sys.path:
+        try:
+            with os.scandir(path or ".") as it:
+                for entry in it:
+                    if entry.name.endswith((".dist-info", ".egg-info", ".egg-link")):
+                        entries.append(f"{entry.name}:{entry.stat().st_mtime_ns}")
+        except OSError:
+            pass
+    entries.append(f"format:{CATALOG_FORMAT}")
+    return hashlib.sha1("\n".join(sorted(entries)).encode()).hexdigest()
+
+
+def _catalog_file() -> Path:
+    return catalog_directory() / "catalog.json"
+
+
+def load_catalog():
+    """Load the catalog cache if it was written for the current environment
+
+    Returns
+    -------
+    dict(str:LazyOperation) or None
+    """
+    try:
+        with open(_catalog_file(), encoding="utf-8") as f:
+            catalog = json.load(f)
+        if catalog.get("key") != environment_key():
+            return None
+        return {
+            entry["key"]: LazyOperation(
+                entry["key"],
+                entry["doc"],
+                entry["module"],
+                entry["qualname"],
+                entry["time_slicer"],
+                entry["num_image_inputs"],
+                entry["return_kind"],
+                entry["plugin"],
+                entry["widget"],
+            )
+            for entry in catalog["operations"]
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_catalog(operations: dict) -> bool:
+    """Write harvested operations to the catalog cache.
+
+    Functions defined in scripts or inside other functions are only known in
+    the current session and are skipped. Nothing is written if any other
+    function could not be resolved again from its import path. Operations
+    which were not imported yet, e.g. npe2 widget contributions, are written
+    as they are.
+
+    Parameters
+    ----------
+    operations : dict(str:callable)
+        Dictionary of "menu>name"-function pairs
+
+    Returns
+    -------
+    bool
+        True if the catalog was written
+    """
+    from ._operation_spec import operation_spec
+
+    entries = []
+    for key, func in operations.items():
+        if isinstance(func, LazyOperation):
+            # npe2 contributions are written as they are, without importing them;
+            # the registry resolves them when their docstring or inputs are needed
+            # and writes what it found out with `update_catalog`
+            entries.append(_entry(func))
+            continue
+        try:
+            spec = operation_spec(func)
+            module, qualname = func.__module__, func.__qualname__
+        except (AttributeError, TypeError, ValueError):
+            return False
+        if module == "__main__" or "<locals>" in qualname:
+            continue
+        # functions wrapped by time_slicer share the import path of the original
+        wrapped = getattr(func, "__wrapped__", None)
+        time_sliced = wrapped is not None and _import_function(module, qualname) is wrapped
+
+        lazy = LazyOperation(key, func.__doc__, module, qualname,
+                             time_sliced, spec.num_image_inputs, spec.return_kind)
+        resolved = lazy.resolve()
+        if resolved is None:
+            return False
+        if (resolved.__wrapped__ if time_sliced else resolved) is not (wrapped if time_sliced else func):
+            return False
+        entries.append(_entry(lazy))
+
+    try:
+        _write_catalog({
+            "format": CATALOG_FORMAT,
+            "key": environment_key(),
+            "operations": entries,
+        })
+    except OSError:
+        return False
+    return True
+
+
+def update_catalog(operations) -> bool:
+    """Write docstring, number of image inputs and return kind of operations
+    which were resolved after the catalog was written, e.g. npe2 widget
+    contributions, so that they needn't be resolved again in the next session.
+
+    Parameters
+    ----------
+    operations : list(LazyOperation)
+
+    Returns
+    -------
+    bool
+        True if the catalog was written
+    """
+    updates = {lazy.key: lazy for lazy in operations}
+    if len(updates) == 0:
+        return False
+    try:
+        with open(_catalog_file(), encoding="utf-8") as f:
+            catalog = json.load(f)
+        if catalog.get("key") != environment_key():
+            return False
+        for entry in catalog["operations"]:
+            lazy = updates.get(entry["key"])
+            if lazy is not None:
+                entry["doc"] = lazy.doc
+                entry["num_image_inputs"] = lazy.num_image_inputs
+                entry["return_kind"] = lazy.return_kind
+        _write_catalog(catalog)
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    return True
+
+
+def _write_catalog(catalog: dict):
+    directory = catalog_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    temporary = directory / f"catalog.{os.getpid()}.tmp"
+    temporary.write_text(json.dumps(catalog), encoding="utf-8")
+    os.replace(temporary, _catalog_file())
+
+
+def _entry(lazy: LazyOperation) -> dict:
+    return {name: getattr(lazy, name) for name in LazyOperation.__slots__}
+
+
+def clear_catalog():
+    """Delete the catalog cache, e.g. after editing plugins installed in development mode"""
+    try:
+        _catalog_file().unlink()
+    except FileNotFoundError:
+        pass
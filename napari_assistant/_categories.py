@@ -2,16 +2,18 @@ from dataclasses import dataclass, field
 from typing import Any, Sequence, Tuple, Type
 
 import numpy as np
-import napari
-from napari.layers import Image, Labels, Layer
 from typing_extensions import Annotated
 import inspect
 from functools import lru_cache
 
-ImageInput = Annotated[Image, {"label": "Image"}]
-LayerInput = Annotated[Layer, {"label": "Image or labels"}]
-LabelsInput = Annotated[Labels, {"label": "Labels"}]
+# layer types are referred to by name, magicgui resolves them when widgets are
+# made; importing this module thus doesn't import napari
+ImageInput = Annotated["napari.layers.Image", {"label": "Image"}]
+LayerInput = Annotated["napari.layers.Layer", {"label": "Image or labels"}]
+LabelsInput = Annotated["napari.layers.Labels", {"label": "Labels"}]
 global_magic_opts = {"auto_call": True}
+DEFAULT_BUTTON_SIZE = 40
+LAYER_NAME_PREFIX = "Result of "
 
 next_steps_at_the_beginning = [
             "Remove noise",
@@ -53,6 +55,12 @@ class Category:
     tool_tip : str = ""
     tools_menu : str = None
     auto_call : bool = True
+    # pass the previous result of a widget to clesperanto operations as output
+    # if it fits, i.e. if the result shape depends only on the input shape
+    reuse_output : bool = True
+    # the result at a pixel depends only on the inputs in its neighbourhood, so
+    # that it can be computed for a crop of the inputs, e.g. for previews
+    local : bool = False
 
 
 CATEGORIES = {
@@ -66,6 +74,7 @@ CATEGORIES = {
         include=("filter", "denoise"),
         exclude=("combine",),
         tools_menu="Filtering / noise removal",
+        local=True,
     ),
     "Remove background": Category(
         name="Remove background",
@@ -82,6 +91,7 @@ CATEGORIES = {
         include=("filter", "background removal"),
         exclude=("combine",),
         tools_menu="Filtering / background removal",
+        local=True,
     ),
     "Filter": Category(
         name="Filter",
@@ -97,6 +107,7 @@ CATEGORIES = {
         include=("filter",),
         exclude=("combine", "denoise", "background removal", "binary processing"),
         tools_menu="Filtering",
+        local=True,
     ),
     "Combine": Category(
         name="Combine",
@@ -111,6 +122,7 @@ CATEGORIES = {
             "Label",
         ],
         tools_menu="Image math",
+        local=True,
     ),
     "Transform": Category(
         name="Transform",
@@ -123,6 +135,7 @@ CATEGORIES = {
         include=("transform",),
         exclude=("combine",),
         tools_menu="Transform",
+        reuse_output=False,
     ),
     "Projection": Category(
         name="Projection",
@@ -134,6 +147,7 @@ CATEGORIES = {
         output="image",  # can also be labels
         include=("projection",),
         tools_menu="Projection",
+        reuse_output=False,
     ),
     "Binarize": Category(
         name="Binarize",
@@ -287,17 +301,51 @@ def attach_tooltips():
         choices = operations_in_menu(c)
         c.tool_tip = c.description + "\n\nOperations:\n* " + "\n* ".join(choices).replace("_", " ")
 
+    # npe2 contributions resolved on the way don't need to be resolved again in the next session
+    from ._registry import operation_registry
+    operation_registry().save_resolved()
+
 
 @lru_cache(maxsize=1)
 def all_operations():
     """Get a dictionary of all compatible functions of installed plugins
 
+    Operations are read from the on-disk catalog cache if it was written for the
+    currently installed packages. Their functions are then only imported when
+    they are executed, see `_catalog.LazyOperation`.
+
     Returns
     -------
-    dict(str:callable)
+    dict(str:callable or LazyOperation)
         Dictionary of name-function pairs
 
     """
+    import time
+    from ._startup import startup_report
+
+    start_time = time.perf_counter()
+    all_ops = _load_or_harvest_operations()
+
+    report = startup_report()
+    if report is not None:
+        report.duration("first_all_operations", time.perf_counter() - start_time)
+    return all_ops
+
+
+def _load_or_harvest_operations():
+    from ._catalog import load_catalog, save_catalog
+
+    all_ops = load_catalog()
+    if all_ops is not None:
+        # functions registered in this session, e.g. from scripts, are not part of the catalog.
+        # If the tools menu was never imported, nothing can have been registered.
+        import sys
+        if "napari_tools_menu" in sys.modules:
+            tools_ops = collect_from_tools_menu_if_installed(exclude=all_ops)
+            if len(tools_ops) > 0:
+                all_ops = remove_duplicate_operations({**all_ops, **tools_ops})
+        return all_ops
+
     # harvest functions from clesperanto
     cle_ops = collect_from_pyclesperanto_if_installed()
 
@@ -312,6 +360,8 @@ def all_operations():
 
     all_ops = remove_duplicate_operations(all_ops)
 
+    save_catalog(all_ops)
+
     return all_ops
 
 
@@ -363,13 +413,8 @@ def get_name_of_function(func):
     Searches all functions for a given function
     and returns its human-readable name
     """
-    for k, v in all_operations().items():
-        if v is func or getattr(v, '__wrapped__', None) is func:
-            if ">" in k:
-                return k.split(">")[1]
-            else:
-                return k
-    return None
+    from ._registry import operation_registry
+    return operation_registry().name_of(func)
 
 
 def collect_from_pyclesperanto_if_installed():
@@ -411,9 +456,14 @@ def collect_from_pyclesperanto_if_installed():
     return result
 
 
-def collect_from_tools_menu_if_installed():
+def collect_from_tools_menu_if_installed(exclude=()):
     """
     Collect all functions that process images (no dock-widgets and actions) from napari-tools-menu
+
+    Parameters
+    ----------
+    exclude : Container[str], optional
+        menu names which are known already and don't need to be collected again
     """
     try:
         from napari_tools_menu import ToolsMenu
@@ -421,6 +471,7 @@ def collect_from_tools_menu_if_installed():
         print("Assistant skips harvesting tools menu as it's not installed.")
         return {}
 
+    import napari
     import pandas
 
     allowed_types = ["napari.types.LabelsData", "napari.types.ImageData", "int", "float", "str", "bool",
@@ -430,7 +481,7 @@ def collect_from_tools_menu_if_installed():
     result = {}
     for k, v in ToolsMenu.menus.items():
         typ = v[1]
-        if typ == "function":
+        if typ == "function" and k not in exclude:
             f = v[0]
             sig = inspect.signature(f)
 
@@ -460,33 +511,29 @@ def collect_from_tools_menu_if_installed():
 def collect_from_npe2_if_installed():
     """
     Collect all functions provided by the NPE2 interface (napari) which contain
-    a menu name
+    a menu name.
+
+    The widget contributions are neither imported nor instantiated here; they are
+    registered as LazyOperation and resolved on first use.
     """
     try:
         import npe2
     except ImportError:
         print("Assistant skips harvesting npe2 as it's not installed.")
         return {}
+    from ._catalog import LazyOperation
     pm = npe2.PluginManager.instance()
 
     result = {}
-    for pname, item in pm._manifests.items():
-        if item.contributions.widgets is not None:
-            for c in item.contributions.widgets:
-                wname = c.display_name
-                # only harvest items which look like a menu decription
-                # todo: as soon as npe2 supports menus, change this here
-                if ">" in pname or ">" in wname:
-                    # print("loading ", pname, wname)
-
-                    t = get_widget_contribution(pname, wname)
-                    if t is not None:
-                        factory = t[0]
-                        menu = t[1]
-                        kwargs = {}
-                        w = factory(**kwargs)
-                        menu = menu.replace(" > ", ">")
-                        result[menu] = w._function
+    for c in pm.iter_widgets():
+        pname = c.plugin_name
+        wname = c.display_name
+        # only harvest items which look like a menu decription
+        # todo: as soon as npe2 supports menus, change this here
+        if ">" in pname or ">" in wname:
+            menu = wname.replace(" > ", ">")
+            result[menu] = LazyOperation(menu, None, None, None, False, None, None,
+                                         plugin=pname, widget=wname)
     return result
 
 
@@ -503,6 +550,36 @@ def get_widget_contribution(
     return None
 
 
+_widget_contributions = {}
+
+
+def get_function_of_widget_contribution(plugin_name: str, widget_name: str):
+    """
+    Return the function behind a npe2 widget contribution, or None.
+
+    Widgets created by magicgui's magic_factory (including autogenerated ones)
+    carry their function, so no widget needs to be instantiated. Other widget
+    factories are called once to read out their function.
+    """
+    contrib = _widget_contributions.get((plugin_name, widget_name))
+    if contrib is None:
+        # plugins may have been registered since the index was built
+        import npe2
+        _widget_contributions.clear()
+        for c in npe2.PluginManager.instance().iter_widgets():
+            _widget_contributions.setdefault((c.plugin_name, c.display_name), c)
+        contrib = _widget_contributions.get((plugin_name, widget_name))
+        if contrib is None:
+            return None
+    factory = contrib.get_callable()
+    keywords = getattr(factory, "keywords", None)
+    if isinstance(keywords, dict) and "function" in keywords:
+        return keywords["function"]
+    kwargs = {}
+    w = factory(**kwargs)
+    return w._function
+
+
 def filter_operations(menu_name: str):
     """
     Find functions that contain a given name
@@ -529,49 +606,39 @@ def operations_in_menu(category, search_string: str = None):
     """
     if not hasattr(category, "tools_menu"):
         return []
-    menu_name = category.tools_menu
-    choices = filter_operations(menu_name)
-
-    all_ops = all_operations()
+    from ._registry import operation_registry
+    registry = operation_registry()
+    choices = registry.menu_operations(category)
 
     if search_string is not None and len(search_string) > 0:
-        choices_dict = {k: all_ops[k] for k in choices}
-        choices = [c for c, v in choices_dict.items() if search_string in c.lower() or (v.__doc__ is not None and search_string in v.__doc__.lower())]
-    choices = [c.split(">")[1].strip() for c in choices]
-    choices = sorted(choices, key=str.casefold)
+        found = registry.search(search_string)
+        return [name for key, name in choices if key in found]
+    return [name for key, name in choices]
+
+
+def _operations_fitting_category(category):
+    """
+    Return (key, name) pairs of all functions in the menu of a given category
+    with a matching number of image parameters, sorted by name.
+    """
+    from ._registry import operation_registry
+    registry = operation_registry()
+
+    choices = [(k, k.split(">")[1].strip()) for k in filter_operations(category.tools_menu)]
+    choices = sorted(choices, key=lambda c: c[1].casefold())
 
     # check if the image parameters fit
     result = []
-    for name in choices:
-        func = find_function(name)
-        sig = inspect.signature(func)
-
-        # count number of image-like parameters and compare to category
-        num_image_parameters_in_category = len(category.inputs)
-        num_image_parameters_in_function = 0
-        for i, key in enumerate(list(sig.parameters.keys())):
-            type_annotation = str(sig.parameters[key].annotation)
-
-            if "NewType.<locals>.new_type" in type_annotation or \
-                "Image" in type_annotation or \
-                "LabelsData" in type_annotation or \
-                "LayerData" in type_annotation or \
-                "numpy.ndarray" in type_annotation:
-                num_image_parameters_in_function = num_image_parameters_in_function + 1
-            else:
-                break
+    for key, name in choices:
+        num_image_inputs, return_kind = registry.image_inputs_and_return_kind(key)
 
-        if "pyclesperanto" in func.__module__:
-            # all clesperanto function have an output image which we don't pass
-            num_image_parameters_in_function -= 1
-
-        # only keep the function in this category if it matches
-        if num_image_parameters_in_category == num_image_parameters_in_function:
+        # only keep the function in this category if the number of image-like parameters matches
+        if len(category.inputs) == num_image_inputs:
             if category.name == "Measurement":
-                if str(sig.return_annotation) == "pandas.DataFrame":
-                    result.append(name)
+                if return_kind == "dataframe":
+                    result.append((key, name))
             else:
-                result.append(name)
+                result.append((key, name))
 
     return result
 
@@ -580,22 +647,8 @@ def find_function(op_name):
     """
     Find a function by name (in menu)
     """
-    all_ops = all_operations()
-    found_function = None
-
-    # find exact match first
-    for k, f in all_ops.items():
-        if ">" in k:
-            k = k.split(">")[1]
-        if op_name == k:
-            found_function = f
-            break
-
-    if found_function is None:
-        # find approximate match
-        for k, f in all_ops.items():
-            if op_name in k:
-                found_function = f
+    from ._registry import operation_registry
+    found_function = operation_registry().function(op_name)
 
     if found_function is None:
         print("No function found for", op_name)
@@ -611,12 +664,8 @@ def get_category_of_function(func = None, func_name = None):
     if func_name is None:
         func_name = get_name_of_function(func)
 
-    for k, c in CATEGORIES.items():
-        if not callable(c):
-            ops = operations_in_menu(c)
-            if func_name in ops:
-                return c
-    return None
+    from ._registry import operation_registry
+    return operation_registry().category_of(func_name)
 
 
 def filter_categories(search_string: str = ""):
@@ -647,4 +696,6 @@ def filter_categories(search_string: str = ""):
                 result[k] = c
                 category_found = True
 
+    from ._registry import operation_registry
+    operation_registry().save_resolved()
     return result
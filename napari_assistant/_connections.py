@@ -0,0 +1,70 @@
+from typing import Callable, Hashable
+
+
+class ConnectionManager:
+    """Keeps event connections unique and removable.
+
+    Every connection is registered under a key. Connecting a key again is a
+    no-op, so that handlers don't pile up when code runs repeatedly, and
+    connections can be removed by key, e.g. when a layer or widget goes away.
+    """
+
+    def __init__(self):
+        self._connections = {}
+
+    def __contains__(self, key):
+        return key in self._connections
+
+    def __len__(self):
+        return len(self._connections)
+
+    def connect(self, key: Hashable, emitter, callback: Callable) -> bool:
+        """Connect a callback to an emitter unless a connection with the same key exists
+
+        Returns
+        -------
+        bool
+            True if the callback was connected
+        """
+        if key in self._connections:
+            return False
+        emitter.connect(callback)
+        self._connections[key] = (emitter, callback)
+        return True
+
+    def disconnect(self, key: Hashable):
+        """Remove the connection registered under a given key, if any"""
+        connection = self._connections.pop(key, None)
+        if connection is not None:
+            emitter, callback = connection
+            try:
+                emitter.disconnect(callback)
+            except (RuntimeError, ValueError):
+                pass
+
+    def disconnect_all(self):
+        for key in list(self._connections):
+            self.disconnect(key)
+
+
+def handler_counts(viewer) -> dict:
+    """Return how many handlers are attached to the viewer events the Assistant uses.
+
+    Numbers growing over a session without new layers or widgets indicate
+    handlers which are connected repeatedly and never removed.
+
+    Parameters
+    ----------
+    viewer : napari.Viewer
+
+    Returns
+    -------
+    dict
+        number of handlers per event; `layer_data` sums up the data events of all layers
+    """
+    return {
+        "layers_inserted": len(viewer.layers.events.inserted.callbacks),
+        "layers_removed": len(viewer.layers.events.removed.callbacks),
+        "dims_current_step": len(viewer.dims.events.current_step.callbacks),
+        "layer_data": sum(len(layer.events.data.callbacks) for layer in viewer.layers),
+    }
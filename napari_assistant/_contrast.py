@@ -0,0 +1,69 @@
+import math
+
+# arrays with more elements are subsampled with a regular stride before estimating contrast limits
+MAX_SAMPLES = 2 ** 22
+# number of elements processed at once by the single-pass min/max
+BLOCK_SIZE = 2 ** 16
+
+
+def min_max(data):
+    """Return minimum and maximum of a numpy array, reading it only once.
+
+    The array is processed in blocks small enough to stay in the CPU cache
+    while both minimum and maximum of the block are determined.
+    """
+    import numpy as np
+
+    flat = np.ravel(data)
+    if flat.size <= BLOCK_SIZE:
+        return flat.min(), flat.max()
+    minimum = maximum = flat[0]
+    for start in range(0, flat.size, BLOCK_SIZE):
+        block = flat[start:start + BLOCK_SIZE]
+        minimum = np.minimum(minimum, block.min())
+        maximum = np.maximum(maximum, block.max())
+    return minimum, maximum
+
+
+def subsample(data, max_samples: int = MAX_SAMPLES):
+    """Return a view on every n-th element along each axis of an array so that
+    it has at most `max_samples` elements
+    """
+    size = math.prod(data.shape)
+    if size <= max_samples:
+        return data
+    step = math.ceil((size / max_samples) ** (1 / len(data.shape)))
+    return data[tuple(slice(None, None, step) for _ in data.shape)]
+
+
+def estimate_contrast_limits(data):
+    """Estimate contrast limits for showing an image.
+
+    Parameters
+    ----------
+    data : array-like
+        numpy, OpenCL or dask array
+
+    Returns
+    -------
+    list or None
+        [min, max], or None if napari should determine the limits itself, e.g.
+        for lazy (dask) arrays and images with a single intensity
+    """
+    import numpy as np
+
+    if "dask" in str(type(data)):
+        return None
+
+    # large arrays are subsampled before they are transferred from the GPU, if necessary
+    sample = np.asarray(subsample(data))
+    if sample.size == 0:
+        return None
+    clims = list(min_max(sample))
+
+    if clims[1] == 0:
+        clims[1] = 1
+
+    if clims[0] == clims[1]:
+        return None
+    return clims
@@ -0,0 +1,90 @@
+import hashlib
+import weakref
+from functools import partial
+from itertools import count
+
+# number of elements data_fingerprint samples from an array by default
+FINGERPRINT_SAMPLES = 4096
+
+# layer -> current version; versions are drawn from one counter so that they never repeat
+_versions = weakref.WeakKeyDictionary()
+_counter = count(1)
+
+
+def track(layer):
+    """Start maintaining the data version of a layer, if not done already.
+
+    The version is increased whenever the layer emits a `data` event, i.e. new
+    data was assigned, and whenever labels are painted in place.
+    """
+    if layer in _versions:
+        return
+    _versions[layer] = next(_counter)
+    bump = partial(_bump, weakref.ref(layer))
+    layer.events.data.connect(bump)
+    if hasattr(layer.events, "paint"):
+        layer.events.paint.connect(bump)
+
+
+def _bump(layer_reference, event=None):
+    layer = layer_reference()
+    if layer is not None:
+        _versions[layer] = next(_counter)
+
+
+def bump_data_version(layer):
+    """Mark the data of a layer as changed, e.g. after modifying its array in place
+    without notifying napari
+    """
+    track(layer)
+    _bump(weakref.ref(layer))
+
+
+def data_version(layer) -> int:
+    """Return the data version of a layer.
+
+    The version increases monotonically whenever the layer's data changes, so that
+    comparing it to a previously returned version tells in constant time whether the
+    data is unchanged. Layers are tracked from the first call on.
+
+    Parameters
+    ----------
+    layer : napari.layers.Layer
+
+    Returns
+    -------
+    int
+    """
+    version = _versions.get(layer)
+    if version is None:
+        track(layer)
+        version = _versions[layer]
+    return version
+
+
+def data_fingerprint(layer, samples: int = FINGERPRINT_SAMPLES) -> str:
+    """Return a hash of shape, type and evenly spaced samples of a layer's data.
+
+    Use it for arrays which may be modified in place without any event. Only the
+    sampled elements are read, so changes between samples may go unnoticed.
+    Content of lazy (dask) and GPU arrays is not sampled.
+
+    Parameters
+    ----------
+    layer : napari.layers.Layer
+    samples : int, optional
+        maximum number of elements to read
+
+    Returns
+    -------
+    str
+    """
+    import numpy as np
+
+    data = layer.data
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((type(data).__name__, getattr(data, "shape", None), str(getattr(data, "dtype", None)))).encode())
+    if isinstance(data, np.ndarray) and data.size > 0:
+        step = max(1, data.size // samples)
+        digest.update(np.ascontiguousarray(data.flat[::step][:samples]).tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,82 @@
+class DependencyIndex:
+    """Index of which layers are computed from which other layers.
+
+    The index holds input->dependents and dependent->inputs maps, so that the
+    layers affected by a change can be found without scanning all widgets.
+    Layers are compared by identity.
+    """
+
+    def __init__(self):
+        self._inputs = {}
+        self._dependents = {}
+
+    def __contains__(self, dependent):
+        return dependent in self._inputs
+
+    def __len__(self):
+        return len(self._inputs)
+
+    def set_inputs(self, dependent, inputs):
+        """Record the layers a given layer is computed from, replacing earlier inputs"""
+        self._unlink(dependent)
+        inputs = tuple(dict.fromkeys(i for i in inputs if i is not None))
+        self._inputs[dependent] = inputs
+        for i in inputs:
+            self._dependents.setdefault(i, {})[dependent] = None
+
+    def _unlink(self, dependent):
+        for i in self._inputs.pop(dependent, ()):
+            dependents = self._dependents.get(i)
+            if dependents is not None:
+                dependents.pop(dependent, None)
+                if not dependents:
+                    del self._dependents[i]
+
+    def remove(self, layer):
+        """Forget a layer, both as dependent and as input"""
+        self._unlink(layer)
+        for dependent in self._dependents.pop(layer, {}):
+            self._inputs[dependent] = tuple(i for i in self._inputs[dependent] if i is not layer)
+
+    def inputs(self, dependent) -> tuple:
+        return self._inputs.get(dependent, ())
+
+    def dependents(self, layer) -> list:
+        """Return the layers computed directly from a given layer"""
+        return list(self._dependents.get(layer, ()))
+
+    def downstream(self, layer) -> list:
+        """Return all layers computed directly or indirectly from a given layer.
+
+        Every layer is listed once and after all layers of the subgraph it is
+        computed from (topological order). Layers in cycles, e.g. a widget
+        processing its own result, are appended at the end.
+        """
+        # collect the affected subgraph
+        affected = {}
+        stack = [layer]
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in affected:
+                    affected[dependent] = None
+                    stack.append(dependent)
+        affected.pop(layer, None)
+        if not affected:
+            return []
+
+        # count inputs within the subgraph and sort topologically
+        waiting = {d: sum(1 for i in self._inputs[d] if i in affected) for d in affected}
+        ready = [d for d, count in waiting.items() if count == 0]
+        result = []
+        while ready:
+            current = ready.pop()
+            result.append(current)
+            for dependent in self._dependents.get(current, ()):
+                if dependent in waiting:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+        if len(result) < len(affected):
+            done = set(map(id, result))
+            result += [d for d in affected if id(d) not in done]
+        return result
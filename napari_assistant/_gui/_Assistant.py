@@ -5,12 +5,20 @@ from typing import Callable
 from warnings import warn
 from qtpy.QtWidgets import QFileDialog, QLineEdit, QVBoxLayout, QHBoxLayout, QWidget, QMenu, QLabel
 from qtpy.QtGui import QCursor
+from qtpy.QtCore import QTimer
 from typing import Union
+from .._data_versions import track
+from .._dependencies import DependencyIndex
+from .._connections import ConnectionManager, handler_counts
 from .._categories import CATEGORIES, Category, filter_categories, find_function, get_category_of_function
 from ._button_grid import ButtonGrid, _get_highlight_brush, _get_background_brush
-from ._category_widget import make_gui_for_category
+from ._category_widget import make_gui_for_category, OP_ID
+from ._result_layers import ResultLayerIndex
 from napari.viewer import Viewer
 
+# delay between the last key stroke in the search field and filtering the categories
+SEARCH_DEBOUNCE_MS = 150
+
 class Assistant(QWidget):
     """The main Assistant widget.
 
@@ -31,8 +39,16 @@ class Assistant(QWidget):
         super().__init__()
         self._viewer = napari_viewer
         napari_viewer.layers.events.removed.connect(self._on_layer_removed)
+        napari_viewer.layers.events.inserted.connect(self._on_layer_inserted)
         napari_viewer.layers.selection.events.changed.connect(self._on_selection)
         self._layers = {}
+        self._dependencies = DependencyIndex()
+        # data events of layers are connected once when they are added and removed with them
+        self._connections = ConnectionManager()
+        # result layers of widgets are looked up by op_id on every update
+        ResultLayerIndex.install(napari_viewer, OP_ID)
+        for layer in napari_viewer.layers:
+            self._connect_layer(layer)
 
         # visualize intermediate results human-readable from top-left to bottom-right
         self._viewer.grid.stride = -1
@@ -54,13 +70,13 @@ class Assistant(QWidget):
         self.seach_field = QLineEdit("")
         self.seach_field.setPlaceholderText("Enter operation or plugin name to search")
 
-        def text_changed(*args, **kwargs):
-            search_string = self.seach_field.text().lower()
-            self.icon_grid.clear()
-            self.icon_grid.addItems(filter_categories(search_string))
-
-        self.seach_field.textChanged.connect(text_changed)
-        text_changed()
+        # filter categories once the user paused typing
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._filter_categories)
+        self.seach_field.textChanged.connect(self._search_timer.start)
+        self._filter_categories()
 
         # create menu
         self.actions = [
@@ -74,7 +90,9 @@ class Assistant(QWidget):
         self.workflow_actions = [
             ("Export workflow to file", self.to_file),
             ("Load workflow from file", self.load_workflow),
+            ("Process all timepoints", self.process_all_timepoints),
         ]
+        self._time_lapse_job = None
 
         # add Send to script editor menu in case it's installed
         try:
@@ -119,6 +137,10 @@ class Assistant(QWidget):
 
         self._on_selection()
 
+    def _filter_categories(self):
+        search_string = self.seach_field.text().lower()
+        self.icon_grid.show_only(filter_categories(search_string))
+
     def _code_menu(self):
         menu = QMenu(self)
 
@@ -133,6 +155,8 @@ class Assistant(QWidget):
         menu = QMenu(self)
 
         for name, cb in self.workflow_actions:
+            if cb == self.process_all_timepoints and self._time_lapse_job is not None:
+                name = "Cancel processing all timepoints"
             submenu = menu.addAction(name)
             submenu.triggered.connect(cb)
 
@@ -194,6 +218,21 @@ class Assistant(QWidget):
                 pass
             # remove layer from internal list
             self._layers.pop(layer)
+        self._dependencies.remove(layer)
+        self._connections.disconnect(("data", id(layer)))
+
+    def _on_layer_inserted(self, event):
+        self._connect_layer(event.value)
+
+    def _connect_layer(self, layer):
+        self._connections.connect(("data", id(layer)), layer.events.data, self._refesh_data)
+        # maintain data versions so that caches can tell unchanged layers
+        track(layer)
+
+    def handler_counts(self) -> dict:
+        """Return how many event handlers are attached to the viewer and its layers,
+        see napari_assistant._connections.handler_counts"""
+        return handler_counts(self._viewer)
 
 
     def _on_item_clicked(self, item):
@@ -234,9 +273,9 @@ class Assistant(QWidget):
             layer = gui()
             if layer is not None:
                 self._layers[layer] = (dw, gui)
+                self._index_dependencies(layer, gui)
         # optionally turn on auto_call, and make sure that if the input changes we update
         gui._auto_call = category.auto_call
-        self._connect_to_all_layers()
         self._on_selection()
         return gui
 
@@ -244,26 +283,38 @@ class Assistant(QWidget):
         self._refresh(event.source)
 
     def _refresh(self, changed_layer):
-        """Goes through all layers and refreshs those which have changed_layer as input
+        """Invalidates all layers computed directly or indirectly from changed_layer,
+        so that the WorkflowManager recomputes them
 
         Parameters
         ----------
         changed_layer
         """
-        for layer, (dw, mgui) in self._layers.items():
-            for w in mgui:
-                if w.value == changed_layer:
-                    #mgui()
-                    from napari_workflows import WorkflowManager
-                    manager = WorkflowManager.install(self._viewer)
-                    manager.invalidate([changed_layer.name])
-
-    def _connect_to_all_layers(self):
-        """Attach an event listener to all layers that are currently open in napari
+        dependents = self._dependencies.downstream(changed_layer)
+        if not dependents:
+            return
+
+        from napari_workflows import WorkflowManager
+        WorkflowManager.install(self._viewer).invalidate([layer.name for layer in dependents])
+
+    def _index_dependencies(self, layer, gui):
+        """Record which layers the given result layer is computed from, now and
+        whenever the inputs of its widget change
         """
-        for layer in self._viewer.layers:
-            layer.events.data.disconnect(self._refesh_data)
-            layer.events.data.connect(self._refesh_data)
+        input_widgets = [w for w in gui if w.name.startswith("input")]
+
+        def update_inputs(*_):
+            if layer in self._layers:
+                self._dependencies.set_inputs(layer, [w.value for w in input_widgets])
+
+        update_inputs()
+        for w in input_widgets:
+            w.changed.connect(update_inputs)
+
+    def _index_all_dependencies(self):
+        """Index widgets which were added to self._layers in bulk, e.g. by undo/redo"""
+        for layer in [l for l in list(self._layers) if l not in self._dependencies]:
+            self._index_dependencies(layer, self._layers[layer][1])
 
     def load_sample_data(self, fname="Lund_000500_resampled-cropped.tif"):
         data_dir = Path(__file__).parent.parent / "data"
@@ -394,10 +445,55 @@ class Assistant(QWidget):
                 layer = gui()
                 if layer is not None:
                     self._layers[layer] = (dw, gui)
+                    self._index_dependencies(layer, gui)
 
         self._viewer.layers.select_previous()
         self._viewer.layers.select_next()
 
+    def process_all_timepoints(self):
+        """Compute the results of the workflow's final steps for all timepoints
+        of 4D data and add them as new layers. Called while processing, it
+        cancels processing.
+        """
+        if self._time_lapse_job is not None:
+            self._time_lapse_job.cancel()
+            return
+        if len(self._viewer.dims.current_step) != 4:
+            warn("Processing all timepoints is only supported for 4D data.")
+            return
+
+        import napari
+        from napari_workflows import WorkflowManager
+        from napari_workflows._workflow import _viewer_has_layer
+        from .._time_lapse import workflow_frame_function
+        from ._time_lapse import TimeLapseJob
+
+        workflow = WorkflowManager.install(self._viewer).workflow
+        roots = [name for name in workflow.roots() if _viewer_has_layer(self._viewer, name)]
+        targets = [name for name in workflow.leafs() if _viewer_has_layer(self._viewer, name)]
+        root_data = {name: self._viewer.layers[name].data for name in roots}
+        time_lapses = [data for data in root_data.values() if len(data.shape) == 4]
+        if not targets or not time_lapses:
+            warn("The workflow doesn't process any 4D data.")
+            return
+
+        def finished():
+            self._time_lapse_job = None
+
+        self._time_lapse_job = TimeLapseJob(
+            self._viewer,
+            workflow_frame_function(workflow, root_data, targets),
+            max(data.shape[0] for data in time_lapses),
+            names=["Stack 4D " + name for name in targets],
+            layer_types=[
+                "labels" if isinstance(self._viewer.layers[name], napari.layers.Labels) else "image"
+                for name in targets
+            ],
+            scale=next(self._viewer.layers[name].scale for name in roots if len(root_data[name].shape) == 4),
+            on_finished=finished,
+        )
+        self._time_lapse_job.start()
+
     def undo_action(self):
         if len(self._viewer.dims.current_step) > 3:
             raise NotImplementedError("Undo/redo is not supported for 4D data (yet).")
@@ -430,6 +526,7 @@ class Assistant(QWidget):
                     workflow_to_load=undo_wf,
                     layer_list=self._layers
                 )
+                self._index_all_dependencies()
 
             controller.freeze_stacks = False            
 
@@ -466,6 +563,7 @@ class Assistant(QWidget):
                     workflow_to_load=redo_wf,
                     layer_list=self._layers
                 )
+                self._index_all_dependencies()
 
             controller.freeze_stacks = False
 
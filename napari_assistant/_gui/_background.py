@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from qtpy.QtCore import QObject, Signal
+
+
+class _Finished(QObject):
+    # emitted from the worker thread, received in the main thread
+    computed = Signal(object)
+
+
+class LatestOnlyRunner:
+    """Executes the computations of one widget in a worker thread, newest first.
+
+    At most one computation runs at a time. Computations submitted while one is
+    running replace each other, so that only the newest one is started once
+    the running one finished. Results of computations that were superseded in
+    the meantime are dropped instead of being delivered.
+
+    The runner uses its own thread instead of Qt's global thread pool, which may
+    be fully occupied by long-running workers, e.g. of the WorkflowManager.
+
+    Parameters
+    ----------
+    on_busy : callable, optional
+        called with True when the runner starts computing and with False once
+        nothing is running or waiting anymore
+    """
+
+    def __init__(self, on_busy: Callable[[bool], None] = None):
+        self._on_busy = on_busy
+        self._generation = 0
+        self._running = False
+        self._pending = None
+        self._executor = None
+        self._finished = _Finished()
+        self._finished.computed.connect(self._computed)
+
+    @property
+    def busy(self) -> bool:
+        return self._running
+
+    def submit(self, compute: Callable, deliver: Callable):
+        """Run `compute()` in a worker thread and pass its result to `deliver`
+        in the main thread, unless another computation was submitted meanwhile.
+        """
+        self._generation += 1
+        job = (self._generation, compute, deliver)
+        if self._running:
+            self._pending = job
+        else:
+            if self._on_busy is not None:
+                self._on_busy(True)
+            self._start(job)
+
+    def cancel(self):
+        """Drop the results of the running and the waiting computation"""
+        self._generation += 1
+        self._pending = None
+
+    def _start(self, job):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="napari-assistant")
+        self._running = True
+        self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        generation, compute, deliver = job
+        try:
+            outcome = (compute(), None)
+        except Exception as e:
+            outcome = (None, e)
+        self._finished.computed.emit((generation, deliver, outcome))
+
+    def _computed(self, finished):
+        from napari.utils.notifications import notification_manager
+
+        generation, deliver, (result, error) = finished
+        try:
+            if generation == self._generation:
+                if error is not None:
+                    raise error
+                deliver(result)
+        except Exception as e:
+            # exceptions must not leave this slot; they're reported like errors
+            # of operations executed in the main thread
+            notification_manager.receive_error(type(e), e, e.__traceback__)
+        finally:
+            self._running = False
+            job, self._pending = self._pending, None
+            if job is not None:
+                self._start(job)
+            elif self._on_busy is not None:
+                self._on_busy(False)
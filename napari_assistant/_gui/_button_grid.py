@@ -83,3 +83,15 @@ class ButtonGrid(QListWidget):
                 self.addItem(label, labels[label].tool_tip)
             else:
                 self.addItem(label)
+
+    def show_only(self, labels) -> None:
+        """Show the items of the given labels (updating their tool tips) and hide
+        all others, without recreating any item.
+        """
+        for label, item in self.item_mapping.items():
+            if label in labels:
+                if hasattr(labels[label], "tool_tip"):
+                    item.setToolTip(labels[label].tool_tip)
+                item.setHidden(False)
+            else:
+                item.setHidden(True)
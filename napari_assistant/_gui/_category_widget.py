@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from inspect import Parameter, Signature, signature
+from inspect import Parameter, Signature
 
 from qtpy import QtCore
 from qtpy.QtCore import QTimer
-from qtpy.QtWidgets import QDoubleSpinBox, QComboBox, QWidget
+from qtpy.QtWidgets import QDoubleSpinBox, QComboBox, QWidget, QLabel, QCheckBox
 
 from typing import Any, Optional, TYPE_CHECKING, Sequence
 from functools import partial
+import threading
+import time
 
 import toolz
 from loguru import logger
@@ -16,21 +18,30 @@ from typing_extensions import Annotated
 import napari
 import numpy as np
 
-from .._categories import Category, find_function, get_name_of_function
+from .._categories import Category, find_function, get_name_of_function, get_category_of_function, \
+    DEFAULT_BUTTON_SIZE, LAYER_NAME_PREFIX
+from .._call_plan import call_plan, timepoint_frame
+from .._result_cache import result_cache
+from .._connections import ConnectionManager
+from .._contrast import estimate_contrast_limits
+from .._tiling import needs_tiling, process_tiled
+from .._lazy import ChunkedComputation, LAZY_RESULT_NBYTES, block_chunk_shape
+from .._regions import camera_of, current_slice_region, expand, halo_from_arguments, intersect, visible_region
+from ._background import LatestOnlyRunner
+from ._result_layers import ResultLayerIndex
+from ._prefetch import TimepointPrefetcher, timepoint_cache
+from ._scheduler import AutoCallScheduler, MODE_IMMEDIATE, MODE_THROTTLED, MODE_ON_RELEASE
+from .._operation_spec import (
+    operation_spec,
+    separate_argnames_by_type,
+    category_args_numeric,
+    category_args_bool,
+    category_args_text,
+    category_args_file,
+)
 from qtpy.QtWidgets import QPushButton, QDockWidget
 from magicgui.types import PathLike
 
-try:
-    import pyclesperanto_prototype as clep
-    Image_type = clep.Image
-except:
-    Image_type = np.ndarray
-try:
-    import pyclesperanto as cle
-    Image_type2 = cle.Image
-except:
-    Image_type2 = np.ndarray
-
 if TYPE_CHECKING:
     from napari.layers import Layer
     from napari import Viewer
@@ -38,14 +49,23 @@ if TYPE_CHECKING:
 VIEWER_PARAM = "viewer"
 OP_NAME_PARAM = "op_name"
 OP_ID = "op_id"
-DEFAULT_BUTTON_SIZE = 40
-LAYER_NAME_PREFIX = "Result of "
+# metadata key marking layers which show a preview of the visible region
+PREVIEW = "preview"
+PREVIEW_NAME_PREFIX = "Preview of "
+# metadata key marking result layers which show a lazy result computed chunk by chunk on display
+LAZY = "lazy"
 # We currently support operations with up to 6 numeric parameters, 3 booleans and 3 strings (see lists below)
 FloatRange = Annotated[float, {"min": np.finfo(np.float32).min, "max": np.finfo(np.float32).max, "step": 1}]
 BoolType = Annotated[bool, {}]
 StringType = Annotated[str, {}]
 PathLikeType = Annotated[PathLike, {}]
 
+AUTO_CALL_MODE_TEXT = {
+    MODE_IMMEDIATE: "updates immediately",
+    MODE_THROTTLED: "updates throttled to the operation's speed",
+    MODE_ON_RELEASE: "updates on Enter / mouse release",
+}
+
 PositiveFloatRange = Annotated[float, {"min": 0, "max": np.finfo(np.float32).max}]
 category_args = [
     ("x", FloatRange, 0),
@@ -75,14 +95,8 @@ category_args = [
     ("p", PathLikeType, ""),
     ("q", PathLikeType, ""),
 ]
-category_args_numeric = ["x", "y", "z", "u", "v", "w", "w1", "w2", "w3", "w4"]
-category_args_bool = ["a", "b", "c", "d", "e", "f", "g","h","i","j"]
-category_args_text = ["k", "l", "m"]
-category_args_file = ["o", "p", "q"]
-
-def num_positional_args(func, types=[np.ndarray, napari.types.ImageData, napari.types.LabelsData, Image_type, Image_type2, int, str, float, bool]) -> int:
-    params = signature(func).parameters
-    return len([p for p in params.values() if p.annotation in types])
+def num_positional_args(func) -> int:
+    return operation_spec(func).num_positional_args
 
 def kwarg_key_adapter(func):
     '''
@@ -96,51 +110,10 @@ def kwarg_key_adapter(func):
     func: function
         the function for which the mapping should be generated
     '''
-    adapter = {}
-    sig = signature(func)
-    items = sig.parameters.items()
-    # get the names of positional parameters in the new operation
-    param_names, numeric_param_names, bool_param_names, str_param_names, file_param_names = separate_argnames_by_type(
-        items)
-
-    # go through all parameters and collect their values in an args-array
-    num_count = 0
-    str_count = 0
-    bool_count = 0
-    file_count = 0
-    for key in param_names: 
-        if key in numeric_param_names:
-            adapter[category_args_numeric[num_count]] = key
-            adapter[key] = category_args_numeric[num_count]
-            num_count += 1
-        elif key in bool_param_names:
-            adapter[category_args_bool[bool_count]] = key
-            adapter[key] = category_args_bool[bool_count]
-            bool_count += 1
-        elif key in str_param_names:
-            adapter[category_args_text[str_count]] = key
-            adapter[key] = category_args_text[str_count]
-            str_count += 1
-        elif key in file_param_names:
-            adapter[category_args_file[file_count]] = key
-            adapter[key] = category_args_file[file_count]
-            file_count += 1
-
-    other_count = 0    
-    other_param_names = [
-        name
-        for name, param in items
-        if param.annotation not in {int, str, float, bool, PathLike}
-    ]
-    for key in other_param_names:
-        adapter["input" + str(other_count)] = key
-        adapter[key] = "input" + str(other_count)
-        other_count += 1
-
-    return adapter
+    return operation_spec(func).adapter
 
 @logger.catch
-def call_op(op_name: str, inputs: Sequence[Layer], timepoint : int = None, viewer: napari.Viewer = None, **kwargs) -> np.ndarray:
+def call_op(op_name: str, inputs: Sequence[Layer], timepoint : int = None, viewer: napari.Viewer = None, output=None, region=None, **kwargs) -> np.ndarray:
     """Call operation `op_name` with specified inputs and args.
 
     Takes care of transfering data to GPU and omitting extra positional args
@@ -151,6 +124,17 @@ def call_op(op_name: str, inputs: Sequence[Layer], timepoint : int = None, viewe
         name of operation to execute.
     inputs : Sequence[Layer]
         The napari layer inputs
+    timepoint : int, optional
+        timepoint of 4D inputs to process. Time-sliced operations process the
+        timepoint selected in the viewer if a viewer is given, otherwise they
+        process this timepoint.
+    output : array-like, optional
+        an array clesperanto operations write their result into instead of
+        allocating a new one
+    region : tuple of slice, optional
+        process only this crop of the inputs
+
+    Local operations process large inputs tile by tile, see `process_tiled`.
 
     Returns
     -------
@@ -163,64 +147,119 @@ def call_op(op_name: str, inputs: Sequence[Layer], timepoint : int = None, viewe
 
     i0 = inputs[0].data
     gpu_ins = [i.data if i is not None else i0 for i in inputs]
+    if region is not None:
+        gpu_ins = [data[region] for data in gpu_ins]
 
     # call actual cle function ignoring extra positional args
-    cle_function = find_function(op_name)
-    nargs = num_positional_args(cle_function)
+    plan = call_plan(find_function(op_name))
+    args = plan.arguments(kwargs)
+
+    if plan.is_clesperanto:
+        logger.info(f"{op_name}(..., {', '.join(map(str, args))})")
 
+    if timepoint is not None and viewer is None and plan.time_sliced:
+        # without a viewer the time slicer doesn't know the timepoint; call the
+        # original function with the frames and report the arguments as if
+        # the time slicer had been called with the full data
+        frames = [timepoint_frame(data, timepoint) for data in gpu_ins]
+        result, used_args = call_plan(plan.function.__wrapped__)(frames, args, None, output)
+        return result, (*gpu_ins, *used_args[len(gpu_ins):])
 
-    new_sig = signature(cle_function)
-    adapter = kwarg_key_adapter(cle_function)
-    # get the names of positional parameters in the new operation
-    param_names, _, _, _, _ = separate_argnames_by_type(
-        new_sig.parameters.items())
+    if timepoint is None and output is None and needs_tiling(gpu_ins):
+        category = get_category_of_function(func_name=op_name)
+        if category is not None and category.local:
+            return _call_tiled(plan, gpu_ins, args)
 
-    args = tuple([kwargs[adapter[key]] for key in param_names])
+    return plan(gpu_ins, args, viewer, output)
 
-    # in case of clesperanto ops, we need to inject "None" for the output
-    if "pyclesperanto" in cle_function.__module__:
-        # todo: we should handle all functions equally
-        gpu_out = None
 
-        logger.info(f"{op_name}(..., {', '.join(map(str, args))})")
-        args = ((*gpu_ins, gpu_out) + args)[:nargs]
+def _cache_value(computed: tuple, inputs: Sequence[Layer]) -> tuple:
+    """Return what is cached of a result and its arguments: the images among
+    the arguments are left out, they are neither counted in the budget nor
+    released when the value is evicted; see `_from_cache_value`
+    """
+    result, used_args = computed
+    return result, tuple(used_args[len(inputs):])
 
-        gpu_out = cle_function(*args, viewer=viewer)
 
-        # return output
-        return gpu_out, args
-    else:
-        args = (*gpu_ins, *args)[:nargs+1]
+def _from_cache_value(value: tuple, inputs: Sequence[Layer]) -> tuple:
+    """Return a cached result and its arguments, as returned by `call_op`.
+
+    The images are taken from the current inputs; they are the ones the result
+    was computed from because the cache key pins their data versions.
+    """
+    result, args = value
+    i0 = inputs[0].data
+    return result, (*[i.data if i is not None else i0 for i in inputs], *args)
+
+
+def _call_tiled(plan, inputs, args):
+    """Call an operation tile by tile with a halo derived from its parameters;
+    the arguments are reported as if it had been called with the full inputs
+    """
+    used = []
 
-        import inspect
-        sig = inspect.signature(cle_function)
+    def function(*crops):
+        result, used_args = plan(crops, args)
+        used[:] = used_args[len(crops):]
+        return result
 
-        # pass viewer if requested
-        kwargs = {}
-        for k, v in sig.parameters.items():
-            if k == "viewer" or k == "napari_viewer" or "napari.viewer.Viewer" in str(v):
-                kwargs[k] = viewer
+    result = process_tiled(function, inputs, halo_from_arguments(args))
+    return result, (*inputs, *used)
 
-        # Make sure that the annotated types are really passed to a given function
-        for i, k in enumerate(list(sig.parameters.keys())):
-            if i >= len(args):
-                break
-            type_annotation = str(sig.parameters[k].annotation)
-            #print("Annotation:", type_annotation)
-            args = list(args)
-            for typ in ["int", "float", "str"]:
-                if typ in type_annotation:
-                    converter = eval(typ)
-                    #print("converter", converter)
-                    args[i] = converter(args[i])
 
-        gpu_out = cle_function(*args, **kwargs)
+def _call_lazy(op_name: str, inputs: Sequence[Layer], key, halo: int, time_lapse=None, timepoint: int = None,
+               layout: tuple = None, **kwargs):
+    """Call an operation lazily: return a dask array whose chunks are computed
+    when napari displays them.
 
-        if sig.return_annotation in [napari.types.LabelsData, "napari.types.LabelsData"]:
-            if gpu_out.dtype is not int:
-                gpu_out = gpu_out.astype(int)
+    Results of time-lapse data are chunked per timepoint, results of local
+    operations per block, which is computed from the inputs within the block
+    plus a halo. Unless the `layout` of the result is known from an earlier
+    call, the chunk at the current timepoint or the first block is computed
+    right away to determine it and the arguments the operation was called with.
 
-        return gpu_out, args
+    Returns
+    -------
+    tuple
+        the dask array, the arguments as returned by `call_op` or None if the
+        layout was given, and the layout: shape, chunk shape and dtype
+    """
+    if time_lapse is not None:
+        _, compute_at, num_timepoints = time_lapse
+
+        def compute_frame(region):
+            result, _ = compute_at(region[0].start)
+            return np.asarray(result)[np.newaxis]
+
+        chunks = ChunkedComputation(compute_frame, key)
+        used_args = None
+        if layout is None:
+            frame, used_args = compute_at(timepoint)
+            frame = np.asarray(frame)[np.newaxis]
+            chunks.seed((slice(timepoint, timepoint + 1), *[slice(0, n) for n in frame.shape[1:]]), frame)
+            layout = ((num_timepoints, *frame.shape[1:]), frame.shape, frame.dtype)
+        return chunks.array(*layout), used_args, layout
+
+    shape = inputs[0].data.shape
+    used = []
+
+    def compute_block(region):
+        crop, inner = expand(region, halo, shape)
+        result, used_args = call_op(op_name, inputs, None, None, region=crop, **kwargs)
+        used[:] = used_args[len(inputs):]
+        return np.asarray(result)[inner]
+
+    chunks = ChunkedComputation(compute_block, key)
+    if layout is not None:
+        return chunks.array(*layout), None, layout
+    chunk_shape = block_chunk_shape(shape, halo)
+    region = tuple(slice(0, n) for n in chunk_shape)
+    first = compute_block(region)
+    chunks.seed(region, first)
+    data = [i.data if i is not None else inputs[0].data for i in inputs]
+    layout = (shape, chunk_shape, first.dtype)
+    return chunks.array(*layout), (*data, *used), layout
 
 
 def _show_result(
@@ -229,7 +268,6 @@ def _show_result(
     name: str,
     layer_type: str,
     op_id: int,
-    translate=None,
     cmap=None,
     blending=None,
     scale=None,
@@ -249,8 +287,6 @@ def _show_result(
     op_id : int
         an ID to associate with the newly created layer (will be added to
         layer.metada['op_id'])
-    translate : [type], optional
-        translate parameter for layer creation, by default None
     cmap : str, optional
         a colormap to use for images, by default None
     blending : str, optional
@@ -269,29 +305,28 @@ def _show_result(
     if not viewer:
         logger.warning("no viewer, cannot add image")
         return
-    # show result in napari
-    if "dask" in str(type(gpu_out)):
-        clims = None
-    else:
-        clims = [gpu_out.min(), gpu_out.max()]
-
-        if clims[1] == 0:
-            clims[1] = 1
-
-        if clims[0] == clims[1]:
-            clims = None
-
     # conversion will be done inside napari. We can continue working with the potentially OCL-array from here.
     data = gpu_out
 
-    try:
-        # look for an existing layer
-        layer = next(x for x in viewer.layers if isinstance(x.metadata, dict) and x.metadata.get(OP_ID) == op_id)
+    # look for an existing layer
+    layer = ResultLayerIndex.install(viewer, OP_ID).get(op_id)
+    if layer is not None:
         # logger.debug(f"updating existing layer: {layer}, with id: {op_id}")
-        layer.data = data
-        layer.name = name
+        if layer.data is data:
+            # the result was written into the layer's array; redraw it and tell
+            # listeners (workflow, dependents) that the data changed
+            layer.refresh()
+            layer.events.data(value=layer.data)
+        else:
+            ndim = len(layer.data.shape)
+            layer.data = data
+            if len(data.shape) != ndim:
+                _reslice(layer)
+        # renaming emits events and updates the workflow, only do it if necessary
+        if layer.name != name:
+            layer.name = name
         # layer.translate = translate
-    except StopIteration:
+    else:
         # otherwise create a new one
         # logger.debug(f"creating new layer for id: {op_id}")
         add_layer = getattr(viewer, f"add_{layer_type}")
@@ -299,16 +334,103 @@ def _show_result(
         if layer_type == "image":
             kwargs["colormap"] = cmap
             kwargs["blending"] = blending
-            kwargs['contrast_limits'] = clims
+            # contrast limits are only needed for new layers; labels don't have any
+            kwargs['contrast_limits'] = estimate_contrast_limits(data)
 
         layer = add_layer(data, **kwargs)
 
+    _set_scale(layer, scale)
+    return layer
+
+
+def _reslice(layer):
+    # napari slices a layer changing dimensionality at the viewer's position only when asked to;
+    # the reload event is not available in older napari versions
+    if hasattr(layer.events, "reload"):
+        layer.events.reload(layer=layer)
+    else:
+        layer.refresh()
+
+
+def _show_preview(
+    data: np.ndarray,
+    viewer: Viewer,
+    layer: Optional[Layer],
+    name: str,
+    layer_type: str,
+    translate,
+    cmap=None,
+    blending=None,
+    scale=None,
+) -> Optional[Layer]:
+    """Show a preview of part of a result at `translate` in a layer of its own.
+
+    Preview layers are no result layers: they aren't recorded in the workflow
+    and no other widget computes from them. The given preview layer is updated
+    if it's still in the viewer, otherwise a new one is added.
+    """
+    if layer_type not in ("image", "labels"):
+        return None
+
+    if layer is not None and layer in viewer.layers:
+        ndim = len(layer.data.shape)
+        layer.data = data
+        if len(data.shape) != ndim:
+            _reslice(layer)
+        if layer.name != name:
+            layer.name = name
+    else:
+        kwargs = dict(name=name, metadata={PREVIEW: True})
+        if layer_type == "image":
+            kwargs["colormap"] = cmap
+            kwargs["blending"] = blending
+            kwargs['contrast_limits'] = estimate_contrast_limits(data)
+        layer = getattr(viewer, f"add_{layer_type}")(data, **kwargs)
+
+    _set_scale(layer, scale)
+    layer.translate = tuple(translate)[-len(layer.data.shape):]
+    return layer
+
+
+def _set_scale(layer: Layer, scale):
     if scale is not None:
         if len(layer.data.shape) == len(scale):
             layer.scale = scale
         if len(layer.data.shape) < len(scale):
             layer.scale = scale[-len(layer.data.shape):]
-    return layer
+
+
+def _same_shape(inputs) -> bool:
+    """Tell if all given input layers have data of the same shape"""
+    shapes = {tuple(i.data.shape) for i in inputs if i is not None}
+    return len(shapes) == 1
+
+
+def _preview_region(viewer, inputs, halo: int, visible: bool = True, current_slice: bool = False,
+                    time_axis: bool = False):
+    """Determine which crop of the inputs to process for a preview of the visible
+    region and/or the current slice.
+
+    Returns
+    -------
+    tuple or None
+        the crop of the inputs including the halo, the slices cutting the
+        halo off the result, and the translation of the preview; None if the
+        whole image is visible or the inputs differ in shape
+    """
+    layers = [i for i in inputs if i is not None]
+    if viewer is None or not layers or any(i.data.shape != layers[0].data.shape for i in layers):
+        return None
+    region = None
+    if visible:
+        region = visible_region(viewer, layers[0])
+    if current_slice:
+        region = intersect(region, current_slice_region(viewer, layers[0], time_axis))
+    if region is None:
+        return None
+    crop, inner = expand(region, halo, layers[0].data.shape)
+    translate = tuple(s.start * scale + offset for s, scale, offset in zip(region, layers[0].scale, layers[0].translate))
+    return crop, inner, translate
 
 
 def _generate_signature_for_category(category: Category, search_string:str= None, viewer:napari.Viewer = None) -> Signature:
@@ -408,46 +530,240 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
                 from napari_workflows._workflow import _get_layer_from_data
                 inputs.append(_get_layer_from_data(viewer, i))
 
-        result_layer = None
         t_position = None
         if viewer is not None and len(viewer.dims.current_step) == 4:
             # in case we process a 4D-data set, we need read out the current timepoint
             # and consider it further down in call_op
             t_position = viewer.dims.current_step[0]
 
-            currstep_event = viewer.dims.events.current_step
-
             def update(event):
-                #currstep_event.disconnect(update)
-                if result_layer is not None:
+                result_layer = widget._result_layer
+                if result_layer is None or result_layer.metadata.get(LAZY, False):
+                    # lazy results cover all timepoints; napari computes the new one when showing it
+                    return
+                if widget._time_lapse is not None and widget._time_lapse[0](viewer.dims.current_step[0]) in widget._timepoints:
+                    # the timepoint was computed earlier or prefetched, show it right away
+                    widget()
+                else:
                     from napari_workflows import WorkflowManager
                     manager = WorkflowManager.install(viewer)
                     manager.invalidate([result_layer.name])
-                #widget()
 
-            if hasattr(widget, 'updater'):
-                currstep_event.disconnect(widget.updater)
+            # connected once per widget
+            widget._connections.connect("current_step", viewer.dims.events.current_step, update)
+
+        if viewer is not None and category.local:
+            def shows_preview():
+                # napari computes what becomes visible of lazy results itself
+                return widget._result_layer is not None and not widget._result_layer.metadata.get(LAZY, False)
 
-            widget.updater = update
+            def pan_or_zoom(event):
+                if widget._preview.isChecked() and shows_preview():
+                    widget._run_in_background()
 
-            currstep_event.connect(update)
+            def slice_or_view_changed(event):
+                if widget._current_slice.isChecked() and shows_preview():
+                    widget._run_in_background()
+
+            # connected once per widget
+            camera = camera_of(viewer)
+            widget._connections.connect("camera_center", camera.events.center, pan_or_zoom)
+            widget._connections.connect("camera_zoom", camera.events.zoom, pan_or_zoom)
+            # in 3D view, the full volume is computed
+            widget._connections.connect("current_slice", viewer.dims.events.current_step, slice_or_view_changed)
+            widget._connections.connect("ndisplay", viewer.dims.events.ndisplay, slice_or_view_changed)
 
         # todo: deal with 5D and nD data
         op_name = kwargs.pop("op_name")
-        try:
-            result, used_args = call_op(op_name, inputs, t_position, viewer, **kwargs)
-        except TypeError as e:
-            result = None
-            used_args = []
-            import warnings
-            warnings.warn("Operation failed. Please check input parameters and documentation.\n" + str(e))
 
+        # neighbouring timepoints are computed again after this call
+        widget._prefetcher.cancel()
+
+        # results of earlier calls with the same inputs and parameters are reused;
+        # the key is determined before the input data may change during computation
+        cache = result_cache()
+        function = find_function(op_name)
+        cache_key = None
+        time_lapse = None
+        if function is not None:
+            args = call_plan(function).arguments(kwargs)
+            if t_position is None:
+                cache_key = cache.key(op_name, inputs, None, args)
+            else:
+                # results of time-lapse data are cached per widget and timepoint
+                cache = widget._timepoints
+                key_at = lambda t: cache.key(op_name, inputs, t, args)
+                cache_key = key_at(t_position)
+                count = max((i.data.shape[0] for i in inputs if i is not None and len(i.data.shape) == 4), default=0)
+                if count > 0 and call_plan(function).time_sliced:
+                    compute_at = lambda t: call_op(op_name, inputs, t, None, **kwargs)
+                    time_lapse = (key_at, compute_at, count)
+            widget._time_lapse = time_lapse
+
+        on_main_thread = threading.current_thread() is threading.main_thread()
+
+        # lazy results are computed chunk by chunk when they're displayed; they
+        # cover all timepoints and are cached apart from results computed at once
+        lazy = function is not None and widget._lazy.isChecked() \
+            and (time_lapse is not None or (category.local and t_position is None and _same_shape(inputs)))
+        if lazy:
+            key = cache.key(op_name, inputs, None, args)
+            cache_key = None if key is None else (LAZY, key)
+
+        # while parameters of local operations are tuned, only the visible region is computed
+        preview = None
+        if widget._compute_in_background and on_main_thread and function is not None and not lazy \
+                and not widget._applying and (widget._preview.isChecked() or widget._current_slice.isChecked()):
+            preview = _preview_region(viewer, inputs, halo_from_arguments(args),
+                                      visible=widget._preview.isChecked(),
+                                      current_slice=widget._current_slice.isChecked(),
+                                      time_axis=t_position is not None)
+        if preview is not None:
+            cache_key = None
+            time_lapse = None
+
+        # clesperanto operations may write into the previous result if it has the
+        # right shape and type, unless the cache still hands it out; so results are
+        # cached as long as the cache has room and reused once it evicted them.
+        # Large inputs of local operations are tiled instead, their results stay on the host
+        output = None
+        output_signature = None
+        if function is not None and t_position is None and preview is None and not lazy and category.reuse_output \
+                and call_plan(function).is_clesperanto \
+                and not (category.local and needs_tiling([i.data for i in inputs if i is not None])):
+            output_signature = (op_name, tuple((tuple(i.data.shape), str(i.data.dtype)) for i in inputs if i is not None))
+            if widget._output is not None:
+                signature, buffer = widget._output
+                # only device arrays are reused, host arrays would be copied to the device
+                if signature == output_signature and not cache.holds(buffer) and not isinstance(buffer, np.ndarray):
+                    output = buffer
+
+        def compute():
+            cached = cache.get(cache_key)
+            if cached is not None:
+                if lazy:
+                    # the dask array is made again, its chunks are still in the chunk cache
+                    layout, used_args = cached
+                    result, _, _ = _call_lazy(op_name, inputs, cache_key, halo_from_arguments(args),
+                                              time_lapse, t_position, layout=layout, **kwargs)
+                    cached = (result, used_args)
+                return _from_cache_value(cached, inputs)
+
+            start_time = time.perf_counter()
+            try:
+                if lazy:
+                    result, used_args, layout = _call_lazy(op_name, inputs, cache_key, halo_from_arguments(args),
+                                                           time_lapse, t_position, **kwargs)
+                else:
+                    result, used_args = call_op(op_name, inputs, t_position, viewer, output=output,
+                                                region=preview[0] if preview is not None else None, **kwargs)
+            except TypeError as e:
+                result = None
+                used_args = []
+                import warnings
+                warnings.warn("Operation failed. Please check input parameters and documentation.\n" + str(e))
+            widget._scheduler.record(op_name, time.perf_counter() - start_time)
+
+            if preview is not None and result is not None:
+                # cut off the halo
+                inner = preview[1]
+                result = np.asarray(result)[inner[len(inner) - len(result.shape):]]
+
+            # results written into a reused buffer are overwritten by the next call and can't be cached;
+            # the chunks of lazy results are kept in a cache of their own, only their layout
+            # is cached here, as the dask array's graph references the inputs
+            if result is not None and lazy:
+                cache.put(cache_key, _cache_value((layout, used_args), inputs), LAZY_RESULT_NBYTES)
+            elif result is not None and output is None and "dask" not in str(type(result)):
+                cache.put(cache_key, _cache_value((result, used_args), inputs), getattr(result, "nbytes", 0),
+                          buffer=result)
+            return result, used_args
+
+        def prefetch():
+            if time_lapse is not None and not lazy:
+                key_at, compute_at, count = time_lapse
+                widget._prefetcher.prefetch(t_position, count, key_at, lambda t: _cache_value(compute_at(t), inputs))
+
+        def keep_output(result):
+            # called on the main thread, so that a buffer is never handed to two computations
+            if output_signature is not None and result is not None:
+                widget._output = (output_signature, result)
+
+        if on_main_thread:
+            widget._process_all_button.setVisible(time_lapse is not None)
+            widget._lazy.setVisible(category.local or time_lapse is not None)
+        if widget._compute_in_background and on_main_thread:
+            # parameter changes of auto-calling widgets are computed in a worker thread;
+            # only the result of the newest parameters is shown
+            def deliver(computed):
+                widget._scheduler.mode()
+                keep_output(computed[0])
+                show(op_name, inputs, viewer, *computed, translate=preview[2] if preview is not None else None,
+                     lazy=lazy)
+                prefetch()
+
+            widget._runner.submit(compute, deliver)
+            return None
+
+        # results of computations which are still running or changes which are
+        # still held back are outdated now
+        widget._runner.cancel()
+        computed = compute()
+        keep_output(computed[0])
+        if on_main_thread:
+            widget._scheduler.cancel()
+            widget._scheduler.mode()
+        result_layer = show(op_name, inputs, viewer, *computed, lazy=lazy)
+        prefetch()
+        return result_layer
+
+    def remove_preview(viewer):
+        preview_layer, widget._preview_layer = widget._preview_layer, None
+        if preview_layer is None:
+            return
+        widget._apply.setVisible(False)
+        if preview_layer in viewer.layers:
+            viewer.layers.remove(preview_layer)
+        if widget._result_layer is not None:
+            widget._result_layer.visible = widget._result_visible
+
+    def show(op_name, inputs, viewer, result, used_args, translate=None, lazy=False) -> Optional[Layer]:
+        """Show the result of an operation and record it in the workflow.
+
+        Previews of the visible region, which are shown at `translate`, go to
+        a preview layer, while the result layer keeps the last full result and
+        is hidden; the preview layer is removed once a full result is shown,
+        e.g. after clicking the apply button shown meanwhile.
+        Lazy results are marked, so that they aren't recomputed when the
+        timepoint changes.
+        """
         # add a help-button
         description = find_function(op_name).__doc__
         if description is not None:
             description = description.replace("\n    ", "\n").replace("\n", "<br/>")
             getattr(widget, OP_NAME_PARAM).native.setToolTip("<html>" + description + "</html>")
 
+        if result is not None and translate is not None:
+            # updating the result layer would make dependent widgets and the
+            # workflow compute from the crop
+            if widget._preview_layer is None and widget._result_layer is not None:
+                widget._result_visible = widget._result_layer.visible
+                widget._result_layer.visible = False
+            widget._preview_layer = _show_preview(
+                result,
+                viewer,
+                widget._preview_layer,
+                name=PREVIEW_NAME_PREFIX + LAYER_NAME_PREFIX + f"{op_name}",
+                layer_type=category.output,
+                translate=translate,
+                cmap=category.color_map,
+                blending=category.blending,
+                scale=inputs[0].scale,
+            )
+            # the workflow keeps the parameters of the full result until they're applied
+            widget._apply.setVisible(True)
+            return widget._preview_layer
+
         if result is not None:
             from napari.layers._source import layer_source
             with layer_source(widget=widget):
@@ -463,6 +779,9 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
                 )
             if result_layer is None:
                 return None
+            result_layer.metadata[LAZY] = lazy
+            widget._result_layer = result_layer
+            remove_preview(viewer)
 
             # notify workflow manager that something was created / updated
             try:
@@ -471,14 +790,14 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
 
                 # this step basically separates actual arguments from kwargs as this can cause 
                 # conflicts when setting the workflow step. 
-                signat = signature(find_function(op_name))
+                spec = operation_spec(find_function(op_name))
                 only_args = [
-                    arg for arg, param in zip(used_args,signat.parameters.values()) 
-                    if param.default is param.empty
+                    arg for arg, required in zip(used_args, spec.required)
+                    if required
                 ]
                 determined_kwargs = {
-                    name:value for (name,param),value in zip(signat.parameters.items(),used_args) 
-                    if not (param.default is param.empty)
+                    name:value for name, required, value in zip(spec.parameter_names, spec.required, used_args)
+                    if not required
                 }
                 # debugging prints
                 #print(f'only arguments: {only_args}')
@@ -488,9 +807,15 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
             except ImportError:
                 pass # recording workflows in the WorkflowManager is a nice-to-have at the moment.
 
+            widget._inputs = inputs
+            widget._viewer = viewer
+
             def _on_layer_removed(event):
                 layer = event.value
-                if layer in inputs or layer is result_layer:
+                if layer in widget._inputs or layer is widget._result_layer:
+                    # the widget is closed, its handlers aren't needed anymore
+                    widget._connections.disconnect_all()
+                    remove_preview(viewer)
                     try:
                         viewer.window.remove_dock_widget(widget.native)
                     # TODO find more elegant or specific solution 
@@ -498,7 +823,8 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
                     except:
                         pass
 
-            viewer.layers.events.removed.connect(_on_layer_removed)
+            # connected once per widget
+            widget._connections.connect("layer_removed", viewer.layers.events.removed, _on_layer_removed)
 
             return result_layer
         return None
@@ -509,6 +835,10 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
     # create the widget
     widget = magicgui(gui_function, auto_call=autocall)
     widget.native.setMinimumWidth(100)
+    _compute_changes_in_background(widget, autocall)
+    _add_process_all_timepoints_button(widget, category)
+    _add_preview_checkboxes(widget, category)
+    _add_lazy_checkbox(widget, category)
     modify_layout(widget.native, button_size=button_size)
 
     if operation_name == None:
@@ -521,11 +851,13 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
 
     @op_name_widget.changed.connect
     def update_positional_labels(*_: Any):
-        func = find_function(op_name_widget.value)
-        new_sig = signature(func)
+        spec = operation_spec(find_function(op_name_widget.value))
         # get the names of positional parameters in the new operation
-        param_names, numeric_param_names, bool_param_names, str_param_names, file_param_names = separate_argnames_by_type(
-            new_sig.parameters.items())
+        param_names = spec.param_names
+        numeric_param_names = spec.numeric_param_names
+        bool_param_names = spec.bool_param_names
+        str_param_names = spec.str_param_names
+        file_param_names = spec.file_param_names
         num_count = 0
         str_count = 0
         bool_count = 0
@@ -580,6 +912,159 @@ def make_gui_for_category(category: Category, search_string:str = None, viewer:
     return widget
 
 
+def _compute_changes_in_background(widget, autocall: bool):
+    """Compute results in a worker thread when parameters of an auto-calling widget change.
+
+    Explicit calls of the widget, e.g. when it's added or when a workflow is
+    loaded or updated, stay synchronous and return the result layer.
+    An AutoCallScheduler decides when changes are executed depending on how
+    long the operation takes. A label on the widget tells which mode is active
+    and while results are being computed.
+    """
+    status = QLabel()
+    widget.native.layout().addWidget(status)
+
+    def update_status(*_):
+        text = AUTO_CALL_MODE_TEXT[widget._scheduler.mode()] if autocall else ""
+        if widget._runner.busy:
+            text = (text + ", " if text else "") + "computing ..."
+        status.setText(text)
+        status.setVisible(len(text) > 0)
+
+    def run():
+        widget._compute_in_background = True
+        try:
+            widget._on_change()
+        finally:
+            widget._compute_in_background = False
+
+    widget._compute_in_background = False
+    widget._run_in_background = run
+    widget._result_layer = None
+    widget._preview_layer = None
+    widget._result_visible = True
+    widget._output = None
+    widget._time_lapse = None
+    widget._timepoints = timepoint_cache()
+    widget._prefetcher = TimepointPrefetcher(widget._timepoints)
+    widget._inputs = []
+    widget._viewer = None
+    widget._connections = ConnectionManager()
+    widget._runner = LatestOnlyRunner(on_busy=update_status)
+    widget._scheduler = AutoCallScheduler(
+        widget,
+        run,
+        operation_name=lambda: getattr(widget, OP_NAME_PARAM).value,
+        on_mode_changed=update_status,
+    )
+    # the scheduler calls the widget instead of every change
+    widget.changed.disconnect(widget._on_change)
+    update_status()
+
+
+def _add_preview_checkboxes(widget, category: Category):
+    """Add checkboxes to widgets of local operations which limit computations
+    after parameter changes to the region visible in the canvas and/or to the
+    current slice of stacks viewed in 2D (plus a halo). Unchecking them, or
+    clicking the apply button shown while a preview is shown, computes the
+    full image and records its parameters in the workflow.
+    """
+    def toggled(*_):
+        if widget._result_layer is not None:
+            widget._run_in_background()
+
+    def apply(*_):
+        widget._applying = True
+        try:
+            widget._run_in_background()
+        finally:
+            widget._applying = False
+
+    checkboxes = []
+    for text, tool_tip in [
+        ("Preview visible region only", "Compute only what is visible while tuning parameters of large images."),
+        ("Compute current slice only", "Compute only the slice shown in 2D view while tuning parameters of stacks. "
+                                       "The whole stack is computed in 3D view."),
+    ]:
+        checkbox = QCheckBox(text)
+        checkbox.setToolTip(tool_tip + " The workflow is updated once the full image is computed.")
+        checkbox.setVisible(category.local)
+        checkbox.toggled.connect(toggled)
+        widget.native.layout().addWidget(checkbox)
+        checkboxes.append(checkbox)
+    widget._preview, widget._current_slice = checkboxes
+
+    button = QPushButton("Apply to whole image")
+    button.setToolTip("Compute the whole image with the current parameters and record them in the workflow.")
+    button.setVisible(False)
+    button.clicked.connect(apply)
+    widget.native.layout().addWidget(button)
+    widget._apply = button
+    widget._applying = False
+
+
+def _add_lazy_checkbox(widget, category: Category):
+    """Add a checkbox to widgets of local operations and time-lapse data which
+    makes them return lazy results: chunks per timepoint or block are computed
+    when they're displayed, recently viewed ones are cached. Parameter changes
+    then only compute what is viewed.
+    """
+    def toggled(*_):
+        if widget._result_layer is not None:
+            widget._run_in_background()
+
+    checkbox = QCheckBox("Compute lazily while viewing")
+    checkbox.setToolTip("Compute parts of the result only when they are displayed, e.g. the current timepoint "
+                        "or the blocks of the current slice. Recently viewed parts are kept in memory.")
+    checkbox.setVisible(category.local)
+    checkbox.toggled.connect(toggled)
+    widget.native.layout().addWidget(checkbox)
+    widget._lazy = checkbox
+
+
+def _add_process_all_timepoints_button(widget, category: Category):
+    """Add a button to a widget that applies its operation to all timepoints of
+    4D inputs and adds the stacked result as new layer. Clicking it again while
+    processing cancels it. The button is shown for time-lapse data only.
+    """
+    button = QPushButton("Process all timepoints")
+    button.setVisible(False)
+    widget.native.layout().addWidget(button)
+    widget._process_all_button = button
+    widget._time_lapse_job = None
+
+    def finished():
+        widget._time_lapse_job = None
+        button.setText("Process all timepoints")
+
+    def clicked(*_):
+        if widget._time_lapse_job is not None:
+            widget._time_lapse_job.cancel()
+            return
+        if widget._time_lapse is None or widget._result_layer is None:
+            return
+        _, compute_at, count = widget._time_lapse
+
+        def compute_frame(t):
+            result, _ = compute_at(t)
+            return (result,)
+
+        from ._time_lapse import TimeLapseJob
+        widget._time_lapse_job = TimeLapseJob(
+            widget._viewer,
+            compute_frame,
+            count,
+            names=["Stack 4D " + widget._result_layer.name],
+            layer_types=[category.output],
+            scale=widget._inputs[0].scale if widget._inputs else None,
+            on_finished=finished,
+        )
+        button.setText("Cancel processing all timepoints")
+        widget._time_lapse_job.start()
+
+    button.clicked.connect(clicked)
+
+
 def modify_layout(widget, button_size = 32):
     QTimer.singleShot(100, partial(_modify_layout, widget, button_size))
 
@@ -611,31 +1096,3 @@ def _modify_layout(widget, button_size=32):
                     modify_layout(w.widget(), button_size=button_size)
     except:
         pass
-
-def separate_argnames_by_type(items):
-    param_names = [
-        name
-        for name, param in items
-        if param.annotation in {int, str, float, bool, PathLike}
-    ]
-    numeric_param_names = [
-        name
-        for name, param in items
-        if param.annotation in {int, float}
-    ]
-    bool_param_names = [
-        name
-        for name, param in items
-        if param.annotation in {bool}
-    ]
-    str_param_names = [
-        name
-        for name, param in items
-        if param.annotation in {str}
-    ]
-    file_param_names = [
-        name
-        for name, param in items
-        if param.annotation in {PathLike}
-    ]
-    return param_names, numeric_param_names, bool_param_names, str_param_names, file_param_names
@@ -0,0 +1,107 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable
+
+from .._result_cache import ResultCache
+
+# number of timepoints computed ahead in the direction the time slider moves
+PREFETCH_TIMEPOINTS = 3
+# default memory budget of the timepoint cache of each widget in megabytes
+DEFAULT_TIMEPOINT_BUDGET_MB = 256
+TIMEPOINT_BUDGET_ENVIRONMENT_VARIABLE = "NAPARI_ASSISTANT_TIMEPOINT_CACHE_MB"
+
+
+def timepoint_cache() -> ResultCache:
+    """Return a new cache for the results of one widget at different timepoints.
+
+    The budget is read from the environment variable
+    NAPARI_ASSISTANT_TIMEPOINT_CACHE_MB, by default 256 MB.
+    """
+    budget_mb = float(os.environ.get(TIMEPOINT_BUDGET_ENVIRONMENT_VARIABLE, DEFAULT_TIMEPOINT_BUDGET_MB))
+    return ResultCache(max_bytes=int(budget_mb * 1024 ** 2))
+
+
+class TimepointPrefetcher:
+    """Computes the results of timepoints next to the current one in a worker thread.
+
+    Timepoints ahead in the direction the time slider moved last are computed
+    first, then the ones behind. Results are stored in a cache; timepoints that
+    are cached already are skipped. A new request or `cancel()` stops working
+    on the previous one after the timepoint being computed.
+
+    Parameters
+    ----------
+    cache : ResultCache
+        where results are stored
+    num_timepoints : int
+        how many timepoints to compute in each direction
+    """
+
+    def __init__(self, cache: ResultCache, num_timepoints: int = PREFETCH_TIMEPOINTS):
+        self._cache = cache
+        self._num_timepoints = num_timepoints
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._last_timepoint = None
+        self._direction = 1
+
+    def timepoints(self, current: int, count: int) -> list:
+        """Return the timepoints to compute around the current one, most likely needed first"""
+        if self._last_timepoint is not None and current != self._last_timepoint:
+            self._direction = 1 if current > self._last_timepoint else -1
+        self._last_timepoint = current
+
+        order = []
+        for direction in (self._direction, -self._direction):
+            for distance in range(1, self._num_timepoints + 1):
+                t = current + direction * distance
+                if 0 <= t < count:
+                    order.append(t)
+        return order
+
+    def prefetch(self, current: int, count: int, key_at: Callable[[int], Hashable], compute_at: Callable[[int], tuple]):
+        """Compute the timepoints around `current` which aren't cached yet.
+
+        Parameters
+        ----------
+        current : int
+            the timepoint shown in the viewer
+        count : int
+            number of timepoints
+        key_at : callable
+            returns the cache key of a timepoint
+        compute_at : callable
+            computes the value to cache for a timepoint; it's called in the
+            worker thread and must not access the viewer
+        """
+        jobs = [(key_at(t), t) for t in self.timepoints(current, count)]
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        jobs = [(key, t) for key, t in jobs if key is not None and key not in self._cache]
+        if not jobs:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="napari-assistant-prefetch")
+        self._executor.submit(self._run, generation, jobs, compute_at)
+
+    def cancel(self):
+        """Stop computing timepoints requested earlier"""
+        with self._lock:
+            self._generation += 1
+
+    def _run(self, generation, jobs, compute_at):
+        for key, t in jobs:
+            if generation != self._generation:
+                return
+            if key in self._cache:
+                continue
+            try:
+                value = compute_at(t)
+            except Exception:
+                # the timepoint is computed again when it's shown
+                continue
+            if value is not None and value[0] is not None and generation == self._generation:
+                self._cache.put(key, value, getattr(value[0], "nbytes", 0))
@@ -0,0 +1,68 @@
+class ResultLayerIndex:
+    """Index of the result layers of category widgets in a viewer by their op_id.
+
+    Result layers carry the id of the operation widget that created them in
+    `layer.metadata[key]`. The index follows layers being inserted into and
+    removed from the viewer; renaming layers doesn't affect it. Use
+    `ResultLayerIndex.install(viewer)` instead of the constructor to get the
+    index of a viewer.
+
+    Parameters
+    ----------
+    viewer : napari.Viewer
+    key : str
+        metadata key holding the op_id
+    """
+
+    @classmethod
+    def install(cls, viewer, key: str = "op_id"):
+        """Installs an index to a given viewer (if not done earlier already) and returns it."""
+        if not hasattr(ResultLayerIndex, "viewers_indices"):
+            ResultLayerIndex.viewers_indices = {}
+
+        if viewer not in ResultLayerIndex.viewers_indices:
+            ResultLayerIndex.viewers_indices[viewer] = ResultLayerIndex(viewer, key)
+        return ResultLayerIndex.viewers_indices[viewer]
+
+    def __init__(self, viewer, key: str = "op_id"):
+        self._viewer = viewer
+        self._key = key
+        self._layers = {}
+        for layer in viewer.layers:
+            self.add(layer)
+        viewer.layers.events.inserted.connect(self._on_inserted)
+        viewer.layers.events.removed.connect(self._on_removed)
+
+    def _op_id(self, layer):
+        metadata = layer.metadata
+        if isinstance(metadata, dict):
+            return metadata.get(self._key)
+        return None
+
+    def add(self, layer):
+        op_id = self._op_id(layer)
+        if op_id is not None:
+            self._layers[op_id] = layer
+
+    def _on_inserted(self, event):
+        self.add(event.value)
+
+    def _on_removed(self, event):
+        layer = event.value
+        op_id = self._op_id(layer)
+        if op_id is not None and self._layers.get(op_id) is layer:
+            del self._layers[op_id]
+
+    def get(self, op_id):
+        """Return the layer with the given op_id, or None"""
+        layer = self._layers.get(op_id)
+        if layer is not None and self._op_id(layer) == op_id:
+            return layer
+
+        # the index is stale, e.g. because metadata was changed after the layer was added
+        layer = next((x for x in self._viewer.layers if self._op_id(x) == op_id), None)
+        if layer is None:
+            self._layers.pop(op_id, None)
+        else:
+            self._layers[op_id] = layer
+        return layer
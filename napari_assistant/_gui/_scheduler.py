@@ -0,0 +1,148 @@
+import time
+from collections import deque
+from statistics import median
+from typing import Callable
+
+from qtpy.QtCore import QEvent, QObject, QTimer
+from qtpy.QtWidgets import QAbstractSpinBox
+
+# operations whose typical execution time is below this (in seconds) are executed on every change
+IMMEDIATE_LATENCY = 0.1
+# operations whose typical execution time is above this (in seconds) are executed once the user
+# pressed Enter or released the mouse; in between, changes are throttled to the execution time
+ON_RELEASE_LATENCY = 1.0
+# in "on release" mode, changes without Enter or mouse release, e.g. by the mouse wheel,
+# are executed after this idle time (in seconds)
+ON_RELEASE_IDLE = 1.0
+# number of recent executions the typical execution time of an operation is estimated from
+LATENCY_SAMPLES = 5
+
+MODE_IMMEDIATE = "immediate"
+MODE_THROTTLED = "throttled"
+MODE_ON_RELEASE = "on release"
+
+
+class AutoCallScheduler(QObject):
+    """Decides when parameter changes of an auto-calling widget are executed.
+
+    The scheduler measures how long the selected operation took recently and
+    coalesces changes of numeric parameters accordingly: fast operations are
+    executed immediately, medium ones at most once per measured execution time
+    and slow ones when editing finished (Enter, mouse release). Changes of
+    other parameters, such as the operation or input layers, are always
+    executed immediately.
+
+    Parameters
+    ----------
+    widget : magicgui.widgets.FunctionGui
+        the widget whose parameter changes are scheduled
+    run : callable
+        executes the widget's operation with its current parameters
+    operation_name : callable
+        returns the name of the currently selected operation
+    on_mode_changed : callable, optional
+        called with the new mode when it changes
+    immediate_latency : float, optional
+        overrides IMMEDIATE_LATENCY
+    on_release_latency : float, optional
+        overrides ON_RELEASE_LATENCY
+    """
+
+    def __init__(self, widget, run: Callable, operation_name: Callable[[], str],
+                 on_mode_changed: Callable[[str], None] = None,
+                 immediate_latency: float = None, on_release_latency: float = None):
+        super().__init__(widget.native)
+        self.immediate_latency = IMMEDIATE_LATENCY if immediate_latency is None else immediate_latency
+        self.on_release_latency = ON_RELEASE_LATENCY if on_release_latency is None else on_release_latency
+        self._run = run
+        self._operation_name = operation_name
+        self._on_mode_changed = on_mode_changed
+        self._latencies = {}
+        self._pending = False
+        self._last_run = 0
+        self._mode = MODE_IMMEDIATE
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+        for child in widget:
+            if isinstance(child.native, QAbstractSpinBox):
+                child.changed.connect(self._continuous_changed)
+                child.native.editingFinished.connect(self.flush)
+                child.native.installEventFilter(self)
+            else:
+                child.changed.connect(self._discrete_changed)
+
+    def latency(self, operation_name: str = None):
+        """Return the typical execution time of an operation in seconds, or None if unknown"""
+        if operation_name is None:
+            operation_name = self._operation_name()
+        samples = self._latencies.get(operation_name)
+        if not samples:
+            return None
+        return median(samples)
+
+    def record(self, operation_name: str, seconds: float):
+        """Record how long an execution of an operation took"""
+        samples = self._latencies.get(operation_name)
+        if samples is None:
+            samples = self._latencies[operation_name] = deque(maxlen=LATENCY_SAMPLES)
+        samples.append(seconds)
+
+    def mode(self) -> str:
+        """Return how numeric parameter changes of the current operation are executed"""
+        latency = self.latency()
+        if latency is None or latency < self.immediate_latency:
+            mode = MODE_IMMEDIATE
+        elif latency < self.on_release_latency:
+            mode = MODE_THROTTLED
+        else:
+            mode = MODE_ON_RELEASE
+
+        if mode != self._mode:
+            self._mode = mode
+            if self._on_mode_changed is not None:
+                self._on_mode_changed(mode)
+        return mode
+
+    def flush(self):
+        """Execute changes that were held back, if any"""
+        if self._pending:
+            self._execute()
+
+    def cancel(self):
+        """Drop changes that were held back, e.g. because the widget was called explicitly"""
+        self._pending = False
+        self._timer.stop()
+
+    def _execute(self):
+        self._pending = False
+        self._timer.stop()
+        self._last_run = time.perf_counter()
+        self._run()
+
+    def _continuous_changed(self, *_):
+        mode = self.mode()
+        if mode == MODE_IMMEDIATE:
+            self._execute()
+            return
+
+        self._pending = True
+        if mode == MODE_THROTTLED:
+            wait = self.latency() - (time.perf_counter() - self._last_run)
+            if wait <= 0:
+                self._execute()
+            elif not self._timer.isActive():
+                self._timer.start(int(wait * 1000))
+        else:
+            self._timer.start(int(ON_RELEASE_IDLE * 1000))
+
+    def _discrete_changed(self, *_):
+        self._execute()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.MouseButtonRelease:
+            # let the spinbox apply the click before executing
+            QTimer.singleShot(0, self.flush)
+        return False
@@ -0,0 +1,109 @@
+import threading
+from typing import Callable, Sequence
+
+from qtpy.QtCore import QObject, Signal
+
+from .._time_lapse import process_timepoints
+
+
+class _Signals(QObject):
+    # emitted from worker threads, received in the main thread
+    advanced = Signal(int, int)
+    finished = Signal(object)
+
+
+class TimeLapseJob:
+    """Processes all timepoints of a time-lapse in the background and adds the
+    stacked results to the viewer.
+
+    Progress is shown in napari's activity dock. When the job is done, the
+    throughput in frames per second is shown as notification.
+
+    Parameters
+    ----------
+    viewer : napari.Viewer
+    compute_frame : callable
+        returns the results (a sequence of arrays) of a given timepoint
+    num_timepoints : int
+    names : sequence of str
+        names of the layers to add, one per result
+    layer_types : sequence of str
+        'image' or 'labels', one per result
+    scale : sequence of float, optional
+        scale of the 4D input; the first element is used for time
+    on_finished : callable, optional
+        called in the main thread once the job finished or was cancelled
+    """
+
+    def __init__(self, viewer, compute_frame: Callable[[int], Sequence], num_timepoints: int,
+                 names: Sequence[str], layer_types: Sequence[str], scale=None, on_finished: Callable = None):
+        self._viewer = viewer
+        self._compute_frame = compute_frame
+        self._num_timepoints = num_timepoints
+        self._names = names
+        self._layer_types = layer_types
+        self._scale = scale
+        self._on_finished = on_finished
+        self._cancel = threading.Event()
+        self._progress = None
+        self._thread = None
+        self._signals = _Signals()
+        self._signals.advanced.connect(self._advanced)
+        self._signals.finished.connect(self._finished)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        from napari.utils import progress
+        self._progress = progress(total=self._num_timepoints, desc="Processing all timepoints")
+        self._thread = threading.Thread(target=self._run, name="napari-assistant-time-lapse", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stop processing after the timepoints being computed; no layers are added"""
+        self._cancel.set()
+
+    def _run(self):
+        try:
+            outcome = (process_timepoints(
+                self._compute_frame,
+                self._num_timepoints,
+                progress=self._signals.advanced.emit,
+                cancel=self._cancel,
+            ), None)
+        except Exception as e:
+            outcome = (None, e)
+        self._signals.finished.emit(outcome)
+
+    def _advanced(self, finished: int, total: int):
+        if self._progress is not None:
+            self._progress.update(finished - self._progress.n)
+
+    def _finished(self, outcome):
+        from napari.utils.notifications import notification_manager, show_info
+
+        self._thread = None
+        self._progress.close()
+        self._progress = None
+        try:
+            result, error = outcome
+            if error is not None:
+                # reported like errors of operations executed in the main thread
+                notification_manager.receive_error(type(error), error, error.__traceback__)
+                return
+            stacks, frames_per_second = result
+            if stacks is None:
+                show_info("Processing all timepoints was cancelled")
+                return
+
+            for stack, name, layer_type in zip(stacks, self._names, self._layer_types):
+                layer = getattr(self._viewer, f"add_{layer_type}")(stack, name=name)
+                if self._scale is not None:
+                    spatial = tuple(self._scale[1:])[-(len(stack.shape) - 1):]
+                    layer.scale = (self._scale[0],) + (1,) * (len(stack.shape) - 1 - len(spatial)) + spatial
+            show_info(f"Processed {self._num_timepoints} timepoints ({frames_per_second:.1f} frames/s)")
+        finally:
+            if self._on_finished is not None:
+                self._on_finished()
@@ -0,0 +1,102 @@
+import os
+from itertools import count
+from typing import Callable, Hashable, Sequence
+
+from ._result_cache import ResultCache
+
+# default memory budget of the cache of lazily computed chunks in megabytes
+DEFAULT_CHUNK_CACHE_MB = 256
+CHUNK_CACHE_ENVIRONMENT_VARIABLE = "NAPARI_ASSISTANT_CHUNK_CACHE_MB"
+# largest extent of chunks along the two last axes, which are displayed in 2D views
+CHUNK_EDGE = 1024
+# bytes a lazy result is charged in the result cache; it holds no data itself, but
+# without a cost such entries would never be evicted
+LAZY_RESULT_NBYTES = 1024 ** 2
+
+_cache = None
+_names = count()
+
+
+def chunk_cache() -> ResultCache:
+    """Return the cache of lazily computed chunks of this session.
+
+    The budget is read from the environment variable
+    NAPARI_ASSISTANT_CHUNK_CACHE_MB, by default 256 MB.
+    """
+    global _cache
+    if _cache is None:
+        budget_mb = float(os.environ.get(CHUNK_CACHE_ENVIRONMENT_VARIABLE, DEFAULT_CHUNK_CACHE_MB))
+        _cache = ResultCache(int(budget_mb * 1024 ** 2))
+    return _cache
+
+
+def block_chunk_shape(shape: Sequence[int], halo: int, edge: int = CHUNK_EDGE) -> tuple:
+    """Return the chunk shape of lazy results of local operations.
+
+    The two last axes are split into squares of up to `edge` pixels, other
+    axes into slabs as thick as the halo. Showing a slice thus computes little
+    more than the slice and its neighbourhood.
+    """
+    leading = tuple(min(n, max(halo, 1)) for n in shape[:-2])
+    return leading + tuple(min(n, edge) for n in shape[-2:])
+
+
+class ChunkedComputation:
+    """Computes regions of a result on demand and keeps recently used ones.
+
+    Regions are computed by `compute_chunk(region)`, where region is a tuple of
+    slices, and stored in a least-recently-used cache under `key` and the
+    region's start. Results of equal keys, e.g. of an operation called with
+    the same inputs and parameters, share their chunks.
+
+    Parameters
+    ----------
+    compute_chunk : callable
+        returns the result within a region
+    key : hashable, optional
+        identifies the result; by default it's unique
+    cache : ResultCache, optional
+        where chunks are kept, by default `chunk_cache()`
+    """
+
+    def __init__(self, compute_chunk: Callable, key: Hashable = None, cache: ResultCache = None):
+        self._compute_chunk = compute_chunk
+        self._key = ("lazy", next(_names)) if key is None else ("lazy", key)
+        self._cache = chunk_cache() if cache is None else cache
+
+    def _chunk_key(self, region):
+        return self._key, tuple(s.start for s in region)
+
+    def seed(self, region: Sequence[slice], chunk):
+        """Store a chunk which was computed otherwise"""
+        self._cache.put(self._chunk_key(region), chunk, chunk.nbytes)
+
+    def __call__(self, region: Sequence[slice]):
+        """Return the result within a region, computing it if it's not cached"""
+        import numpy as np
+
+        chunk = self._cache.get(self._chunk_key(region))
+        if chunk is None:
+            chunk = np.asarray(self._compute_chunk(tuple(region)))
+            expected = tuple(s.stop - s.start for s in region)
+            if chunk.shape != expected:
+                raise ValueError(f"Computed chunk has shape {chunk.shape} instead of {expected}")
+            self.seed(region, chunk)
+        return chunk
+
+    def array(self, shape: Sequence[int], chunk_shape: Sequence[int], dtype):
+        """Return a dask array of the result; chunks are computed when the array is indexed and computed"""
+        import dask.array as da
+        import numpy as np
+
+        def compute(block_info=None):
+            location = block_info[None]["array-location"]
+            return self(tuple(slice(start, stop) for start, stop in location))
+
+        return da.map_blocks(
+            compute,
+            chunks=da.core.normalize_chunks(tuple(chunk_shape), tuple(shape)),
+            dtype=dtype,
+            meta=np.empty((0,) * len(shape), dtype=dtype),
+            name=f"napari-assistant-lazy-{next(_names)}",
+        )
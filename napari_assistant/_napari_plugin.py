@@ -1,11 +1,10 @@
-
 from napari_plugin_engine import napari_hook_implementation
 
-from ._gui import Assistant
-from ._categories import attach_tooltips
 
 @napari_hook_implementation
 def napari_experimental_provide_dock_widget():
+    from ._gui import Assistant
+    from ._categories import attach_tooltips
     attach_tooltips()
     return [Assistant]
 
@@ -13,21 +12,6 @@ def napari_experimental_provide_dock_widget():
 def napari_experimental_provide_function():
     return [_split_stack]
 
-from napari_tools_menu import register_action
-
-@register_action(menu="Scripts > Generate Jupyter Notebook from Workflow (na)")
-def generate_jupyter_notebook_from_workflow(viewer:"napari.Viewer"):
-    from ._gui._Assistant import Assistant
-    assistant = Assistant(viewer)
-    assistant.to_notebook()
-
-
-@register_action(menu="Scripts > Copy Python code representing Workflow (na)")
-def generate_jupyter_notebook_from_workflow(viewer:"napari.Viewer"):
-    from ._gui._Assistant import Assistant
-    assistant = Assistant(viewer)
-    assistant.to_clipboard()
-
 
 def _split_stack(viewer:"napari.Viewer", layer:"napari.layers.Layer", axis:int = 1):
     # This function can be removed once these issues are fixed:
@@ -43,10 +27,31 @@ def _split_stack(viewer:"napari.Viewer", layer:"napari.layers.Layer", axis:int =
     ll.selection = set(images)  # type: ignore
 
 try:
-    from napari_tools_menu import register_dock_widget, register_function
-    register_dock_widget(Assistant, menu="Utilities > Assistant (na)")
-    register_function(_split_stack, menu="Utilities > Split stack (na)")
-
+    from napari_tools_menu import register_action, register_function
 except ImportError:
     pass
+else:
+    # the Assistant is imported when the menu entry is used, so that loading
+    # the plugin doesn't import its widgets
+    @register_action(menu="Utilities > Assistant (na)")
+    def show_assistant(viewer:"napari.Viewer"):
+        from ._gui import Assistant
+        dw = viewer.window.add_dock_widget(Assistant(viewer), name="Assistant (na)")
+        # workaround for https://github.com/napari/napari/issues/4348
+        dw._close_btn = False
+
+
+    @register_action(menu="Scripts > Generate Jupyter Notebook from Workflow (na)")
+    def generate_jupyter_notebook_from_workflow(viewer:"napari.Viewer"):
+        from ._gui._Assistant import Assistant
+        assistant = Assistant(viewer)
+        assistant.to_notebook()
+
+
+    @register_action(menu="Scripts > Copy Python code representing Workflow (na)")
+    def generate_jupyter_notebook_from_workflow(viewer:"napari.Viewer"):
+        from ._gui._Assistant import Assistant
+        assistant = Assistant(viewer)
+        assistant.to_clipboard()
 
+    register_function(_split_stack, menu="Utilities > Split stack (na)")
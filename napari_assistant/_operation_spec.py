@@ -0,0 +1,173 @@
+from inspect import signature
+
+import numpy as np
+import napari
+from magicgui.types import PathLike
+
+try:
+    import pyclesperanto_prototype as clep
+    Image_type = clep.Image
+except:
+    Image_type = np.ndarray
+try:
+    import pyclesperanto as cle
+    Image_type2 = cle.Image
+except:
+    Image_type2 = np.ndarray
+
+# names of the arguments of category widgets the parameters of an operation are mapped to
+category_args_numeric = ["x", "y", "z", "u", "v", "w", "w1", "w2", "w3", "w4"]
+category_args_bool = ["a", "b", "c", "d", "e", "f", "g","h","i","j"]
+category_args_text = ["k", "l", "m"]
+category_args_file = ["o", "p", "q"]
+
+POSITIONAL_TYPES = [np.ndarray, napari.types.ImageData, napari.types.LabelsData, Image_type, Image_type2, int, str, float, bool]
+LABELS_ANNOTATIONS = [napari.types.LabelsData, "napari.types.LabelsData"]
+
+
+def separate_argnames_by_type(items):
+    param_names = [
+        name
+        for name, param in items
+        if param.annotation in {int, str, float, bool, PathLike}
+    ]
+    numeric_param_names = [
+        name
+        for name, param in items
+        if param.annotation in {int, float}
+    ]
+    bool_param_names = [
+        name
+        for name, param in items
+        if param.annotation in {bool}
+    ]
+    str_param_names = [
+        name
+        for name, param in items
+        if param.annotation in {str}
+    ]
+    file_param_names = [
+        name
+        for name, param in items
+        if param.annotation in {PathLike}
+    ]
+    return param_names, numeric_param_names, bool_param_names, str_param_names, file_param_names
+
+
+def _is_image_annotation(type_annotation: str) -> bool:
+    return "NewType.<locals>.new_type" in type_annotation or \
+        "Image" in type_annotation or \
+        "LabelsData" in type_annotation or \
+        "LayerData" in type_annotation or \
+        "numpy.ndarray" in type_annotation
+
+
+def _return_kind(annotation) -> str:
+    if annotation in LABELS_ANNOTATIONS:
+        return "labels"
+    if str(annotation) == "pandas.DataFrame" or \
+            (getattr(annotation, "__name__", None) == "DataFrame" and
+             getattr(annotation, "__module__", "").startswith("pandas")):
+        return "dataframe"
+    return "image"
+
+
+class OperationSpec:
+    """Facts about an operation's signature, derived once.
+
+    Category widgets, `call_op` and the workflow loading code read these
+    instead of calling `inspect.signature` on every invocation.
+    """
+    __slots__ = (
+        "function",
+        "signature",
+        "is_clesperanto",
+        "num_image_inputs",
+        "num_positional_args",
+        "parameter_names",
+        "required",
+        "param_names",
+        "numeric_param_names",
+        "bool_param_names",
+        "str_param_names",
+        "file_param_names",
+        "adapter",
+        "return_kind",
+    )
+
+    def __init__(self, func):
+        sig = signature(func)
+        items = list(sig.parameters.items())
+
+        self.function = func
+        self.signature = sig
+        self.is_clesperanto = "pyclesperanto" in func.__module__
+        self.parameter_names = tuple(name for name, _ in items)
+        self.required = tuple(param.default is param.empty for _, param in items)
+
+        # count leading image-like parameters
+        num_image_inputs = 0
+        for _, param in items:
+            if _is_image_annotation(str(param.annotation)):
+                num_image_inputs = num_image_inputs + 1
+            else:
+                break
+        if self.is_clesperanto:
+            # all clesperanto function have an output image which we don't pass
+            num_image_inputs -= 1
+        self.num_image_inputs = num_image_inputs
+        self.num_positional_args = len([p for _, p in items if p.annotation in POSITIONAL_TYPES])
+
+        param_names, numeric_param_names, bool_param_names, str_param_names, file_param_names = \
+            separate_argnames_by_type(items)
+        self.param_names = tuple(param_names)
+        self.numeric_param_names = tuple(numeric_param_names)
+        self.bool_param_names = tuple(bool_param_names)
+        self.str_param_names = tuple(str_param_names)
+        self.file_param_names = tuple(file_param_names)
+        self.adapter = self._make_adapter(items)
+        self.return_kind = _return_kind(sig.return_annotation)
+
+    def _make_adapter(self, items):
+        # map category argument names (x, y, ..., a, b, ..., k, ..., o, ..., input0, ...)
+        # to parameter names of the operation and vice versa
+        adapter = {}
+        slots = (
+            (self.numeric_param_names, category_args_numeric),
+            (self.bool_param_names, category_args_bool),
+            (self.str_param_names, category_args_text),
+            (self.file_param_names, category_args_file),
+        )
+        for key in self.param_names:
+            for names, category_args in slots:
+                if key in names:
+                    slot = category_args[names.index(key)]
+                    adapter[slot] = key
+                    adapter[key] = slot
+                    break
+
+        other_param_names = [
+            name
+            for name, param in items
+            if param.annotation not in {int, str, float, bool, PathLike}
+        ]
+        for other_count, key in enumerate(other_param_names):
+            adapter["input" + str(other_count)] = key
+            adapter[key] = "input" + str(other_count)
+        return adapter
+
+
+_specs = {}
+
+
+def operation_spec(func) -> OperationSpec:
+    """Return the (cached) OperationSpec of a given function"""
+    try:
+        spec = _specs.get(func)
+    except TypeError:
+        # unhashable callables are introspected every time
+        return OperationSpec(func)
+    if spec is None:
+        spec = OperationSpec(func)
+        _specs[func] = spec
+    return spec
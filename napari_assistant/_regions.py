@@ -0,0 +1,156 @@
+import math
+from typing import Optional, Sequence
+
+# halo around a region in pixels per unit of the largest numeric parameter, e.g.
+# a Gaussian blur with sigma 2 reads up to 8 pixels away (4 sigma truncation)
+HALO_FACTOR = 4
+
+
+def halo_from_arguments(args: Sequence, factor: float = HALO_FACTOR) -> int:
+    """Estimate how far an operation reads beyond a pixel from its numeric parameters.
+
+    Radii, sigmas and box sizes of local operations are given as numeric
+    parameters; the largest one times `factor` is taken as halo.
+    """
+    numbers = [abs(a) for a in args if isinstance(a, (int, float)) and not isinstance(a, bool)]
+    numbers = [n for n in numbers if math.isfinite(n)]
+    return int(math.ceil(factor * max(numbers, default=0)))
+
+
+def expand(region: Sequence[slice], halo: int, shape: Sequence[int]) -> tuple:
+    """Grow a region by a halo on the axes it crops, clipped to the shape.
+
+    Parameters
+    ----------
+    region : sequence of slice
+        one slice per axis with explicit start and stop
+    halo : int
+    shape : sequence of int
+
+    Returns
+    -------
+    tuple
+        the expanded region, and the slices that cut the original region out
+        of the expanded one
+    """
+    expanded = []
+    inner = []
+    for s, size in zip(region, shape):
+        start, stop = s.start, s.stop
+        if start == 0 and stop == size:
+            expanded.append(slice(0, size))
+            inner.append(slice(None))
+            continue
+        outer_start = max(start - halo, 0)
+        outer_stop = min(stop + halo, size)
+        expanded.append(slice(outer_start, outer_stop))
+        inner.append(slice(start - outer_start, stop - outer_start))
+    return tuple(expanded), tuple(inner)
+
+
+def camera_of(viewer):
+    """Return the camera of a viewer; newer napari versions keep it in the scene"""
+    scene = getattr(viewer, "scene", None)
+    if scene is not None and hasattr(scene, "camera"):
+        return scene.camera
+    return viewer.camera
+
+
+def visible_region(viewer, layer) -> Optional[tuple]:
+    """Determine the region of a layer's data visible in the canvas.
+
+    Only the displayed axes of 2D views are cropped; other axes are covered
+    completely. The region assumes that layers are only scaled and translated.
+
+    Returns
+    -------
+    tuple of slice or None
+        one slice per data axis, or None if the view is 3D or the whole layer
+        is visible
+    """
+    import numpy as np
+
+    if viewer.dims.ndisplay != 2:
+        return None
+
+    # older napari versions only know the size of the whole canvas
+    canvas = getattr(viewer, "canvas", None)
+    if canvas is not None and hasattr(canvas, "viewbox_size"):
+        size = np.asarray(canvas.viewbox_size(viewer.layers), dtype=float)
+    else:
+        size = np.asarray(getattr(viewer, "_canvas_size", (0, 0)), dtype=float)
+    camera = camera_of(viewer)
+    zoom = camera.zoom
+    if zoom <= 0 or size.min() <= 0:
+        return None
+
+    shape = layer.data.shape
+    # world axes map to the last data axes of layers with fewer dimensions
+    offset = viewer.dims.ndim - len(shape)
+    center = camera.center[-2:]
+    region = [slice(0, n) for n in shape]
+    for world_axis, center_world, extent in zip(viewer.dims.displayed[-2:], center, size / zoom):
+        axis = world_axis - offset
+        if axis < 0:
+            continue
+        scale, translate = layer.scale[axis], layer.translate[axis]
+        low = (center_world - extent / 2 - translate) / scale
+        high = (center_world + extent / 2 - translate) / scale
+        low, high = sorted((low, high))
+        start = min(max(int(math.floor(low)), 0), shape[axis])
+        stop = min(max(int(math.ceil(high)) + 1, start), shape[axis])
+        region[axis] = slice(start, stop)
+
+    if all(s.start == 0 and s.stop == n for s, n in zip(region, shape)):
+        return None
+    if any(s.start == s.stop for s in region):
+        return None
+    return tuple(region)
+
+
+def current_slice_region(viewer, layer, time_axis: bool = False) -> Optional[tuple]:
+    """Determine the region of a layer's data shown in the current slice of a 2D view.
+
+    Non-displayed axes are cropped to the slice at the current position of the
+    dims slider, displayed axes are covered completely.
+
+    Parameters
+    ----------
+    viewer : napari.Viewer
+    layer : napari.layers.Layer
+    time_axis : bool
+        if True, the first axis is time and not cropped; it's handled by the time slicer
+
+    Returns
+    -------
+    tuple of slice or None
+        one slice per data axis, or None if the view is 3D or the data has no
+        other axes than the displayed ones
+    """
+    if viewer.dims.ndisplay != 2:
+        return None
+
+    shape = layer.data.shape
+    offset = viewer.dims.ndim - len(shape)
+    displayed = [axis - offset for axis in viewer.dims.displayed]
+    point = viewer.dims.point
+    region = [slice(0, n) for n in shape]
+    for axis in range(1 if time_axis else 0, len(shape)):
+        if axis in displayed:
+            continue
+        index = int(round((point[axis + offset] - layer.translate[axis]) / layer.scale[axis]))
+        index = min(max(index, 0), shape[axis] - 1)
+        region[axis] = slice(index, index + 1)
+
+    if all(s.start == 0 and s.stop == n for s, n in zip(region, shape)):
+        return None
+    return tuple(region)
+
+
+def intersect(region: Optional[Sequence[slice]], other: Optional[Sequence[slice]]) -> Optional[tuple]:
+    """Return the overlap of two regions; None stands for the whole data"""
+    if region is None:
+        return None if other is None else tuple(other)
+    if other is None:
+        return tuple(region)
+    return tuple(slice(max(a.start, b.start), min(a.stop, b.stop)) for a, b in zip(region, other))
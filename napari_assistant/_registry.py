@@ -0,0 +1,257 @@
+from functools import lru_cache
+
+from ._catalog import LazyOperation, update_catalog
+
+# number of search strings whose results are remembered
+SEARCH_RESULTS_CACHE_SIZE = 256
+
+
+def _short_name(key: str) -> str:
+    """Return the operation name without its menu path"""
+    if ">" in key:
+        return key.split(">")[1]
+    return key
+
+
+class TrigramIndex:
+    """Substring index over a list of strings.
+
+    Every string is split into overlapping three-character chunks; a query is
+    answered by intersecting the posting lists of its trigrams and verifying the
+    few remaining candidates instead of scanning all strings.
+    """
+
+    def __init__(self, texts):
+        self._texts = list(texts)
+        self._postings = {}
+        for position, text in enumerate(self._texts):
+            for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                self._postings.setdefault(trigram, []).append(position)
+
+    def positions(self, query: str):
+        """Return sorted positions of all texts containing `query`"""
+        if len(query) < 3:
+            return [p for p, text in enumerate(self._texts) if query in text]
+
+        candidates = None
+        for trigram in {query[i:i + 3] for i in range(len(query) - 2)}:
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return []
+            candidates = set(posting) if candidates is None else candidates.intersection(posting)
+            if not candidates:
+                return []
+        return sorted(p for p in candidates if query in self._texts[p])
+
+
+class OperationRegistry:
+    """Index over all harvested operations for constant-time lookups.
+
+    The registry is built once from the dictionary returned by `all_operations()`
+    and holds name->function, function->name (including the originals wrapped by
+    `time_slicer`) and name->category maps.
+
+    Operations read from the catalog cache are imported on first access of their
+    function; listing, searching and categorizing them works without importing.
+
+    Parameters
+    ----------
+    operations : dict(str:callable or LazyOperation)
+        Dictionary of "menu>name"-function pairs
+    """
+
+    def __init__(self, operations: dict):
+        self.operations = operations
+        self._keys = list(operations.keys())
+        self._key_by_name = {}
+        self._name_by_function = {}
+        self._name_by_import_path = {}
+        self._unhashable = []
+        self._fuzzy_matches = {}
+        self._category_by_name = None
+        self._menu_operations = {}
+        self._search_results = {}
+        self._resolved_unknowns = []
+        self._key_index = TrigramIndex(self._keys)
+        self._text_index = None
+
+        for key, func in operations.items():
+            name = _short_name(key)
+            self._key_by_name.setdefault(name, key)
+            if isinstance(func, LazyOperation):
+                if func.module is not None:
+                    self._name_by_import_path.setdefault((func.module, func.qualname), name)
+            else:
+                self._add_function(func, name)
+
+    def _add_function(self, func, name):
+        for f in (func, getattr(func, '__wrapped__', None)):
+            if f is None:
+                continue
+            try:
+                self._name_by_function.setdefault(f, name)
+            except TypeError:
+                self._unhashable.append((f, name))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def key_of(self, op_name: str):
+        """Return the full "menu>name" key of an operation, or None"""
+        key = self._key_by_name.get(op_name)
+        if key is not None:
+            return key
+
+        # approximate match: the last key containing the given name wins
+        if op_name not in self._fuzzy_matches:
+            positions = self._key_index.positions(op_name)
+            self._fuzzy_matches[op_name] = self._keys[positions[-1]] if positions else None
+        return self._fuzzy_matches[op_name]
+
+    def function(self, op_name: str):
+        """Return the function of an operation given its name (in menu), or None"""
+        key = self.key_of(op_name)
+        if key is None:
+            return None
+        return self._resolve(key)
+
+    def _resolve(self, key: str):
+        func = self.operations[key]
+        if isinstance(func, LazyOperation):
+            lazy = func
+            func = lazy.resolve()
+            if func is None:
+                return None
+            self.operations[key] = func
+            self._add_function(func, _short_name(key))
+            if self._is_unknown(lazy):
+                self._remember_resolved(lazy, func)
+        return func
+
+    def _remember_resolved(self, lazy: LazyOperation, func):
+        from ._operation_spec import operation_spec
+        try:
+            spec = operation_spec(func)
+        except (AttributeError, TypeError, ValueError):
+            return
+        lazy.doc = func.__doc__
+        lazy.num_image_inputs = spec.num_image_inputs
+        lazy.return_kind = spec.return_kind
+        self._resolved_unknowns.append(lazy)
+
+    def save_resolved(self):
+        """Write what was found out about npe2 contributions resolved in this
+        session to the catalog cache, so that the next start doesn't resolve them again
+        """
+        if len(self._resolved_unknowns) > 0:
+            update_catalog(self._resolved_unknowns)
+            self._resolved_unknowns = []
+
+    def _is_unknown(self, func):
+        # npe2 contributions which were never resolved
+        return isinstance(func, LazyOperation) and func.num_image_inputs is None
+
+    def doc(self, key: str):
+        """Return the docstring of an operation given its full key"""
+        func = self.operations[key]
+        if self._is_unknown(func):
+            func = self._resolve(key)
+            if func is None:
+                return None
+        if isinstance(func, LazyOperation):
+            return func.doc
+        return func.__doc__
+
+    def image_inputs_and_return_kind(self, key: str):
+        """Return the number of image inputs and the return kind of an operation
+        given its full key, without importing it if it's known from the catalog cache
+        """
+        func = self.operations[key]
+        if self._is_unknown(func):
+            func = self._resolve(key)
+            if func is None:
+                return None, None
+        if isinstance(func, LazyOperation):
+            return func.num_image_inputs, func.return_kind
+        from ._operation_spec import operation_spec
+        spec = operation_spec(func)
+        return spec.num_image_inputs, spec.return_kind
+
+    def spec(self, op_name: str):
+        """Return the OperationSpec of an operation given its name (in menu)"""
+        from ._operation_spec import operation_spec
+        return operation_spec(self.function(op_name))
+
+    def name_of(self, func):
+        """Return the human-readable name of a function, or None"""
+        try:
+            name = self._name_by_function.get(func)
+        except TypeError:
+            name = None
+        if name is None:
+            for f, n in self._unhashable:
+                if f is func:
+                    return n
+        if name is None:
+            # functions of the catalog cache which were not imported via the registry
+            for f in (func, getattr(func, '__wrapped__', None)):
+                path = (getattr(f, '__module__', None), getattr(f, '__qualname__', None))
+                if path in self._name_by_import_path:
+                    return self._name_by_import_path[path]
+        return name
+
+    def search(self, search_string: str):
+        """Return the set of keys of operations whose menu path, name or
+        docstring contain a given lower-case search string
+        """
+        result = self._search_results.pop(search_string, None)
+        if result is None:
+            if self._text_index is None:
+                # key and docstring are separated by a character users can't type
+                self._text_index = TrigramIndex(
+                    k.lower() + "\0" + (self.doc(k) or "").lower() for k in self._keys
+                )
+            result = frozenset(self._keys[p] for p in self._text_index.positions(search_string))
+            while self._search_results and len(self._search_results) >= SEARCH_RESULTS_CACHE_SIZE:
+                # forget the least recently searched strings
+                del self._search_results[next(iter(self._search_results))]
+        self._search_results[search_string] = result
+        return result
+
+    def menu_operations(self, category):
+        """Return (key, name) pairs of all operations that fit a given category, sorted by name"""
+        cache_key = (category.name, category.tools_menu, len(category.inputs))
+        result = self._menu_operations.get(cache_key)
+        if result is None:
+            from ._categories import _operations_fitting_category
+            result = _operations_fitting_category(category)
+            self._menu_operations[cache_key] = result
+        return result
+
+    def category_of(self, op_name: str):
+        """Return the first category listing the given operation, or None"""
+        if self._category_by_name is None:
+            from ._categories import CATEGORIES, operations_in_menu
+            category_by_name = {}
+            for c in CATEGORIES.values():
+                if not callable(c):
+                    for name in operations_in_menu(c):
+                        category_by_name.setdefault(name, c)
+            self._category_by_name = category_by_name
+        return self._category_by_name.get(op_name)
+
+
+@lru_cache(maxsize=1)
+def _registry_for(operations_id: int):
+    from ._categories import all_operations
+    return OperationRegistry(all_operations())
+
+
+def operation_registry() -> OperationRegistry:
+    """Return the registry of all compatible functions of installed plugins
+
+    The registry is rebuilt whenever the result of `all_operations()` changes,
+    e.g. after `all_operations.cache_clear()`.
+    """
+    from ._categories import all_operations
+    return _registry_for(id(all_operations()))
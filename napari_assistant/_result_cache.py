@@ -0,0 +1,172 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from functools import partial
+from itertools import count
+
+from ._data_versions import data_version
+
+# default memory budget of the result cache in megabytes
+DEFAULT_BUDGET_MB = 512
+BUDGET_ENVIRONMENT_VARIABLE = "NAPARI_ASSISTANT_RESULT_CACHE_MB"
+
+_cache = None
+
+
+class ResultCache:
+    """Least-recently-used cache of operation results bounded by memory.
+
+    Results are stored under a key made of the operation name, a version token
+    of every input layer, the timepoint and the parameter values. When adding a
+    result exceeds the budget, the least recently used results are evicted.
+    The cache is used from worker threads and thus synchronized.
+
+    Parameters
+    ----------
+    max_bytes : int
+        memory budget; results larger than this are not cached
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._buffers = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    def key(self, op_name: str, inputs, timepoint, args: tuple):
+        """Return the cache key of an operation call, or None if it can't be cached"""
+        tokens = tuple(version_token(layer) for layer in inputs)
+        if None in tokens:
+            return None
+        key = (op_name, tokens, timepoint, tuple(args))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key):
+        """Return the cached value of a key, or None"""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes: int, buffer=None):
+        """Store a value of a given size, evicting least recently used values if necessary.
+
+        The array holding the value's data can be given as `buffer`, so that
+        `holds` tells it must not be overwritten.
+        """
+        if key is None or nbytes > self._max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, nbytes, buffer)
+            self._bytes += nbytes
+            if buffer is not None:
+                self._buffers[id(buffer)] = self._buffers.get(id(buffer), 0) + 1
+            self._evict()
+
+    def holds(self, buffer) -> bool:
+        """Tell if an array was stored as buffer of a cached value"""
+        return id(buffer) in self._buffers
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            _, nbytes, buffer = entry
+            self._bytes -= nbytes
+            if buffer is not None:
+                count = self._buffers.pop(id(buffer)) - 1
+                if count > 0:
+                    self._buffers[id(buffer)] = count
+        return entry
+
+    def _evict(self):
+        while self._bytes > self._max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buffers.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key is not None and key in self._entries
+
+    def statistics(self) -> dict:
+        """Return hits, misses, evictions, number of entries and memory usage"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+        }
+
+
+# id of array -> (weak reference to array, token)
+_tokens = {}
+_token_counter = count()
+
+
+def version_token(layer):
+    """Return a token which changes whenever another array is assigned to a layer
+    or its data changes otherwise, or None if the layer's data can't be tracked
+    """
+    if layer is None:
+        return 0
+    data = layer.data
+    entry = _tokens.get(id(data))
+    if entry is not None and entry[0]() is data:
+        return entry[1], data_version(layer)
+    try:
+        reference = weakref.ref(data, partial(_forget, id(data)))
+    except TypeError:
+        return None
+    token = next(_token_counter)
+    _tokens[id(data)] = (reference, token)
+    return token, data_version(layer)
+
+
+def _forget(data_id, reference):
+    entry = _tokens.get(data_id)
+    if entry is not None and entry[0] is reference:
+        del _tokens[data_id]
+
+
+def result_cache() -> ResultCache:
+    """Return the result cache of this session"""
+    global _cache
+    if _cache is None:
+        budget = float(os.environ.get(BUDGET_ENVIRONMENT_VARIABLE, DEFAULT_BUDGET_MB))
+        _cache = ResultCache(int(budget * 1024 ** 2))
+    return _cache
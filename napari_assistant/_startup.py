@@ -0,0 +1,139 @@
+import json
+import time
+
+PLUGIN_IMPORT_MODES = ("sequential", "parallel", "deferred")
+# deferred plugin imports start at the latest after this many milliseconds, also if no frame was drawn
+DEFERRED_IMPORT_TIMEOUT_MS = 5000
+
+_report = None
+
+
+class StartupReport:
+    """Collects timings of a `naparia` start and writes them as JSON.
+
+    Milestones are stored as seconds since the report was created, durations
+    as seconds. The file is rewritten whenever something is recorded so that
+    it's complete even if napari is killed instead of closed.
+
+    Parameters
+    ----------
+    filename : str, optional
+        where to write the report to
+    plugin_import : str
+        how plugins are imported, one of PLUGIN_IMPORT_MODES
+    """
+
+    def __init__(self, filename: str = None, plugin_import: str = "sequential"):
+        self.filename = filename
+        self.plugin_import = plugin_import
+        self._start = time.perf_counter()
+        self.plugins = {}
+        self.milestones = {}
+        self.durations = {}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def plugin_imported(self, name: str, seconds: float, error: str = None):
+        self.plugins[name] = {"seconds": seconds, "error": error}
+        self.write()
+
+    def mark(self, milestone: str):
+        """Record that a milestone was reached now, only the first time"""
+        if milestone not in self.milestones:
+            self.milestones[milestone] = self.elapsed()
+            self.write()
+
+    def duration(self, name: str, seconds: float):
+        """Record how long something took, only the first time"""
+        if name not in self.durations:
+            self.durations[name] = seconds
+            self.write()
+
+    def to_dict(self) -> dict:
+        return {
+            "plugin_import": self.plugin_import,
+            "plugins": self.plugins,
+            "plugins_total_seconds": sum(p["seconds"] for p in self.plugins.values()),
+            "milestones": self.milestones,
+            "durations": self.durations,
+        }
+
+    def write(self):
+        if self.filename is not None:
+            with open(self.filename, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=2)
+
+
+def start_report(filename: str = None, plugin_import: str = "sequential") -> StartupReport:
+    """Start collecting startup timings for this session"""
+    global _report
+    _report = StartupReport(filename, plugin_import)
+    return _report
+
+
+def startup_report():
+    """Return the StartupReport of this session, or None if there is none"""
+    return _report
+
+
+def on_first_frame(viewer, callback):
+    """Call `callback` once the canvas of a napari viewer has drawn its first frame"""
+    events = viewer.window._qt_viewer.canvas.events
+
+    def drawn(event=None):
+        events.draw.disconnect(drawn)
+        callback()
+
+    # called after napari drew the scene
+    events.draw.connect(drawn, position="last")
+
+
+def plugin_entry_points():
+    """Return the entry points of all installed napari plugins"""
+    from importlib.metadata import entry_points
+
+    try:
+        return entry_points(group='napari.plugin')
+    except TypeError:
+        all_plugins = entry_points()
+        try:
+            return all_plugins['napari.plugins']
+        except KeyError:
+            return []
+
+
+def _load_plugin(ep):
+    start_time = time.perf_counter()
+    error = None
+    try:
+        ep.load()
+    except Exception as e:
+        error = str(e)
+        print(f"Error while loading plugin {ep.name}")
+    return ep.name, time.perf_counter() - start_time, error
+
+
+def load_plugins(napari_plugins, parallel: bool = False, max_workers: int = None):
+    """Import the modules of given plugin entry points.
+
+    Parameters
+    ----------
+    napari_plugins : list of EntryPoint
+    parallel : bool
+        import plugins concurrently in a thread pool
+    max_workers : int, optional
+        number of threads for parallel import
+    """
+    if parallel:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_load_plugin, napari_plugins))
+    else:
+        results = [_load_plugin(ep) for ep in napari_plugins]
+
+    for name, delta_time, error in results:
+        if delta_time > 0.1:
+            print(f"Loading plugin {name} took {delta_time} seconds")
+        if _report is not None:
+            _report.plugin_imported(name, delta_time, error)
@@ -0,0 +1,157 @@
+import atexit
+import math
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from typing import Callable, Sequence
+
+from ._regions import expand
+
+# inputs of local operations larger than this are processed tile by tile
+DEFAULT_TILING_THRESHOLD_MB = 512
+TILING_THRESHOLD_ENVIRONMENT_VARIABLE = "NAPARI_ASSISTANT_TILING_THRESHOLD_MB"
+# number of pixels / voxels per tile, without halo
+TILE_ELEMENTS = 2 ** 22
+
+_scratch_directory = None
+_scratch_lock = threading.Lock()
+
+
+def needs_tiling(inputs: Sequence) -> bool:
+    """Tell if inputs are large enough to be processed tile by tile.
+
+    The threshold is read from the environment variable
+    NAPARI_ASSISTANT_TILING_THRESHOLD_MB, by default 512 MB.
+    """
+    threshold_mb = float(os.environ.get(TILING_THRESHOLD_ENVIRONMENT_VARIABLE, DEFAULT_TILING_THRESHOLD_MB))
+    nbytes = sum(math.prod(data.shape) * data.dtype.itemsize for data in inputs if data is not None)
+    return nbytes > threshold_mb * 1024 ** 2
+
+
+def tile_shape(shape: Sequence[int], tile_elements: int = TILE_ELEMENTS) -> tuple:
+    """Return the shape of (hyper-)cubic tiles of about `tile_elements` elements"""
+    edge = max(int(tile_elements ** (1 / len(shape))), 1)
+    return tuple(min(n, edge) for n in shape)
+
+
+def tiles(shape: Sequence[int], tile: Sequence[int]):
+    """Iterate over the regions (tuples of slices) covering an array tile by tile"""
+    starts = [range(0, n, t) for n, t in zip(shape, tile)]
+    for start in product(*starts):
+        yield tuple(slice(s, min(s + t, n)) for s, t, n in zip(start, tile, shape))
+
+
+def is_out_of_core(data) -> bool:
+    """Tell if an array lives on disk or is computed lazily rather than in memory"""
+    import numpy as np
+    return isinstance(data, np.memmap) or "dask" in str(type(data)) or "zarr" in str(type(data))
+
+
+def scratch_directory() -> str:
+    """Return the temporary folder of memory-mapped results of this session;
+    it's removed when Python exits
+    """
+    global _scratch_directory
+    with _scratch_lock:
+        if _scratch_directory is None:
+            _scratch_directory = tempfile.mkdtemp(prefix="napari-assistant-")
+            atexit.register(shutil.rmtree, _scratch_directory, ignore_errors=True)
+        return _scratch_directory
+
+
+def allocate(shape: Sequence[int], dtype, on_disk: bool = False, directory: str = None):
+    """Allocate an array in memory, or as memory-mapped .npy file in `directory`
+    (the session's scratch directory by default).
+
+    The file is deleted right after it was mapped, where the operating system
+    allows it, so that its space is freed as soon as the array is garbage
+    collected, e.g. when a widget's result is replaced. Otherwise it's
+    deleted with the scratch directory when Python exits.
+    """
+    import numpy as np
+
+    if not on_disk:
+        return np.empty(shape, dtype=dtype)
+    if directory is None:
+        directory = scratch_directory()
+    file_descriptor, filename = tempfile.mkstemp(suffix=".npy", dir=directory)
+    os.close(file_descriptor)
+    array = np.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=tuple(shape))
+    try:
+        os.unlink(filename)
+    except OSError:
+        # e.g. on Windows, files can't be deleted while they're mapped
+        pass
+    return array
+
+
+def process_tiled(
+    function: Callable,
+    inputs: Sequence,
+    halo: int,
+    tile: Sequence[int] = None,
+    max_workers: int = None,
+    directory: str = None,
+):
+    """Apply a local operation to equally shaped inputs tile by tile and stitch the results.
+
+    Every tile is read with a halo, so that the operation sees the
+    neighbourhood of the tile's border pixels; the halo is cut off the result.
+    Tiles are processed in a thread pool. Inputs can be numpy, memory-mapped
+    or dask arrays. The result is kept in memory if all inputs are in memory,
+    otherwise it's written to a memory-mapped file.
+
+    Parameters
+    ----------
+    function : callable
+        called with one crop per input, returns a result of the crop's shape
+    inputs : sequence of arrays
+    halo : int
+        how far the operation reads beyond a pixel
+    tile : sequence of int, optional
+        the shape of tiles, see `tile_shape`
+    max_workers : int, optional
+        number of threads, by default the number of CPUs
+    directory : str, optional
+        where to put memory-mapped results
+
+    Returns
+    -------
+    ndarray
+    """
+    import numpy as np
+
+    shape = tuple(inputs[0].shape)
+    if any(tuple(data.shape) != shape for data in inputs):
+        raise ValueError("Tiled execution requires inputs of the same shape")
+    if tile is None:
+        tile = tile_shape(shape)
+
+    def compute(region):
+        crop, inner = expand(region, halo, shape)
+        result = np.asarray(function(*[np.asarray(data[crop]) for data in inputs]))
+        if result.shape != tuple(s.stop - s.start for s in crop):
+            raise ValueError("Tiled execution requires operations that preserve the image shape")
+        return result[inner]
+
+    regions = tiles(shape, tile)
+    # the first tile determines the type of the result
+    first_region = next(regions)
+    first = compute(first_region)
+    output = allocate(shape, first.dtype, any(is_out_of_core(data) for data in inputs), directory)
+    output[first_region] = first
+
+    def compute_and_store(region):
+        output[region] = compute(region)
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                            thread_name_prefix="napari-assistant-tiles") as executor:
+        for _ in executor.map(compute_and_store, regions):
+            pass
+
+    if isinstance(output, np.memmap):
+        output.flush()
+    return output
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Sequence
+
+from ._call_plan import timepoint_frame
+from ._tiling import allocate
+
+# results of all timepoints larger than this are written to memory-mapped files instead of memory
+DEFAULT_IN_MEMORY_LIMIT_MB = 2048
+IN_MEMORY_LIMIT_ENVIRONMENT_VARIABLE = "NAPARI_ASSISTANT_TIME_LAPSE_MEMORY_MB"
+
+
+def allocate_stack(num_timepoints: int, frame, directory: str = None, in_memory_limit_mb: float = None):
+    """Allocate an array holding a given frame for every timepoint.
+
+    Stacks exceeding the in-memory limit are memory-mapped .npy files in
+    `directory` (the session's scratch directory by default), so that each
+    timepoint is a contiguous chunk on disk.
+
+    Parameters
+    ----------
+    num_timepoints : int
+    frame : ndarray
+        the result of one timepoint, determines shape and type
+    directory : str, optional
+    in_memory_limit_mb : float, optional
+        by default read from NAPARI_ASSISTANT_TIME_LAPSE_MEMORY_MB, or 2048
+    """
+    if in_memory_limit_mb is None:
+        in_memory_limit_mb = float(os.environ.get(IN_MEMORY_LIMIT_ENVIRONMENT_VARIABLE, DEFAULT_IN_MEMORY_LIMIT_MB))
+    on_disk = num_timepoints * frame.nbytes > in_memory_limit_mb * 1024 ** 2
+    return allocate((num_timepoints, *frame.shape), frame.dtype, on_disk, directory)
+
+
+def process_timepoints(
+    compute_frame: Callable[[int], Sequence],
+    num_timepoints: int,
+    max_workers: int = None,
+    directory: str = None,
+    progress: Callable[[int, int], None] = None,
+    cancel: threading.Event = None,
+):
+    """Compute all timepoints of a time-lapse in a thread pool and stack the results.
+
+    Parameters
+    ----------
+    compute_frame : callable
+        returns the results (a sequence of arrays) of a given timepoint; it is
+        called from several threads at once
+    num_timepoints : int
+    max_workers : int, optional
+        number of threads, by default the number of CPUs
+    directory : str, optional
+        where to put memory-mapped stacks, see `allocate_stack`
+    progress : callable, optional
+        called with the number of finished and all timepoints, from worker threads
+    cancel : threading.Event, optional
+        stops processing once set; timepoints being computed are finished
+
+    Returns
+    -------
+    tuple
+        a list with one stack per result, or None if cancelled, and the
+        throughput in frames per second
+    """
+    import numpy as np
+
+    start_time = time.perf_counter()
+    if num_timepoints == 0:
+        return [], 0.0
+
+    # the first timepoint determines the shape and type of the stacks
+    first = compute_frame(0)
+    stacks = [allocate_stack(num_timepoints, np.asarray(frame), directory) for frame in first]
+    for stack, frame in zip(stacks, first):
+        stack[0] = np.asarray(frame)
+    finished = 1
+    if progress is not None:
+        progress(finished, num_timepoints)
+
+    def compute_and_store(t):
+        for stack, frame in zip(stacks, compute_frame(t)):
+            stack[t] = np.asarray(frame)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    # only a few timepoints are submitted ahead, so that cancelling takes effect soon
+    remaining = iter(range(1, num_timepoints))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="napari-assistant-time-lapse") as executor:
+        running = set()
+        while True:
+            if cancel is None or not cancel.is_set():
+                for t in remaining:
+                    running.add(executor.submit(compute_and_store, t))
+                    if len(running) >= 2 * max_workers:
+                        break
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+                finished += 1
+                if progress is not None:
+                    progress(finished, num_timepoints)
+
+    frames_per_second = finished / max(time.perf_counter() - start_time, 1e-9)
+    if cancel is not None and cancel.is_set():
+        return None, frames_per_second
+    for stack in stacks:
+        if isinstance(stack, np.memmap):
+            stack.flush()
+    return stacks, frames_per_second
+
+
+def workflow_frame_function(workflow, root_data: dict, targets: Sequence[str]) -> Callable[[int], tuple]:
+    """Return a function computing given targets of a workflow at one timepoint.
+
+    Parameters
+    ----------
+    workflow : napari_workflows.Workflow
+    root_data : dict
+        input data of the workflow's roots by name; 4D data is processed
+        timepoint by timepoint, other data is used for every timepoint
+    targets : sequence of str
+        names of the tasks to compute
+    """
+    from dask.local import get_sync
+    tasks = dict(workflow._tasks)
+
+    def compute_frame(t):
+        frame_tasks = dict(tasks)
+        for name, data in root_data.items():
+            frame_tasks[name] = timepoint_frame(data, t)
+        # timepoints are processed in parallel already, the tasks of one are computed sequentially
+        return get_sync(frame_tasks, list(targets))
+
+    return compute_frame
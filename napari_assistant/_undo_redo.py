@@ -1,7 +1,7 @@
 from napari_assistant._workflow_io_utility import load_remaining_workflow, initialise_root_functions
 from napari_workflows import WorkflowManager, Workflow
 from napari import Viewer
-from ._gui._category_widget import DEFAULT_BUTTON_SIZE
+from ._categories import DEFAULT_BUTTON_SIZE
 
 def delete_workflow_widgets_layers(viewer: Viewer) -> None:
     """
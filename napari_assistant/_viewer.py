@@ -9,6 +9,11 @@ def Viewer(show_assistant: bool = True, *args, **kwargs):
             from ._gui._Assistant import Assistant
             viewer.window.add_dock_widget(Assistant(viewer), name="Assistant")
 
+            from ._startup import startup_report
+            report = startup_report()
+            if report is not None:
+                report.mark("assistant_dock")
+
     QTimer.singleShot(300, later)
 
     return viewer
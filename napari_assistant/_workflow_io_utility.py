@@ -1,16 +1,12 @@
-from inspect import signature
-from napari.utils._magicgui import _make_choice_data_setter
-from ._categories import get_category_of_function, get_name_of_function
-from ._gui._category_widget import (
-    separate_argnames_by_type,
-    kwarg_key_adapter,
-    make_gui_for_category,
-    DEFAULT_BUTTON_SIZE,
-    LAYER_NAME_PREFIX,
-)
-from napari import Viewer
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from ._categories import get_category_of_function, get_name_of_function, DEFAULT_BUTTON_SIZE, LAYER_NAME_PREFIX
 from napari_workflows import Workflow
 
+if TYPE_CHECKING:
+    from napari import Viewer
+
 # TODO look if comments are accurate
 def initialise_root_functions(workflow: Workflow, viewer: Viewer, button_size: int = DEFAULT_BUTTON_SIZE):
     """
@@ -220,6 +216,8 @@ def make_flexible_gui(func, viewer: Viewer, autocall: bool = True, button_size:
     button_size: int
         button size parameter that is passed to make_category_gui
     """
+    from ._gui._category_widget import make_gui_for_category
+
     gui = None
     category = get_category_of_function(func)
 
@@ -252,11 +250,12 @@ def set_choices(workflow: Workflow, wf_step_name: str, viewer: Viewer, widget):
     widget:
         the magicgui FunctionGui object for which the input choices should be changed
     """
+    from ._operation_spec import operation_spec
     func = workflow._tasks[wf_step_name][0]
     args = workflow._tasks[wf_step_name][1:]
     sources = workflow.sources_of(wf_step_name)
-    adapter = kwarg_key_adapter(func)
-    keyword_list = list(signature(func).parameters.keys())
+    adapter = operation_spec(func).adapter
+    keyword_list = operation_spec(func).parameter_names
     image_keywords = [(key,value) for key, value in zip(keyword_list,args) if value in sources]
 
     for i, (key, name) in enumerate(image_keywords):
@@ -277,6 +276,8 @@ def get_layers_data_of_name(layer_name: str, viewer: Viewer, gui):
     gui:
         magicgui Combobox instance for which the choices should
     """
+    from napari.utils._magicgui import _make_choice_data_setter
+
     choices = []
     for layer in [x for x in viewer.layers if str(x) == layer_name]:
         choice_key = f'{layer.name}'
@@ -317,12 +318,13 @@ def get_source_keywords_and_sources(workflow: Workflow, wf_step_name: str):
         name of the workflow step for which function keywords and image names
         should be returned
     """
+    from ._operation_spec import operation_spec
     func = workflow._tasks[wf_step_name][0]
     args = workflow._tasks[wf_step_name][1:]
-    adapter = kwarg_key_adapter(func)
+    adapter = operation_spec(func).adapter
     
     sources = workflow.sources_of(wf_step_name)
-    keyword_list = list(signature(func).parameters.keys())
+    keyword_list = operation_spec(func).parameter_names
     image_keywords = [
         (adapter[key],value) for key, value in zip(keyword_list,args) if value in sources
     ]
@@ -341,15 +343,12 @@ def category_kwargs(func,kwargs):
     kwargs: dict
         kwargs of func
     """
-    category_kwargs = {}
-    adapter = kwarg_key_adapter(func)
+    from ._operation_spec import operation_spec
+    spec = operation_spec(func)
+    adapter = spec.adapter
 
-    sig = signature(func)
     # get the names of positional parameters in the new operation
-    param_names, foo, bar, foobar, fbar = separate_argnames_by_type(
-        sig.parameters.items())
-
-    category_kwargs = {adapter[key] : kwargs[key] for key in param_names}
+    category_kwargs = {adapter[key] : kwargs[key] for key in spec.param_names}
 
     return category_kwargs
 
@@ -368,11 +367,12 @@ def kwargs_of_wf_step(
     wf_step_name:
         name of the worflow step for which the kwargs will be generated
     """
+    from ._operation_spec import operation_spec
     func     = workflow._tasks[wf_step_name][0]
     arg_vals = workflow._tasks[wf_step_name][1:]
 
     # getting the keywords corresponding to the values
-    keyword_list = list(signature(func).parameters.keys())
+    keyword_list = operation_spec(func).parameter_names
 
     # creating the kwargs dict
     kw_dict = {}
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def catalog_directory(tmp_path, monkeypatch):
+    """Keep the catalog cache of tests out of the user's cache folder"""
+    from napari_assistant._catalog import CACHE_DIR_ENVIRONMENT_VARIABLE
+
+    directory = tmp_path / "napari-assistant-cache"
+    monkeypatch.setenv(CACHE_DIR_ENVIRONMENT_VARIABLE, str(directory))
+    return directory
@@ -0,0 +1,118 @@
+import threading
+
+
+def test_latest_only_runner(qtbot):
+    from napari_assistant._gui._background import LatestOnlyRunner
+
+    busy = []
+    delivered = []
+    release = threading.Event()
+
+    runner = LatestOnlyRunner(on_busy=busy.append)
+    runner.submit(lambda: release.wait(5) and 1, delivered.append)
+    runner.submit(lambda: 2, delivered.append)
+    runner.submit(lambda: 3, delivered.append)
+    release.set()
+
+    qtbot.waitUntil(lambda: not runner.busy)
+
+    # the first result is outdated and the second computation was never started
+    assert delivered == [3]
+    assert busy == [True, False]
+
+
+def test_latest_only_runner_failing(qtbot, monkeypatch):
+    from napari.utils.notifications import notification_manager
+    from napari_assistant._gui._background import LatestOnlyRunner
+
+    errors = []
+    monkeypatch.setattr(notification_manager, "receive_error", lambda *exc_info: errors.append(exc_info[1]))
+
+    def fail():
+        raise ValueError("operation failed")
+
+    busy = []
+    delivered = []
+    runner = LatestOnlyRunner(on_busy=busy.append)
+    runner.submit(fail, delivered.append)
+    qtbot.waitUntil(lambda: not runner.busy)
+
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    assert delivered == []
+    assert busy == [True, False]
+
+    # the runner still works, also if delivering a result fails
+    runner.submit(lambda: 1, lambda result: fail())
+    qtbot.waitUntil(lambda: not runner.busy)
+    runner.submit(lambda: 2, delivered.append)
+    qtbot.waitUntil(lambda: not runner.busy)
+
+    assert len(errors) == 2
+    assert delivered == [2]
+    assert busy == [True, False] * 3
+
+
+def test_auto_call_scheduler_modes(qtbot):
+    from magicgui import magicgui
+    from napari_assistant._gui._scheduler import AutoCallScheduler, MODE_IMMEDIATE, MODE_THROTTLED, \
+        MODE_ON_RELEASE
+
+    @magicgui
+    def gui(sigma: float = 1, operation: str = "fast"):
+        pass
+
+    runs = []
+    scheduler = AutoCallScheduler(gui, lambda: runs.append(gui.sigma.value),
+                                  operation_name=lambda: gui.operation.value,
+                                  immediate_latency=0.1, on_release_latency=1)
+    scheduler.record("fast", 0.01)
+    scheduler.record("medium", 0.5)
+    scheduler.record("slow", 5)
+
+    assert scheduler.mode() == MODE_IMMEDIATE
+    gui.sigma.value = 2
+    assert runs == [2]
+
+    # changing the operation is executed right away
+    gui.operation.value = "slow"
+    assert runs == [2, 2]
+    assert scheduler.mode() == MODE_ON_RELEASE
+    gui.sigma.value = 3
+    gui.sigma.value = 4
+    assert runs == [2, 2]
+    gui.sigma.native.editingFinished.emit()
+    assert runs == [2, 2, 4]
+
+    gui.operation.value = "medium"
+    assert scheduler.mode() == MODE_THROTTLED
+    gui.sigma.value = 5
+    gui.sigma.value = 6
+    qtbot.waitUntil(lambda: runs[-1] == 6)
+    assert runs == [2, 2, 4, 4, 6]
+
+
+def test_timepoint_prefetcher(qtbot):
+    from napari_assistant._result_cache import ResultCache
+    from napari_assistant._gui._prefetch import TimepointPrefetcher
+
+    cache = ResultCache(max_bytes=1000)
+    prefetcher = TimepointPrefetcher(cache, num_timepoints=2)
+
+    # timepoints ahead in the direction of motion come first
+    assert prefetcher.timepoints(5, 10) == [6, 7, 4, 3]
+    assert prefetcher.timepoints(4, 10) == [3, 2, 5, 6]
+    assert prefetcher.timepoints(1, 10) == [0, 2, 3]
+
+    computed = []
+
+    def compute_at(t):
+        computed.append(t)
+        return t * 10, ()
+
+    cache.put(("t", 2), (20, ()), 1)
+    prefetcher.prefetch(1, 10, lambda t: ("t", t), compute_at)
+    qtbot.waitUntil(lambda: len(cache) == 3)
+
+    # cached timepoints are skipped
+    assert computed == [0, 3]
+    assert cache.get(("t", 3)) == (30, ())
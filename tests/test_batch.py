@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+
+def _save_workflow(filename):
+    from napari_workflows import Workflow, _io_yaml_v1
+    from scipy import ndimage as ndi
+
+    workflow = Workflow()
+    workflow.set("blurred", ndi.gaussian_filter, "image", 2)
+    workflow.set("smoothed", ndi.uniform_filter, "blurred", 3)
+    _io_yaml_v1.save_workflow(str(filename), workflow)
+
+
+def test_run_batch(tmp_path):
+    import tifffile
+    from scipy import ndimage as ndi
+    from napari_assistant._batch import run_batch
+
+    _save_workflow(tmp_path / "workflow.yaml")
+    images = []
+    for i in range(3):
+        images.append(np.random.default_rng(i).random((20, 30)).astype(np.float32))
+        tifffile.imwrite(tmp_path / f"image{i}.tif", images[-1])
+    (tmp_path / "broken.tif").write_bytes(b"no tiff")
+
+    lines = []
+    summary = run_batch(str(tmp_path / "workflow.yaml"), str(tmp_path / "*.tif"), str(tmp_path / "out"),
+                        targets=["blurred", "smoothed"], workers=2, report=lines.append)
+
+    assert (summary["processed"], summary["skipped"], summary["failed"]) == (3, 0, 1)
+    assert len(lines) == 6
+    for i, image in enumerate(images):
+        blurred = tifffile.imread(tmp_path / "out" / "blurred" / f"image{i}.tif")
+        assert np.allclose(blurred, ndi.gaussian_filter(image, 2))
+        assert np.allclose(tifffile.imread(tmp_path / "out" / "smoothed" / f"image{i}.tif"), ndi.uniform_filter(blurred, 3))
+
+    # existing results are skipped
+    summary = run_batch(str(tmp_path / "workflow.yaml"), str(tmp_path / "image*.tif"), str(tmp_path / "out"),
+                        targets=["blurred", "smoothed"], workers=2, report=lines.append)
+    assert (summary["processed"], summary["skipped"]) == (0, 3)
+
+
+def test_unknown_target(tmp_path):
+    from napari_assistant._batch import run_batch
+
+    _save_workflow(tmp_path / "workflow.yaml")
+    with pytest.raises(ValueError):
+        run_batch(str(tmp_path / "workflow.yaml"), str(tmp_path / "*.tif"), str(tmp_path / "out"), targets=["nope"])
+
+
+def test_run_batch_recursive(tmp_path):
+    import tifffile
+    from napari_assistant._batch import run_batch
+
+    _save_workflow(tmp_path / "workflow.yaml")
+    for folder in ("a", "b"):
+        (tmp_path / "data" / folder).mkdir(parents=True)
+        tifffile.imwrite(tmp_path / "data" / folder / "img.tif", np.zeros((10, 10), dtype=np.float32))
+
+    # images of the same name in different folders don't collide, and results are no inputs
+    for _ in range(2):
+        summary = run_batch(str(tmp_path / "workflow.yaml"), str(tmp_path / "data" / "**" / "*.tif"),
+                            str(tmp_path / "data" / "out"), targets=["blurred"], workers=1, report=print)
+    assert (summary["processed"], summary["skipped"]) == (0, 2)
+    assert (tmp_path / "data" / "out" / "blurred" / "a" / "img.tif").exists()
+    assert (tmp_path / "data" / "out" / "blurred" / "b" / "img.tif").exists()
+
+    # different inputs which would be written to the same file
+    tifffile.imwrite(tmp_path / "data" / "a" / "img.ome.tif", np.zeros((10, 10), dtype=np.float32))
+    with pytest.raises(ValueError):
+        run_batch(str(tmp_path / "workflow.yaml"), str(tmp_path / "data" / "**" / "*.tif"),
+                  str(tmp_path / "data" / "out"), targets=["blurred"], workers=1, report=print)
+
+
+def test_glob_base():
+    import os
+    from napari_assistant._batch import glob_base
+
+    assert glob_base(os.path.join("data", "**", "*.tif")) == "data"
+    assert glob_base(os.path.join("data", "a", "img.tif")) == os.path.join("data", "a")
+    assert glob_base("*.tif") == os.curdir
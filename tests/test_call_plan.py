@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("maximum, dtype", [
+    (1, np.uint16),
+    (255, np.uint16),
+    (65535, np.uint16),
+    (65536, np.uint32),
+    (2 ** 32, np.uint64),
+])
+def test_as_labels_minimal(maximum, dtype):
+    from napari_assistant._call_plan import as_labels
+
+    result = as_labels(np.asarray([0, maximum], dtype=np.float64), "minimal")
+    assert result.dtype == dtype
+    assert result[1] == maximum
+
+
+@pytest.mark.parametrize("minimum, maximum, dtype", [
+    (-1, 100, np.int16),
+    (-1, 40000, np.int32),
+    (-40000, 1, np.int32),
+])
+def test_as_labels_negative(minimum, maximum, dtype):
+    from napari_assistant._call_plan import as_labels
+
+    result = as_labels(np.asarray([minimum, maximum], dtype=np.int64), "minimal")
+    assert result.dtype == dtype
+    assert list(result) == [minimum, maximum]
+
+
+def test_as_labels_policies(monkeypatch):
+    import napari_assistant._call_plan as call_plan
+
+    integers = np.asarray([0, 3], dtype=np.int32)
+    floats = np.asarray([0.0, 3.0])
+
+    # integer results are kept as they are, without a copy
+    assert call_plan.as_labels(integers, "preserve") is integers
+    assert call_plan.as_labels(floats, "preserve").dtype == np.uint16
+    assert call_plan.as_labels(integers, "minimal").dtype == np.uint16
+    assert call_plan.as_labels(integers, "int64").dtype == np.int64
+    # not finite values can't be fitted
+    assert call_plan.as_labels(np.asarray([0.0, np.nan]), "minimal").dtype == np.int64
+
+    # the policy configured by NAPARI_ASSISTANT_LABELS_DTYPE is used by default
+    monkeypatch.setattr(call_plan, "labels_dtype_policy", "minimal")
+    assert call_plan.as_labels(integers).dtype == np.uint16
+
+    with pytest.raises(ValueError):
+        call_plan.as_labels(integers, "smallest")
@@ -0,0 +1,58 @@
+def _blur(image: "napari.types.ImageData", sigma: float = 1) -> "napari.types.ImageData":
+    return image
+
+
+def test_catalog_round_trip(catalog_directory):
+    from napari_assistant._catalog import LazyOperation, load_catalog, save_catalog
+
+    assert save_catalog({"Filtering>Blur": _blur})
+    assert (catalog_directory / "catalog.json").exists()
+
+    catalog = load_catalog()
+    assert isinstance(catalog["Filtering>Blur"], LazyOperation)
+    assert catalog["Filtering>Blur"].resolve() is _blur
+    assert catalog["Filtering>Blur"].num_image_inputs == 1
+
+
+def test_catalog_skips_unresolvable_functions(catalog_directory, monkeypatch):
+    import functools
+    from napari_assistant._catalog import LazyOperation, save_catalog
+
+    # wrapped like by time_slicer, so that the original function is resolved and wrapped again
+    @functools.wraps(_blur)
+    def time_sliced_blur(*args, **kwargs):
+        return _blur(*args, **kwargs)
+
+    # e.g. napari-time-slicer is not available anymore
+    monkeypatch.setattr(LazyOperation, "resolve", lambda self: None)
+
+    assert not save_catalog({"Filtering>Blur": time_sliced_blur})
+    assert not (catalog_directory / "catalog.json").exists()
+
+
+def test_resolved_npe2_contributions_are_written_back(catalog_directory, monkeypatch):
+    import napari_assistant._categories as categories
+    from napari_assistant._catalog import LazyOperation, load_catalog, save_catalog
+    from napari_assistant._registry import OperationRegistry
+
+    resolved = []
+
+    def resolve(plugin_name, widget_name):
+        resolved.append(widget_name)
+        return _blur
+
+    monkeypatch.setattr(categories, "get_function_of_widget_contribution", resolve)
+    contribution = LazyOperation("Filtering>Blur", None, None, None, False, None, None,
+                                 plugin="blur-plugin", widget="Filtering > Blur")
+    assert save_catalog({"Filtering>Blur": contribution})
+
+    registry = OperationRegistry(load_catalog())
+    assert registry.image_inputs_and_return_kind("Filtering>Blur") == (1, "image")
+    registry.save_resolved()
+    assert resolved == ["Filtering > Blur"]
+
+    # the next session knows the contribution without resolving it
+    registry = OperationRegistry(load_catalog())
+    assert registry.image_inputs_and_return_kind("Filtering>Blur") == (1, "image")
+    assert registry.doc("Filtering>Blur") is None
+    assert resolved == ["Filtering > Blur"]
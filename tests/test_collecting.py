@@ -14,3 +14,235 @@ def test_collecting():
     func = find_function("Fantasy (clesperanto)")
 
     assert func is fantasy_filter
+
+
+def test_registry_lookups():
+    from napari_tools_menu import register_function
+
+    @register_function(menu="Filtering / noise removal > Registry fantasy (clesperanto)")
+    def registry_fantasy_filter(image:"napari.types.ImageData") -> "napari.types.ImageData":
+        return image
+
+    from napari_assistant._categories import all_operations, find_function, get_name_of_function
+    from napari_assistant._registry import operation_registry
+    all_operations.cache_clear()
+
+    assert find_function("Registry fantasy (clesperanto)") is registry_fantasy_filter
+    assert find_function("Registry fanta") is registry_fantasy_filter
+    assert get_name_of_function(registry_fantasy_filter) == "Registry fantasy (clesperanto)"
+    assert operation_registry() is operation_registry()
+
+
+def test_registry_search(monkeypatch):
+    from napari_assistant import _registry
+    from napari_assistant._registry import OperationRegistry
+
+    def blur(image):
+        """Smooth with a Gaussian kernel"""
+
+    def edges(image):
+        """Find edges"""
+
+    registry = OperationRegistry({"Filtering>Blur": blur, "Filtering>Edges": edges})
+
+    # short search strings are looked up by scanning, longer ones in the trigram index
+    assert registry.search("bl") == {"Filtering>Blur"}
+    assert registry.search("e") == {"Filtering>Blur", "Filtering>Edges"}
+    assert registry.search("gaussian") == {"Filtering>Blur"}
+    assert registry.search("filtering>") == {"Filtering>Blur", "Filtering>Edges"}
+    assert registry.search("sharpen") == set()
+
+    # only the most recently searched strings are remembered
+    monkeypatch.setattr(_registry, "SEARCH_RESULTS_CACHE_SIZE", 2)
+    for search_string in ("blur", "edge", "blur", "find"):
+        registry.search(search_string)
+    assert list(registry._search_results) == ["blur", "find"]
+
+
+def test_result_cache():
+    import numpy as np
+    from napari.layers import Image
+    from napari_assistant._result_cache import ResultCache
+
+    cache = ResultCache(max_bytes=250)
+    layer = Image(np.zeros((10, 10), dtype=np.uint8))
+
+    key = cache.key("Gaussian", [layer], None, (1.0, False))
+    assert cache.get(key) is None
+    cache.put(key, "blurred", 100)
+    assert cache.get(cache.key("Gaussian", [layer], None, (1.0, False))) == "blurred"
+
+    # other parameters or new data in the input layer
+    assert cache.get(cache.key("Gaussian", [layer], None, (2.0, False))) is None
+    layer.data = np.ones((10, 10), dtype=np.uint8)
+    assert cache.get(cache.key("Gaussian", [layer], None, (1.0, False))) is None
+
+    # the least recently used entries are evicted when the budget is exceeded
+    cache.put(("a",), "a", 100)
+    cache.put(("b",), "b", 100)
+    assert cache.get(key) is None
+    assert cache.statistics() == {"hits": 1, "misses": 4, "evictions": 1, "entries": 2, "bytes": 200, "max_bytes": 250}
+
+    # buffers of cached values must not be reused as output until they are evicted
+    buffer = np.zeros((5, 5))
+    cache.put(("c",), buffer, 100, buffer=buffer)
+    assert cache.holds(buffer)
+    cache.put(("d",), "d", 100)
+    cache.put(("e",), "e", 100)
+    assert not cache.holds(buffer)
+
+
+class _DeviceArray:
+    """Minimal stand-in for a GPU array, which is not a numpy array"""
+
+    def __init__(self, data):
+        self._data = data
+        self.shape, self.dtype, self.ndim, self.nbytes = data.shape, data.dtype, data.ndim, data.nbytes
+
+    def __array__(self, dtype=None, copy=None):
+        return self._data if dtype is None else self._data.astype(dtype)
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __setitem__(self, index, value):
+        self._data[index] = value
+
+
+def test_reused_output_is_not_recorded():
+    import napari
+    import numpy as np
+    from napari.components import ViewerModel
+    from napari_tools_menu import register_function
+    from napari_workflows import WorkflowManager
+
+    def reuse_blur(source: napari.types.ImageData, destination: napari.types.ImageData = None,
+                   sigma: float = 1) -> napari.types.ImageData:
+        from scipy import ndimage as ndi
+        if destination is None:
+            destination = _DeviceArray(np.empty_like(source))
+        destination[...] = ndi.gaussian_filter(np.asarray(source), sigma)
+        return destination
+
+    # makes it a clesperanto operation, which writes into the output it's given
+    reuse_blur.__module__ = "pyclesperanto_test"
+    register_function(reuse_blur, menu="Filtering / noise removal > Reuse blur (clesperanto)")
+
+    from napari_assistant._categories import CATEGORIES, all_operations
+    from napari_assistant._gui._category_widget import make_gui_for_category
+    from napari_assistant._result_cache import result_cache
+    all_operations.cache_clear()
+
+    viewer = ViewerModel()
+    image = viewer.add_image(np.random.default_rng(0).random((20, 20)).astype(np.float32))
+    widget = make_gui_for_category(CATEGORIES["Remove noise"], viewer=viewer,
+                                   operation_name="Reuse blur (clesperanto)", autocall=False)
+    max_bytes = result_cache().max_bytes
+    # cached results are never overwritten; without cache the second run reuses the first result
+    result_cache().max_bytes = 0
+    try:
+        first = widget(input0=image, x=1.0, viewer=viewer).data
+        layer = widget(input0=image, x=2.0, viewer=viewer)
+    finally:
+        result_cache().max_bytes = max_bytes
+        # stop the workflow manager's background updates of this viewer
+        WorkflowManager.install(viewer).worker.quit()
+
+    assert layer.data is first
+    task = WorkflowManager.install(viewer).workflow.get_task(layer.name)
+    assert task[1:] == ("Image", None, 2.0)
+
+
+def test_reuse_output_once_cache_evicted_it():
+    import napari
+    import numpy as np
+    from napari.components import ViewerModel
+    from napari_tools_menu import register_function
+    from napari_workflows import WorkflowManager
+
+    def cached_reuse_blur(source: napari.types.ImageData, destination: napari.types.ImageData = None,
+                          sigma: float = 1) -> napari.types.ImageData:
+        from scipy import ndimage as ndi
+        if destination is None:
+            destination = _DeviceArray(np.empty_like(source))
+        destination[...] = ndi.gaussian_filter(np.asarray(source), sigma)
+        return destination
+
+    cached_reuse_blur.__module__ = "pyclesperanto_test"
+    register_function(cached_reuse_blur, menu="Filtering / noise removal > Cached reuse blur (clesperanto)")
+
+    from napari_assistant._categories import CATEGORIES, all_operations
+    from napari_assistant._gui._category_widget import make_gui_for_category
+    from napari_assistant._result_cache import result_cache
+    all_operations.cache_clear()
+
+    viewer = ViewerModel()
+    image = viewer.add_image(np.random.default_rng(0).random((20, 20)).astype(np.float32))
+    widget = make_gui_for_category(CATEGORIES["Remove noise"], viewer=viewer,
+                                   operation_name="Cached reuse blur (clesperanto)", autocall=False)
+    cache = result_cache()
+    max_bytes = cache.max_bytes
+    # room for one result
+    cache.max_bytes = 2000
+    try:
+        first = widget(input0=image, x=1.0, viewer=viewer).data
+        # the cache hands out the first result, so it's not overwritten
+        second = widget(input0=image, x=2.0, viewer=viewer).data
+        assert second is not first
+        assert cache.holds(second)
+
+        # once evicted, the previous result is reused, and the reused buffer isn't cached
+        cache.put(("other",), "other", 1600)
+        assert not cache.holds(second)
+        layer = widget(input0=image, x=3.0, viewer=viewer)
+        assert layer.data is second
+        assert not cache.holds(second)
+    finally:
+        cache.max_bytes = max_bytes
+        # stop the workflow manager's background updates of this viewer
+        WorkflowManager.install(viewer).worker.quit()
+
+    task = WorkflowManager.install(viewer).workflow.get_task(layer.name)
+    assert task[1:] == ("Image", None, 3.0)
+
+
+def test_cached_results_dont_hold_inputs():
+    import napari
+    import numpy as np
+    from napari.components import ViewerModel
+    from napari_tools_menu import register_function
+    from napari_workflows import WorkflowManager
+
+    calls = []
+
+    @register_function(menu="Filtering / noise removal > Cached blur")
+    def cached_blur(source: napari.types.ImageData, sigma: float = 1) -> napari.types.ImageData:
+        from scipy import ndimage as ndi
+        calls.append(sigma)
+        return ndi.gaussian_filter(source, sigma)
+
+    from napari_assistant._categories import CATEGORIES, all_operations
+    from napari_assistant._gui._category_widget import make_gui_for_category
+    from napari_assistant._result_cache import result_cache
+    all_operations.cache_clear()
+
+    viewer = ViewerModel()
+    data = np.random.default_rng(0).random((20, 20)).astype(np.float32)
+    image = viewer.add_image(data)
+    widget = make_gui_for_category(CATEGORIES["Remove noise"], viewer=viewer,
+                                   operation_name="Cached blur", autocall=False)
+    try:
+        widget(input0=image, x=1.5, viewer=viewer)
+        widget(input0=image, x=2.5, viewer=viewer)
+        layer = widget(input0=image, x=1.5, viewer=viewer)
+    finally:
+        # stop the workflow manager's background updates of this viewer
+        WorkflowManager.install(viewer).worker.quit()
+
+    # the third run is a cache hit, which doesn't keep the input array alive
+    assert calls == [1.5, 2.5]
+    cached = [value for value, _, _ in result_cache()._entries.values() if value[0] is layer.data]
+    assert len(cached) == 1
+    assert not any(arg is data for arg in cached[0][1])
+    task = WorkflowManager.install(viewer).workflow.get_task(layer.name)
+    assert task[1:] == ("Image", 1.5)
@@ -0,0 +1,18 @@
+def test_connection_manager():
+    from napari.utils.events import EventEmitter
+    from napari_assistant._connections import ConnectionManager
+
+    emitter = EventEmitter(type_name="changed")
+    calls = []
+
+    connections = ConnectionManager()
+    assert connections.connect("key", emitter, calls.append)
+    assert not connections.connect("key", emitter, calls.append)
+    emitter()
+    assert len(calls) == 1
+    assert len(emitter.callbacks) == 1
+
+    connections.disconnect("key")
+    emitter()
+    assert len(calls) == 1
+    assert len(emitter.callbacks) == 0
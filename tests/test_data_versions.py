@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def test_data_version():
+    from napari.layers import Labels
+    from napari_assistant import data_version, bump_data_version, data_fingerprint
+
+    layer = Labels(np.zeros((100, 100), dtype=np.uint8))
+    other = Labels(np.zeros((100, 100), dtype=np.uint8))
+
+    version = data_version(layer)
+    assert data_version(layer) == version
+    assert data_version(other) != version
+
+    layer.data = np.ones((100, 100), dtype=np.uint8)
+    assert data_version(layer) > version
+
+    version = data_version(layer)
+    layer.paint((50, 50), 3)
+    assert data_version(layer) > version
+
+    # in-place modification without event
+    version = data_version(layer)
+    fingerprint = data_fingerprint(layer)
+    layer.data[:] = 2
+    assert data_version(layer) == version
+    assert data_fingerprint(layer) != fingerprint
+    bump_data_version(layer)
+    assert data_version(layer) > version
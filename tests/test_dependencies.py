@@ -0,0 +1,36 @@
+def test_downstream_in_topological_order():
+    from napari_assistant._dependencies import DependencyIndex
+
+    index = DependencyIndex()
+    # image -> blurred -> binary -> labels
+    #      \-----------------------/
+    index.set_inputs("blurred", ["image"])
+    index.set_inputs("binary", ["blurred"])
+    index.set_inputs("labels", ["binary", "image"])
+    index.set_inputs("other", ["something else"])
+
+    assert index.downstream("image") == ["blurred", "binary", "labels"]
+    assert index.downstream("binary") == ["labels"]
+    assert index.downstream("labels") == []
+
+    # input of a widget changed
+    index.set_inputs("binary", ["something else"])
+    assert sorted(index.downstream("image")) == ["blurred", "labels"]
+    downstream = index.downstream("something else")
+    assert sorted(downstream) == ["binary", "labels", "other"]
+    assert downstream.index("binary") < downstream.index("labels")
+
+    index.remove("binary")
+    assert "binary" not in index
+    assert index.inputs("labels") == ("image",)
+    assert index.downstream("something else") == ["other"]
+
+
+def test_downstream_with_cycle():
+    from napari_assistant._dependencies import DependencyIndex
+
+    index = DependencyIndex()
+    index.set_inputs("a", ["image", "b"])
+    index.set_inputs("b", ["a"])
+
+    assert sorted(index.downstream("image")) == ["a", "b"]
@@ -34,3 +34,56 @@ def something_with_viewer(make_napari_viewer):
     # assistant._activate(CATEGORIES.get("Binarize"))
     # assistant._activate(CATEGORIES.get("Label"))
     assistant.seach_field.setText("Gauss")
+
+
+def test_search_is_debounced(make_napari_viewer, qtbot):
+    from napari_tools_menu import register_function
+    from napari_assistant import Assistant
+    from napari_assistant._categories import all_operations
+
+    @register_function(menu="Filtering / noise removal > Zebrafish denoising")
+    def zebrafish_denoising(image: "napari.types.ImageData") -> "napari.types.ImageData":
+        return image
+
+    all_operations.cache_clear()
+    assistant = Assistant(make_napari_viewer())
+    items = assistant.icon_grid.item_mapping
+
+    def shown():
+        return {label for label, item in items.items() if not item.isHidden()}
+
+    everything = shown()
+    assistant.seach_field.setText("zebra")
+    # categories are filtered once the user paused typing
+    assert shown() == everything
+    qtbot.waitUntil(lambda: not assistant._search_timer.isActive())
+    assert "Remove noise" in shown()
+    assert "Label" not in shown()
+
+
+def test_refresh_invalidates_dependent_layers():
+    from types import SimpleNamespace
+    from napari.components import ViewerModel
+    from napari_workflows import WorkflowManager
+    from napari_workflows._workflow import METADATA_WORKFLOW_VALID_KEY
+    from napari_assistant import Assistant
+    from napari_assistant._dependencies import DependencyIndex
+
+    viewer = ViewerModel()
+    image = viewer.add_image(np.zeros((5, 5)), name="image")
+    blurred = viewer.add_image(np.zeros((5, 5)), name="blurred")
+    labels = viewer.add_labels(np.zeros((5, 5), dtype=np.uint16), name="labels")
+    # what _refresh uses of an Assistant
+    assistant = SimpleNamespace(_viewer=viewer, _dependencies=DependencyIndex())
+    assistant._dependencies.set_inputs(blurred, [image])
+    assistant._dependencies.set_inputs(labels, [blurred])
+
+    try:
+        Assistant._refresh(assistant, image)
+    finally:
+        # stop the workflow manager's background updates of this viewer
+        WorkflowManager.install(viewer).worker.quit()
+
+    assert blurred.metadata[METADATA_WORKFLOW_VALID_KEY] is False
+    assert labels.metadata[METADATA_WORKFLOW_VALID_KEY] is False
+    assert METADATA_WORKFLOW_VALID_KEY not in image.metadata
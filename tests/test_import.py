@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+# seconds; importing the package must not load napari, magicgui or Qt
+IMPORT_TIME_BUDGET = 0.5
+
+
+def _import_in_subprocess(module):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        "print(','.join(m for m in ('qtpy', 'PyQt5', 'PySide2', 'magicgui', 'napari', 'napari_tools_menu',\n"
+        "                           'napari_assistant._gui') if m in sys.modules))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    duration, modules = output.split("\n")[:2]
+    return float(duration), modules
+
+
+def test_import_time_budget():
+    duration, modules = _import_in_subprocess("napari_assistant")
+
+    assert modules == ""
+    assert duration < IMPORT_TIME_BUDGET
+
+
+def test_headless_modules_do_not_import_qt():
+    _, modules = _import_in_subprocess("napari_assistant._workflow_io_utility, napari_assistant._registry")
+
+    assert modules == ""
+
+
+def test_plugin_module_does_not_import_widgets():
+    _, modules = _import_in_subprocess("napari_assistant._napari_plugin")
+
+    assert "napari_assistant._gui" not in modules.split(",")
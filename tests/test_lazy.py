@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+
+def _counting(data):
+    computed = []
+
+    def compute_chunk(region):
+        computed.append(tuple(s.start for s in region))
+        return data[region] * 2
+
+    return compute_chunk, computed
+
+
+def test_chunks_are_computed_on_demand_and_cached():
+    from napari_assistant._lazy import ChunkedComputation
+    from napari_assistant._result_cache import ResultCache
+
+    data = np.arange(6 * 5 * 4).reshape((6, 5, 4))
+    compute_chunk, computed = _counting(data)
+    cache = ResultCache(2 ** 20)
+    chunks = ChunkedComputation(compute_chunk, key="test", cache=cache)
+    lazy = chunks.array(data.shape, (1, 5, 4), data.dtype)
+
+    assert computed == []
+    assert np.array_equal(np.asarray(lazy[3]), data[3] * 2)
+    assert computed == [(3, 0, 0)]
+
+    # recently used chunks are cached, also for new arrays of the same key
+    again = ChunkedComputation(compute_chunk, key="test", cache=cache).array(data.shape, (1, 5, 4), data.dtype)
+    assert np.array_equal(np.asarray(again[2:4]), data[2:4] * 2)
+    assert computed == [(3, 0, 0), (2, 0, 0)]
+    assert np.array_equal(np.asarray(lazy), data * 2)
+
+
+def test_seeded_chunks_are_not_computed():
+    from napari_assistant._lazy import ChunkedComputation
+    from napari_assistant._result_cache import ResultCache
+
+    data = np.ones((4, 8))
+    compute_chunk, computed = _counting(data)
+    chunks = ChunkedComputation(compute_chunk, cache=ResultCache(2 ** 20))
+    region = (slice(0, 2), slice(0, 8))
+    chunks.seed(region, compute_chunk(region))
+
+    assert np.array_equal(np.asarray(chunks.array(data.shape, (2, 8), data.dtype)), data * 2)
+    assert computed == [(0, 0), (2, 0)]
+
+
+def test_chunk_of_wrong_shape():
+    from napari_assistant._lazy import ChunkedComputation
+
+    chunks = ChunkedComputation(lambda region: np.zeros((1, 1)))
+    with pytest.raises(ValueError):
+        np.asarray(chunks.array((4, 4), (2, 2), float))
+
+
+def test_block_chunk_shape():
+    from napari_assistant._lazy import block_chunk_shape
+
+    assert block_chunk_shape((100, 3000, 500), halo=8, edge=1024) == (8, 1024, 500)
+    assert block_chunk_shape((100, 3000, 500), halo=0, edge=1024) == (1, 1024, 500)
+    assert block_chunk_shape((300, 200), halo=8) == (300, 200)
+
+
+def test_lazy_results_are_cached_without_inputs():
+    import napari
+    from napari.components import ViewerModel
+    from napari_tools_menu import register_function
+    from napari_workflows import WorkflowManager
+    from scipy import ndimage as ndi
+
+    calls = []
+
+    @register_function(menu="Filtering / noise removal > Lazy counted blur")
+    def lazy_counted_blur(source: napari.types.ImageData, sigma: float = 1) -> napari.types.ImageData:
+        calls.append(sigma)
+        return ndi.gaussian_filter(source, sigma)
+
+    from napari_assistant._categories import CATEGORIES, all_operations
+    from napari_assistant._gui._category_widget import make_gui_for_category
+    from napari_assistant._lazy import LAZY_RESULT_NBYTES
+    from napari_assistant._result_cache import result_cache
+    all_operations.cache_clear()
+
+    viewer = ViewerModel()
+    data = np.random.default_rng(0).random((30, 40)).astype(np.float32)
+    image = viewer.add_image(data)
+    widget = make_gui_for_category(CATEGORIES["Remove noise"], viewer=viewer,
+                                   operation_name="Lazy counted blur", autocall=False)
+    widget._lazy.setChecked(True)
+    try:
+        widget(input0=image, x=1.0, viewer=viewer)
+        widget(input0=image, x=2.0, viewer=viewer)
+        layer = widget(input0=image, x=1.0, viewer=viewer)
+    finally:
+        # stop the workflow manager's background updates of this viewer
+        WorkflowManager.install(viewer).worker.quit()
+
+    # the third run is a cache hit; its array is made again from chunks computed before
+    assert calls == [1.0, 2.0]
+    np.testing.assert_allclose(np.asarray(layer.data), ndi.gaussian_filter(data, 1.0), rtol=1e-5)
+    assert calls == [1.0, 2.0]
+
+    # cached lazy results are charged a nominal cost and don't reference the inputs
+    entries = [(value, nbytes) for key, (value, nbytes, _) in result_cache()._entries.items()
+               if key[0] == "lazy" and key[1][0] == "Lazy counted blur"]
+    assert len(entries) == 2
+    for (layout, args), nbytes in entries:
+        assert nbytes == LAZY_RESULT_NBYTES
+        assert layout[0] == data.shape and not any(arg is data for arg in args)
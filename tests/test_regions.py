@@ -0,0 +1,132 @@
+def test_halo_and_expand():
+    from napari_assistant._regions import expand, halo_from_arguments
+
+    assert halo_from_arguments((None, 2, 1.5, True, "text")) == 8
+    assert halo_from_arguments(()) == 0
+
+    crop, inner = expand((slice(0, 5), slice(10, 20)), 4, (5, 100))
+    assert crop == (slice(0, 5), slice(6, 24))
+    assert inner == (slice(None), slice(4, 14))
+
+    # halos are clipped at the border
+    crop, inner = expand((slice(2, 4),), 4, (5,))
+    assert crop == (slice(0, 5),)
+    assert inner == (slice(2, 4),)
+
+
+def test_visible_region():
+    import numpy as np
+    from napari.components import ViewerModel
+    from napari_assistant._regions import camera_of, visible_region
+
+    viewer = ViewerModel()
+    layer = viewer.add_image(np.zeros((3, 1000, 2000)), scale=(1, 2, 2))
+    camera = camera_of(viewer)
+    camera.center = (1000, 2000)
+    camera.zoom = 1
+    viewer.canvas.size = (100, 200)
+
+    assert visible_region(viewer, layer) == (slice(0, 3), slice(475, 526), slice(950, 1051))
+
+    camera.zoom = 0.01
+    assert visible_region(viewer, layer) is None
+    camera.zoom = 1
+    viewer.dims.ndisplay = 3
+    assert visible_region(viewer, layer) is None
+
+
+def test_current_slice_region():
+    import numpy as np
+    from napari.components import ViewerModel
+    from napari_assistant._regions import current_slice_region, intersect
+
+    viewer = ViewerModel()
+    layer = viewer.add_image(np.zeros((4, 10, 20, 30)), scale=(1, 2, 1, 1))
+    viewer.dims.current_step = (2, 6, 0, 0)
+
+    assert current_slice_region(viewer, layer) == (slice(2, 3), slice(6, 7), slice(0, 20), slice(0, 30))
+    # time is left to the time slicer
+    region = current_slice_region(viewer, layer, time_axis=True)
+    assert region == (slice(0, 4), slice(6, 7), slice(0, 20), slice(0, 30))
+
+    assert intersect(region, None) == region
+    assert intersect(region, (slice(0, 4), slice(0, 10), slice(5, 10), slice(0, 30))) == \
+        (slice(0, 4), slice(6, 7), slice(5, 10), slice(0, 30))
+
+    viewer.dims.ndisplay = 3
+    assert current_slice_region(viewer, layer) is None
+
+
+def test_preview_doesnt_change_result_layer(qtbot):
+    import napari
+    import numpy as np
+    from napari.components import ViewerModel
+    from napari_tools_menu import register_function
+    from napari_workflows import WorkflowManager
+    from scipy import ndimage as ndi
+
+    @register_function(menu="Filtering / noise removal > Preview blur")
+    def preview_blur(source: napari.types.ImageData, sigma: float = 1) -> napari.types.ImageData:
+        return ndi.gaussian_filter(source, sigma)
+
+    from napari_assistant._categories import CATEGORIES, all_operations
+    from napari_assistant._gui._category_widget import PREVIEW, make_gui_for_category
+    all_operations.cache_clear()
+
+    viewer = ViewerModel()
+    data = np.random.default_rng(0).random((5, 30, 40)).astype(np.float32)
+    image = viewer.add_image(data)
+    viewer.dims.set_current_step(0, 2)
+    widget = make_gui_for_category(CATEGORIES["Remove noise"], viewer=viewer,
+                                   operation_name="Preview blur", autocall=False)
+
+    def run_in_background(current_slice, sigma=2.0, apply=False):
+        # like parameter changes of auto-calling widgets, or clicking the apply button
+        widget._current_slice.blockSignals(True)
+        widget._current_slice.setChecked(current_slice)
+        widget._current_slice.blockSignals(False)
+        widget._compute_in_background = True
+        widget._applying = apply
+        try:
+            widget(input0=image, x=sigma, viewer=viewer)
+        finally:
+            widget._compute_in_background = False
+            widget._applying = False
+
+    try:
+        result = widget(input0=image, x=1.0, viewer=viewer)
+        full = result.data
+        data_events = []
+        result.events.data.connect(data_events.append)
+
+        # a preview of the current slice is shown in a layer of its own
+        run_in_background(current_slice=True)
+        qtbot.waitUntil(lambda: widget._preview_layer is not None and not widget._runner.busy, timeout=5000)
+        preview = widget._preview_layer
+        assert preview.metadata[PREVIEW] and preview.data.shape == (1, 30, 40)
+        assert tuple(preview.translate) == (2, 0, 0)
+        assert result.data is full and not data_events and not result.visible
+        task = WorkflowManager.install(viewer).workflow.get_task(result.name)
+        assert task[1:] == (image.name, 1.0)
+        assert not widget._apply.isHidden()
+
+        # applying the previewed parameters computes the full image and records them
+        run_in_background(current_slice=True, apply=True)
+        qtbot.waitUntil(lambda: widget._preview_layer is None and not widget._runner.busy, timeout=5000)
+        assert preview not in viewer.layers and result.visible and widget._apply.isHidden()
+        task = WorkflowManager.install(viewer).workflow.get_task(result.name)
+        assert task[1:] == (image.name, 2.0)
+
+        # computing the full image again removes the preview
+        run_in_background(current_slice=True, sigma=3.0)
+        qtbot.waitUntil(lambda: widget._preview_layer is not None and not widget._runner.busy, timeout=5000)
+        preview = widget._preview_layer
+        run_in_background(current_slice=False, sigma=3.0)
+        qtbot.waitUntil(lambda: widget._preview_layer is None and not widget._runner.busy, timeout=5000)
+        assert preview not in viewer.layers and result.visible
+        np.testing.assert_allclose(result.data, ndi.gaussian_filter(data, 3.0), rtol=1e-5)
+        task = WorkflowManager.install(viewer).workflow.get_task(result.name)
+        assert task[1:] == (image.name, 3.0)
+    finally:
+        # stop the workflow manager's background updates of this viewer
+        WorkflowManager.install(viewer).worker.quit()
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def test_result_layer_index():
+    from napari.components import ViewerModel
+    from napari_assistant._gui._result_layers import ResultLayerIndex
+
+    viewer = ViewerModel()
+    viewer.add_image(np.zeros((5, 5)), name="input")
+    result = viewer.add_labels(np.zeros((5, 5), dtype=np.uint16), name="result", metadata={"op_id": 1})
+    index = ResultLayerIndex.install(viewer, "op_id")
+    assert ResultLayerIndex.install(viewer, "op_id") is index
+
+    assert index.get(1) is result
+    assert index.get(2) is None
+
+    # renaming doesn't affect the index
+    result.name = "renamed"
+    assert index.get(1) is result
+
+    viewer.layers.remove(result)
+    assert index.get(1) is None
+
+
+def test_result_layer_index_is_stale():
+    from napari.components import ViewerModel
+    from napari_assistant._gui._result_layers import ResultLayerIndex
+
+    viewer = ViewerModel()
+    first = viewer.add_image(np.zeros((5, 5)), name="first", metadata={"op_id": 1})
+    index = ResultLayerIndex(viewer, "op_id")
+
+    # metadata changed after the layers were added is found by scanning the layers
+    second = viewer.add_image(np.zeros((5, 5)), name="second")
+    first.metadata = {}
+    second.metadata = {"op_id": 1}
+    assert index.get(1) is second
+    assert index.get(1) is second
+
+    second.metadata = {}
+    assert index.get(1) is None
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+
+def _viewer_with_canvas():
+    from vispy.util.event import EmitterGroup
+
+    events = EmitterGroup(source=None, draw=None)
+    canvas = SimpleNamespace(events=events)
+    return SimpleNamespace(window=SimpleNamespace(_qt_viewer=SimpleNamespace(canvas=canvas))), events
+
+
+def test_on_first_frame():
+    from napari_assistant._startup import on_first_frame
+
+    viewer, events = _viewer_with_canvas()
+    drawn = []
+    # napari draws the scene in a callback of its own
+    events.draw.connect(lambda event: drawn.append("scene"))
+    on_first_frame(viewer, lambda: drawn.append("first frame"))
+
+    assert drawn == []
+    events.draw()
+    events.draw()
+    assert drawn == ["scene", "first frame", "scene"]
+
+
+def test_startup_report_marks_milestones_once(tmp_path):
+    import json
+    from napari_assistant._startup import StartupReport
+
+    report = StartupReport(str(tmp_path / "startup.json"), "deferred")
+    report.mark("first_viewer_frame")
+    first = report.milestones["first_viewer_frame"]
+    report.mark("first_viewer_frame")
+    report.mark("plugins_imported")
+
+    written = json.loads((tmp_path / "startup.json").read_text())
+    assert written["milestones"]["first_viewer_frame"] == first
+    assert written["milestones"]["first_viewer_frame"] <= written["milestones"]["plugins_imported"]
+    assert written["plugin_import"] == "deferred"
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+
+
+def _image(shape=(50, 61)):
+    return np.random.default_rng(0).random(shape).astype(np.float32)
+
+
+@pytest.mark.parametrize("kind", ["numpy", "memmap", "dask"])
+def test_process_tiled_matches_whole_image(kind, tmp_path):
+    from napari_assistant._tiling import process_tiled
+
+    image = _image()
+    expected = ndi.gaussian_filter(image, sigma=2)
+    if kind == "memmap":
+        data = np.lib.format.open_memmap(str(tmp_path / "image.npy"), mode="w+", dtype=image.dtype, shape=image.shape)
+        data[:] = image
+    elif kind == "dask":
+        import dask.array as da
+        data = da.from_array(image, chunks=(20, 20))
+    else:
+        data = image
+
+    result = process_tiled(lambda crop: ndi.gaussian_filter(crop, sigma=2), [data], halo=8, tile=(7, 9),
+                           max_workers=2, directory=tmp_path)
+
+    assert isinstance(result, np.memmap) == (kind != "numpy")
+    np.testing.assert_allclose(result, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_process_tiled_two_inputs_3d():
+    from napari_assistant._tiling import process_tiled
+
+    image1, image2 = _image((12, 20, 17)), _image((12, 20, 17)) * 2
+    result = process_tiled(lambda a, b: ndi.uniform_filter(a + b, size=3), [image1, image2], halo=2, tile=(5, 6, 7))
+
+    np.testing.assert_allclose(result, ndi.uniform_filter(image1 + image2, size=3), rtol=1e-5)
+
+
+def test_process_tiled_requires_same_shape():
+    from napari_assistant._tiling import process_tiled
+
+    with pytest.raises(ValueError):
+        process_tiled(lambda crop: crop[::2], [_image()], halo=0, tile=(10, 10))
+
+
+def test_out_of_core_results_share_one_scratch_directory(tmp_path):
+    import os
+    import tempfile
+    from napari_assistant._tiling import process_tiled, scratch_directory
+
+    image = _image()
+    data = np.lib.format.open_memmap(str(tmp_path / "image.npy"), mode="w+", dtype=image.dtype, shape=image.shape)
+    data[:] = image
+
+    def directories():
+        return {name for name in os.listdir(tempfile.gettempdir()) if name.startswith("napari-assistant-")}
+
+    scratch_directory()
+    before = directories()
+    results = [process_tiled(lambda crop: crop + 1, [data], halo=0, tile=(20, 20)) for _ in range(3)]
+
+    # no new temporary folders, and the files are gone already while the results stay readable
+    assert directories() == before
+    assert os.listdir(scratch_directory()) == []
+    for result in results:
+        np.testing.assert_allclose(result, image + 1)
+
+
+def test_needs_tiling(monkeypatch):
+    from napari_assistant._tiling import needs_tiling, TILING_THRESHOLD_ENVIRONMENT_VARIABLE
+
+    image = np.zeros((1024, 1024), dtype=np.uint8)
+    assert not needs_tiling([image])
+    monkeypatch.setenv(TILING_THRESHOLD_ENVIRONMENT_VARIABLE, "0.5")
+    assert needs_tiling([image, None])
+
+
+def test_large_input_is_tiled_on_every_run(monkeypatch):
+    import napari
+    from napari.components import ViewerModel
+    from napari_tools_menu import register_function
+    from napari_workflows import WorkflowManager
+    from napari_assistant._tiling import TILING_THRESHOLD_ENVIRONMENT_VARIABLE
+
+    calls = []
+
+    def tiled_blur(source: napari.types.ImageData, destination: napari.types.ImageData = None,
+                   sigma: float = 1) -> napari.types.ImageData:
+        calls.append((source.shape, destination is not None))
+        if destination is None:
+            destination = np.empty_like(source)
+        destination[...] = ndi.gaussian_filter(source, sigma)
+        return destination
+
+    # makes it a clesperanto operation, which may write into the previous result
+    tiled_blur.__module__ = "pyclesperanto_test"
+    register_function(tiled_blur, menu="Filtering / noise removal > Tiled blur (clesperanto)")
+
+    from napari_assistant._categories import CATEGORIES, all_operations
+    from napari_assistant._gui._category_widget import make_gui_for_category
+    from napari_assistant._result_cache import result_cache
+    all_operations.cache_clear()
+    monkeypatch.setenv(TILING_THRESHOLD_ENVIRONMENT_VARIABLE, "0.001")
+
+    viewer = ViewerModel()
+    data = _image((40, 2100))
+    image = viewer.add_image(data)
+    widget = make_gui_for_category(CATEGORIES["Remove noise"], viewer=viewer,
+                                   operation_name="Tiled blur (clesperanto)", autocall=False)
+    max_bytes = result_cache().max_bytes
+    # without cache the second run would reuse the first result as output
+    result_cache().max_bytes = 0
+    try:
+        widget(input0=image, x=1.0, viewer=viewer)
+        first_calls = len(calls)
+        layer = widget(input0=image, x=2.0, viewer=viewer)
+    finally:
+        result_cache().max_bytes = max_bytes
+        # stop the workflow manager's background updates of this viewer
+        WorkflowManager.install(viewer).worker.quit()
+
+    # both runs were processed tile by tile, without passing a destination
+    assert first_calls > 1 and len(calls) - first_calls > 1
+    assert all(shape != data.shape and not destination for shape, destination in calls)
+    np.testing.assert_allclose(np.asarray(layer.data), ndi.gaussian_filter(data, 2.0), rtol=1e-5, atol=1e-6)
@@ -0,0 +1,71 @@
+import threading
+
+import numpy as np
+
+
+def test_process_timepoints():
+    from napari_assistant._time_lapse import process_timepoints
+
+    reported = []
+    stacks, frames_per_second = process_timepoints(
+        lambda t: (np.full((3, 4), t, dtype=np.uint8), np.full((2,), t * 0.5)),
+        5,
+        max_workers=2,
+        progress=lambda finished, total: reported.append((finished, total)),
+    )
+
+    assert [stack.shape for stack in stacks] == [(5, 3, 4), (5, 2)]
+    assert stacks[0].dtype == np.uint8
+    assert np.array_equal(stacks[0][:, 0, 0], np.arange(5))
+    assert np.array_equal(stacks[1][:, 0], np.arange(5) * 0.5)
+    assert reported[-1] == (5, 5)
+    assert frames_per_second > 0
+
+
+def test_process_timepoints_cancelled():
+    from napari_assistant._time_lapse import process_timepoints
+
+    cancel = threading.Event()
+
+    def compute_frame(t):
+        cancel.set()
+        return (np.zeros((2, 2)),)
+
+    stacks, _ = process_timepoints(compute_frame, 100, max_workers=1, cancel=cancel)
+    assert stacks is None
+
+
+def test_allocate_stack_on_disk(tmp_path):
+    from napari_assistant._time_lapse import allocate_stack
+
+    frame = np.zeros((16, 16), dtype=np.float32)
+    assert not isinstance(allocate_stack(4, frame, tmp_path), np.memmap)
+
+    stack = allocate_stack(4, frame, tmp_path, in_memory_limit_mb=0)
+    assert isinstance(stack, np.memmap)
+    assert stack.shape == (4, 16, 16)
+    # the file is deleted once mapped, its space is freed with the array
+    stack[:] = 1
+    assert list(tmp_path.glob("*.npy")) == []
+
+
+def test_time_lapse_job_failing(qtbot, monkeypatch):
+    from napari.components import ViewerModel
+    from napari.utils.notifications import notification_manager
+    from napari_assistant._gui._time_lapse import TimeLapseJob
+
+    errors = []
+    monkeypatch.setattr(notification_manager, "receive_error", lambda *exc_info: errors.append(exc_info[1]))
+
+    def compute_frame(t):
+        raise ValueError(f"timepoint {t} failed")
+
+    finished = []
+    viewer = ViewerModel()
+    job = TimeLapseJob(viewer, compute_frame, 3, ["result"], ["image"], on_finished=lambda: finished.append(True))
+    job.start()
+    qtbot.waitUntil(lambda: bool(finished), timeout=5000)
+
+    assert not job.running
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
+    assert len(viewer.layers) == 0